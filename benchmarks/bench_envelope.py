@@ -0,0 +1,88 @@
+"""
+Microbenchmark of generate_soap_body against the precompiled SOAPEnvelope.
+
+Usage: python benchmarks/bench_envelope.py [--number N]
+"""
+
+import os
+import sys
+import timeit
+import argparse
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from sfcs import sfcs_lib  # noqa: E402
+
+CHECK_ROUTE_QUERY = """
+        <CheckRoute xmlns="http://localhost/Tester.WebService/WebService">
+            <UnitSerialNumber>{usn}</UnitSerialNumber>
+            <StageCode>{stage}</StageCode>
+        </CheckRoute>
+        """
+
+UPLOAD_QUERY = """
+        <UploadUSNItemWithBarcodeValidation xmlns="http://localhost/Tester.WebService/WebService">
+            <UnitSerialNumber>{usn}</UnitSerialNumber>
+            <StageCode>{stage}</StageCode>
+            <ComponentSerialNumber>{csn}</ComponentSerialNumber>
+            <Assembly>{assembly}</Assembly>
+            <CheckUsedCategory>{category}</CheckUsedCategory>
+            <Line>{line}</Line>
+            <Workstation>{workstation}</Workstation>
+            <UserID>{employee_id}</UserID>
+        </UploadUSNItemWithBarcodeValidation>
+        """
+
+UPLOAD_VALUES = {
+    "usn": "WTR1234567",
+    "stage": "AO",
+    "csn": "ZA1B2C3D",
+    "assembly": "true",
+    "category": "A",
+    "line": "3L6",
+    "workstation": "3L06B1AO17",
+    "employee_id": "E12345",
+}
+
+CASES = {
+    "check_route": (
+        CHECK_ROUTE_QUERY,
+        sfcs_lib.CHECK_ROUTE,
+        {"usn": "WTR1", "stage": "AO"},
+    ),
+    "upload": (
+        UPLOAD_QUERY,
+        sfcs_lib.UPLOAD_USN_ITEM_WITH_BARCODE_VALIDATION,
+        UPLOAD_VALUES,
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'case':<14}{'builder':<22}{'us/call':>10}{'bytes':>8}")
+    for name, (query, envelope, values) in CASES.items():
+        legacy = timeit.timeit(
+            lambda: sfcs_lib.generate_soap_body(query, **values).encode("utf-8"),
+            number=args.number,
+        )
+        compiled = timeit.timeit(lambda: envelope.build(**values), number=args.number)
+        legacy_size = len(sfcs_lib.generate_soap_body(query, **values).encode("utf-8"))
+        compiled_size = len(envelope.build(**values))
+        print(
+            f"{name:<14}{'generate_soap_body':<22}"
+            f"{legacy / args.number * 1e6:>10.2f}{legacy_size:>8}"
+        )
+        print(
+            f"{name:<14}{'SOAPEnvelope.build':<22}"
+            f"{compiled / args.number * 1e6:>10.2f}{compiled_size:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
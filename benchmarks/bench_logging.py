@@ -0,0 +1,114 @@
+"""
+Benchmark of the logging overhead per scan seen by an SFCS worker.
+
+Emits the records of one upload (processing, response, PLC signal) with
+the console and rotating file handlers called in the worker thread and
+eager f-strings (before), then with lazy %-style structured records
+enqueued to a QueueListener that runs the same handlers (after).
+--stall-ms adds a sleep to every file write to emulate a slow disk.
+
+Usage: python benchmarks/bench_logging.py [--scans N] [--stall-ms MS]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from logging.handlers import RotatingFileHandler
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from helpers.log_queue import (  # noqa: E402
+    StructuredFormatter,
+    start_queue_logging,
+    stop_queue_logging,
+)
+
+FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+
+class StallingFileHandler(RotatingFileHandler):
+    stall = 0.0
+
+    def emit(self, record):
+        if self.stall:
+            time.sleep(self.stall)
+        super().emit(record)
+
+
+def build_logger(directory, stall, formatter):
+    logger = logging.getLogger(f"bench.{os.path.basename(directory)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    console = logging.StreamHandler(open(os.devnull, "w"))
+    file = StallingFileHandler(
+        os.path.join(directory, "bench.log"), maxBytes=1_000_000, backupCount=3
+    )
+    file.stall = stall
+    for handler in (console, file):
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+    return logger
+
+
+def eager_scan(logger, usn, csn, response, plc_ip):
+    logger.info(f"Processing Upload for {csn} - Attempt 1")
+    logger.info(f"Upload Response for {csn}: {response}")
+    logger.info(f"Attempting to send signal to {plc_ip} for tag OK_1.")
+
+
+def lazy_scan(logger, usn, csn, response, plc_ip):
+    logger.info("Processing Upload for %s - Attempt %d", csn, 1)
+    logger.info(
+        "Upload Response for %s: %s",
+        csn,
+        response,
+        extra={
+            "usn": usn,
+            "csn": csn,
+            "operation": "upload",
+            "latency": 12.5,
+            "result": response,
+        },
+    )
+    logger.info("Attempting to send signal to %s for tag %s.", plc_ip, "OK_1")
+
+
+def run(scan, logger, scans):
+    started_at = time.perf_counter()
+    for index in range(scans):
+        scan(logger, "WTR0000001", f"ZA{index:08d}", "OK", "10.0.0.1")
+    return (time.perf_counter() - started_at) / scans * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--stall-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    stall = args.stall_ms / 1000
+
+    with tempfile.TemporaryDirectory() as before_dir:
+        logger = build_logger(before_dir, stall, logging.Formatter(FORMAT))
+        before = run(eager_scan, logger, args.scans)
+
+    with tempfile.TemporaryDirectory() as after_dir:
+        logger = build_logger(after_dir, stall, StructuredFormatter(FORMAT))
+        listener = start_queue_logging(logger)
+        after = run(lazy_scan, logger, args.scans)
+        started_at = time.perf_counter()
+        stop_queue_logging(listener)
+        drained = time.perf_counter() - started_at
+
+    print(f"scans: {args.scans}, file stall: {args.stall_ms} ms")
+    print(f"handlers in worker (before): {before:9.1f} us per scan")
+    print(f"queue listener     (after):  {after:9.1f} us per scan")
+    print(f"listener drained the backlog in {drained:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark of full-tree response parsing against the pull parser.
+
+Builds the responses of the SFCS operations the way the server returns
+them, a single result element in the SOAP envelope, and compares
+fromstring + find_xml_value with parse_result, both on the whole body and
+fed in 8 KiB chunks as a streamed response would be. --rows appends a data
+set after the result, as returned by the table-valued functions, to show
+where streaming starts to pay off.
+
+On the real responses (about 400 bytes) the parsers are within noise of
+each other, so the SOAP calls read the whole body and parse it at once.
+
+Usage: python benchmarks/bench_parser.py [--rows N] [--number N]
+"""
+
+import os
+import sys
+import timeit
+import argparse
+import tracemalloc
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from xml.etree.ElementTree import fromstring  # noqa: E402
+from sfcs import sfcs_lib  # noqa: E402
+from sfcs.parser import parse_result  # noqa: E402
+
+RESULT = sfcs_lib.TESTER_NAMESPACE + "DynamicDBFunctionResult"
+RESULT_PATH = "./soap:Body/a:DynamicDBFunctionResponse/a:DynamicDBFunctionResult"
+CHUNK_SIZE = 8192
+
+# Result element and value of every operation on the hot path.
+OPERATIONS = {
+    "check_route": ("CheckRoute", "OK"),
+    "upload": ("UploadUSNItemWithBarcodeValidation", "OK"),
+    "validate_hdd": ("DynamicDBFunction", "24"),
+    "complete": ("Complete", "OK"),
+}
+
+
+def build_response(rows=0, operation="DynamicDBFunction", value="24"):
+    row = (
+        "<Table><USN>WTR{0:07d}</USN><CSN>ZA{0:08d}</CSN>"
+        "<Stage>AO</Stage><Line>3L6</Line></Table>"
+    )
+    data = "".join(row.format(i) for i in range(rows))
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"'
+        ' xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+        ' xmlns:xsd="http://www.w3.org/2001/XMLSchema">'
+        "<soap:Body>"
+        f'<{operation}Response xmlns="http://localhost/Tester.WebService/WebService">'
+        f"<{operation}Result>{value}</{operation}Result>"
+        + (f"<DataSet>{data}</DataSet>" if rows else "")
+        + f"</{operation}Response>"
+        "</soap:Body>"
+        "</soap:Envelope>"
+    ).encode("utf-8")
+
+
+def chunked(data, size=CHUNK_SIZE):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+def parsers(operation):
+    result = sfcs_lib.TESTER_NAMESPACE + f"{operation}Result"
+    path = f"./soap:Body/a:{operation}Response/a:{operation}Result"
+    return (
+        (
+            "full_tree",
+            lambda content: sfcs_lib.find_xml_value(fromstring(content), path),
+        ),
+        ("pull_body", lambda content: parse_result([content], result)),
+        ("streaming", lambda content: parse_result(chunked(content), result)),
+    )
+
+
+def peak_memory(function, content):
+    tracemalloc.start()
+    function(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=0)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'operation':<14}{'bytes':>8}{'parser':>12}{'us/call':>10}{'peak KiB':>10}")
+    for name, (operation, value) in OPERATIONS.items():
+        content = build_response(args.rows, operation, value)
+        for parser_name, function in parsers(operation):
+            assert function(content) == value
+            seconds = timeit.timeit(lambda: function(content), number=args.number)
+            print(
+                f"{name:<14}{len(content):>8}{parser_name:>12}"
+                f"{seconds / args.number * 1e6:>10.1f}"
+                f"{peak_memory(function, content) / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
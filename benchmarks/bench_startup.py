@@ -0,0 +1,151 @@
+"""
+Benchmark of the interface startup, the import time of every module.
+
+Imports what main.py imports before the Employee ID dialog ("startup"),
+then the backend that the interface loads once the dialog is up
+("backend"), each in fresh interpreters with python -X importtime. Prints
+the wall time of both stages and the modules that take the longest, and
+fails (exit status 1) when the median startup stage exceeds the budget.
+The time until the dialog is on screen is logged by the app itself
+("Employee ID dialog shown after ... ms").
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--top N]
+                                          [--budget-ms MS] [--output FILE]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Required settings of config.py that have no default.
+DEFAULT_ENVIRONMENT = {
+    "MAX_RETRIES": "3",
+    "RETRY_DELAY": "1",
+    "PLC_3L3": "10.0.0.3",
+    "PLC_3L6": "10.0.0.6",
+    "SFCS_SERVER": "127.0.0.1:8080",
+    "STAGE": "AO",
+    "CATEGORY": "A",
+    "PLC_DELAY": "0.5",
+    "MAX_BYTES": "10000000",
+    "BACKUP_COUNT": "3",
+}
+
+STAGES = {
+    "startup": "import main",
+    "backend": "import backend.logic, helpers.metrics",
+}
+
+# Imports the earlier stages, then the stage and prints its time. The
+# import times after the mark on stderr belong to the stage.
+STAGE_MARK = "-- stage --"
+SCRIPT = """
+import sys
+import time
+{before}
+sys.stderr.write("%s\\n")
+started_at = time.perf_counter()
+{stage}
+print(time.perf_counter() - started_at)
+""" % STAGE_MARK
+
+
+def parse_importtime(stderr):
+    # Return {module: (self, cumulative)} in microseconds.
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_stage(name, environment):
+    names = list(STAGES)
+    before = "\n".join(STAGES[stage] for stage in names[: names.index(name)])
+    script = SCRIPT.format(before=before, stage=STAGES[name])
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        env=environment,
+        cwd=SRC,
+        check=True,
+    )
+    seconds = float(process.stdout.strip().splitlines()[-1])
+    return seconds, parse_importtime(process.stderr.split(STAGE_MARK)[-1])
+
+
+def measure(repeat):
+    environment = dict(os.environ, PYTHONPATH=SRC)
+    for name, value in DEFAULT_ENVIRONMENT.items():
+        environment.setdefault(name, value)
+
+    results = {}
+    for name in STAGES:
+        wall = []
+        self_times = defaultdict(list)
+        cumulative_times = defaultdict(list)
+        for _ in range(repeat):
+            seconds, modules = run_stage(name, environment)
+            wall.append(seconds * 1000)
+            for module, (self_us, cumulative_us) in modules.items():
+                self_times[module].append(self_us / 1000)
+                cumulative_times[module].append(cumulative_us / 1000)
+        results[name] = {
+            "ms": statistics.median(wall),
+            "modules": {
+                module: {
+                    "self_ms": statistics.median(self_times[module]),
+                    "cumulative_ms": statistics.median(cumulative_times[module]),
+                }
+                for module in self_times
+            },
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules listed per stage")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=500.0,
+        help="allowed median import time of the startup stage",
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    for name, result in results.items():
+        modules = result["modules"]
+        print(f"{name}: {result['ms']:.1f} ms, {len(modules)} modules")
+        print(f"  {'module':<40}{'self ms':>10}{'cumul ms':>10}")
+        slowest = sorted(modules.items(), key=lambda item: -item[1]["self_ms"])
+        for module, times in slowest[: args.top]:
+            print(
+                f"  {module:<40}{times['self_ms']:>10.2f}{times['cumulative_ms']:>10.2f}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(results, f, indent=2)
+
+    startup = results["startup"]["ms"]
+    if startup > args.budget_ms:
+        print(f"Startup took {startup:.1f} ms, the budget is {args.budget_ms:.0f} ms.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Microbenchmark suite for the sfcs_lib and logic hot paths.
+
+Runs every case with timeit, prints the time per call and can save the
+results as JSON. Given a baseline file saved from another commit, every
+case is compared with it and the run fails (exit status 1) when a case
+got slower than the baseline by more than the threshold.
+
+Usage:
+    python benchmarks/suite.py [--output FILE] [--baseline FILE]
+                               [--threshold 0.2] [--repeat N] [--filter TEXT]
+"""
+
+import os
+import sys
+import json
+import atexit
+import logging
+import time
+import timeit
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from xml.etree.ElementTree import fromstring
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from bench_envelope import UPLOAD_QUERY, UPLOAD_VALUES  # noqa: E402
+from bench_parser import RESULT, RESULT_PATH, build_response  # noqa: E402
+from sfcs import sfcs_lib  # noqa: E402
+from sfcs.parser import parse_result  # noqa: E402
+from helpers import tracing  # noqa: E402
+from helpers.utils import get_line, read_allowed_users  # noqa: E402
+from backend import logic  # noqa: E402
+from backend.duplicates import CSNIndex  # noqa: E402
+from backend.journal import Journal  # noqa: E402
+
+CASES = {}
+
+
+def case(number):
+    # Register a benchmark, the factory returns the function to time.
+    def register(factory):
+        CASES[factory.__name__] = (factory, number)
+        return factory
+
+    return register
+
+
+class FakeApp:
+    """Stand-in for the interface, the UI calls do nothing."""
+
+    def __init__(self):
+        self.current_USN = None
+        self.old_USN = None
+        self.counter = 0
+        self.quantity = 24
+        self.robot_number = 1
+        self.line = "3L6"
+        self.workstation = "3L06B1AO17"
+        self.employee_id = "E12345"
+        self.response_text = self.error_text = self.quantity_label = None
+
+    def update_text_widget(self, *args):
+        pass
+
+    def update_labels(self, *args):
+        pass
+
+    def clean_text_widget(self, *args):
+        pass
+
+
+def stub_logic():
+    # Replace SFCS, the PLC, the journal and the tracer with in-memory stubs.
+    logic.upload_USN_item_with_barcode_validation = lambda *args: "OK"
+    logic.validate_hdd = lambda usn: "24"
+    logic.send_complete = lambda *args: "OK"
+    logic.check_route = lambda usn: "OK"
+    logic.send_signal = lambda *args: None
+    logic.journal = Journal()
+    logic.csn_index = CSNIndex()
+    tracing._tracer = tracing.Tracer()
+
+
+@case(number=20000)
+def generate_soap_body():
+    return lambda: sfcs_lib.generate_soap_body(UPLOAD_QUERY, **UPLOAD_VALUES)
+
+
+@case(number=20000)
+def envelope_build():
+    envelope = sfcs_lib.UPLOAD_USN_ITEM_WITH_BARCODE_VALIDATION
+    return lambda: envelope.build(**UPLOAD_VALUES)
+
+
+@case(number=2000)
+def find_xml_value():
+    content = build_response()
+    return lambda: sfcs_lib.find_xml_value(fromstring(content), RESULT_PATH)
+
+
+@case(number=2000)
+def parse_result_body():
+    content = build_response()
+    return lambda: parse_result([content], RESULT)
+
+
+@case(number=200000)
+def get_line_from_workstation():
+    return lambda: get_line("3L06B1AO17")
+
+
+@case(number=2000)
+def read_allowed_users_file():
+    users = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+    with users:
+        users.write("\n".join(f"E{index:05d}" for index in range(200)))
+    atexit.register(os.unlink, users.name)
+    return lambda: read_allowed_users(users.name)
+
+
+@case(number=5000)
+def process_serial_and_restart():
+    stub_logic()
+    app = FakeApp()
+    scanner = logic.PLCAutoScanningLogic(app)
+    serials = iter(range(10**9))
+
+    def scan():
+        # A USN is completed and restarted every app.quantity scans.
+        if app.current_USN is None:
+            app.current_USN = f"WTR{next(serials):07d}"
+        scanner.process_serial(f"ZA{next(serials):08d}", app.current_USN)
+
+    return scan
+
+
+@case(number=20000)
+def check_restart_below_quantity():
+    stub_logic()
+    app = FakeApp()
+    app.current_USN = "WTR0000001"
+    app.counter = 1
+    scanner = logic.PLCAutoScanningLogic(app)
+    return lambda: scanner.check_restart(app.current_USN)
+
+
+def run(names, repeat):
+    results = {}
+    for name in names:
+        factory, number = CASES[name]
+        timer = timeit.Timer(factory())
+        times = [seconds / number * 1e6 for seconds in timer.repeat(repeat, number)]
+        results[name] = {
+            "us_per_call": min(times),
+            "median": statistics.median(times),
+            "number": number,
+            "repeat": repeat,
+        }
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, threshold):
+    # Return the names of the cases slower than the baseline by more than threshold.
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = result["us_per_call"] / previous["us_per_call"]
+        result["baseline"] = previous["us_per_call"]
+        result["change"] = ratio - 1
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown against the baseline, 0.2 is 20%%",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="", help="run the cases matching TEXT")
+    args = parser.parse_args()
+
+    # Logging has its own benchmark (bench_logging.py), keep it out of these.
+    logging.disable(logging.CRITICAL)
+    names = [name for name in CASES if args.filter in name]
+    results = run(names, args.repeat)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+
+    print(f"{'case':<30}{'us/call':>10}{'median':>10}{'baseline':>10}{'change':>9}")
+    for name, result in results.items():
+        line = f"{name:<30}{result['us_per_call']:>10.2f}{result['median']:>10.2f}"
+        if "baseline" in result:
+            line += f"{result['baseline']:>10.2f}{result['change']:>+9.1%}"
+            if name in regressions:
+                line += "  REGRESSION"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+    if regressions:
+        print(
+            f"{len(regressions)} case(s) slower than the baseline by more than "
+            f"{args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
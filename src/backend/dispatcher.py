@@ -0,0 +1,98 @@
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from queue import Queue
+from helpers.tracing import TRACE_ID, get_tracer
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+
+def main():
+    pass
+
+
+class KeyedDispatcher:
+    """
+    Worker pool that runs tasks with the same key in submission order.
+
+    Each key owns a FIFO of pending tasks and at most one of them runs at a
+    time. Only keys with work waiting sit in the ready queue, so tasks for
+    different keys still run in parallel across the workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ready = Queue()
+        self._workers = []
+        self._size = 0
+        self._busy = 0
+
+    def submit(self, key, task, *args):
+        # The task runs in a copy of the caller's context, with its trace ID.
+        context = contextvars.copy_context()
+        submitted_at = time.monotonic()
+        with self._lock:
+            self._size += 1
+            tasks = self._pending.get(key)
+            if tasks is None:
+                self._pending[key] = deque([(task, args, context, submitted_at)])
+                self._ready.put(key)
+            else:
+                tasks.append((task, args, context, submitted_at))
+
+    def start(self, number_of_workers):
+        # Start workers until the pool reaches the requested size.
+        with self._lock:
+            for _ in range(number_of_workers - len(self._workers)):
+                worker = threading.Thread(target=self._work, daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            key = self._ready.get(block=True)
+            with self._lock:
+                task, args, context, submitted_at = self._pending[key][0]
+                self._busy += 1
+            try:
+                if context.get(TRACE_ID) is not None:
+                    get_tracer().record(
+                        "queue",
+                        submitted_at,
+                        trace_id=context.get(TRACE_ID),
+                        task=task.__name__,
+                    )
+                context.run(task, *args)
+            except Exception:
+                logger.exception(f"Task {task.__name__} failed for key {key}.")
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._size -= 1
+                    tasks = self._pending[key]
+                    tasks.popleft()
+                    if tasks:
+                        self._ready.put(key)
+                    else:
+                        del self._pending[key]
+
+    def qsize(self):
+        # Number of tasks submitted and not finished yet.
+        with self._lock:
+            return self._size
+
+    def busy(self):
+        with self._lock:
+            return self._busy
+
+    @property
+    def workers(self):
+        return len(self._workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+
+def main():
+    pass
+
+
+class CSNIndex:
+    """
+    In-memory index of the CSNs accepted by SFCS for each USN.
+
+    When a path is given, changes are appended to a JSON lines file and
+    the index is rebuilt from it on start, so it survives restarts. USNs
+    that saw no upload for retention seconds are never completed and are
+    dropped, like the done intents of the journal. The file is rewritten
+    with the open USNs on start and whenever it holds more records than
+    the index.
+    """
+
+    def __init__(self, path=None, retention=7 * 24 * 3600, clock=time.time):
+        self.path = path
+        self.retention = retention
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._csns = {}
+        self._added_at = {}
+        self._records = 0
+        if path:
+            self._load()
+
+    def contains(self, usn, csn):
+        with self._lock:
+            return csn in self._csns.get(usn, ())
+
+    def add(self, usn, csn):
+        with self._lock:
+            now = self._clock()
+            if usn not in self._csns:
+                self._expire(now)
+            self._csns.setdefault(usn, set()).add(csn)
+            self._added_at[usn] = now
+            self._append({"op": "add", "usn": usn, "csn": csn, "at": now})
+
+    def discard(self, usn):
+        # Forget a USN once its lifecycle is over.
+        with self._lock:
+            if self._csns.pop(usn, None) is not None:
+                del self._added_at[usn]
+                self._append({"op": "discard", "usn": usn})
+
+    def count(self, usn):
+        with self._lock:
+            return len(self._csns.get(usn, ()))
+
+    def _expire(self, now):
+        # Drop the USNs abandoned before they were completed.
+        for usn, added_at in list(self._added_at.items()):
+            if added_at < now - self.retention:
+                del self._csns[usn]
+                del self._added_at[usn]
+
+    def _append(self, record):
+        if not self.path:
+            return
+        size = sum(len(csns) for csns in self._csns.values())
+        try:
+            if self._records >= 2 * size + 100:
+                self._compact()
+            else:
+                with open(self.path, "a", encoding="utf8") as f:
+                    f.write(json.dumps(record) + "\n")
+                self._records += 1
+        except OSError as e:
+            logger.error(f"Failed to persist CSN index to {self.path}. Error: {e}.")
+
+    def _compact(self):
+        # Rewrite the file with the open USNs only.
+        temporary_path = self.path + ".tmp"
+        self._records = 0
+        with open(temporary_path, "w", encoding="utf8") as f:
+            for usn, csns in self._csns.items():
+                added_at = self._added_at[usn]
+                for csn in sorted(csns):
+                    record = {"op": "add", "usn": usn, "csn": csn, "at": added_at}
+                    f.write(json.dumps(record) + "\n")
+                    self._records += 1
+        os.replace(temporary_path, self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        now = self._clock()
+        with open(self.path, "r", encoding="utf8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash can leave a partially written last line.
+                    continue
+                if record["op"] == "add":
+                    self._csns.setdefault(record["usn"], set()).add(record["csn"])
+                    # Records written before the timestamp existed.
+                    self._added_at[record["usn"]] = record.get("at", now)
+                else:
+                    self._csns.pop(record["usn"], None)
+                    self._added_at.pop(record["usn"], None)
+
+        self._expire(now)
+        self._compact()
+        logger.info(f"Loaded CSN index with {len(self._csns)} open USNs.")
+
+
+if __name__ == "__main__":
+    main()
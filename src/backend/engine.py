@@ -0,0 +1,175 @@
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from helpers.tracing import TRACE_ID, get_tracer
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+
+def main():
+    pass
+
+
+class AsyncEngine:
+    """
+    Event loop thread that runs the scan pipeline as coroutines.
+
+    Tasks with the same key run one after the other in submission order,
+    as on the KeyedDispatcher, while the tasks of every other key wait on
+    the network side by side on the one loop thread. submit and call_later
+    can be called from any thread, the Tk thread hands its scans over with
+    them. The journal and CSN index writes of the coroutines wait for
+    their fsync on a writer thread instead, see run_blocking.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = None
+        self._lock = threading.Lock()
+        # Last task of every key with work, only used on the loop thread.
+        self._tails = {}
+        self._size = 0
+        self._scheduled = 0
+        self._running = 0
+        # Delayed tasks per key that did not start running yet.
+        self._delayed = {}
+        # One thread, so the SQLite writes keep the order of the coroutines.
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="AsyncEngineWriter"
+        )
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="AsyncEngine", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            thread.join()
+
+    def submit(self, key, coroutine_function, *args):
+        # The task runs in a copy of the caller's context, with its trace ID.
+        context = contextvars.copy_context()
+        submitted_at = time.monotonic()
+        with self._lock:
+            self._size += 1
+        self._loop.call_soon_threadsafe(
+            self._schedule, key, coroutine_function, args, context, submitted_at
+        )
+
+    def call_later(self, delay, key, coroutine_function, *args):
+        # Submit the task after delay seconds, without holding its key meanwhile.
+        context = contextvars.copy_context()
+        queued_at = time.monotonic()
+        with self._lock:
+            self._scheduled += 1
+            self._delayed[key] = self._delayed.get(key, 0) + 1
+
+        async def delayed(*args):
+            with self._lock:
+                self._delayed[key] -= 1
+                if not self._delayed[key]:
+                    del self._delayed[key]
+            await coroutine_function(*args)
+
+        delayed.__name__ = coroutine_function.__name__
+
+        def due():
+            with self._lock:
+                self._scheduled -= 1
+            context.run(
+                get_tracer().record,
+                "retry_wait",
+                queued_at,
+                task=coroutine_function.__name__,
+            )
+            context.run(self.submit, key, delayed, *args)
+
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, due)
+
+    def run(self, coroutine):
+        # Run a coroutine on the loop from another thread, returns its future.
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    async def run_blocking(self, function, *args):
+        # Await a blocking call on the writer thread, with the caller's trace ID.
+        context = contextvars.copy_context()
+        return await self._loop.run_in_executor(
+            self._writer, context.run, function, *args
+        )
+
+    def _schedule(self, key, coroutine_function, args, context, submitted_at):
+        previous = self._tails.get(key)
+        coroutine = self._run_task(
+            previous, key, coroutine_function, args, submitted_at
+        )
+        # Tasks copy the current context, run the creation in the caller's.
+        task = context.run(self._loop.create_task, coroutine)
+        self._tails[key] = task
+        task.add_done_callback(lambda task: self._finished(key, task))
+
+    async def _run_task(self, previous, key, coroutine_function, args, submitted_at):
+        if previous is not None:
+            # Wait for the earlier task of the key, whatever its outcome.
+            await asyncio.wait([previous])
+        with self._lock:
+            self._running += 1
+        try:
+            trace_id = TRACE_ID.get()
+            if trace_id is not None:
+                get_tracer().record(
+                    "queue",
+                    submitted_at,
+                    trace_id=trace_id,
+                    task=coroutine_function.__name__,
+                )
+            await coroutine_function(*args)
+        except Exception:
+            logger.exception(
+                f"Task {coroutine_function.__name__} failed for key {key}."
+            )
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _finished(self, key, task):
+        if self._tails.get(key) is task:
+            del self._tails[key]
+        with self._lock:
+            self._size -= 1
+
+    def pending(self, key):
+        # Number of call_later tasks of key waiting for their delay or turn.
+        with self._lock:
+            return self._delayed.get(key, 0)
+
+    def qsize(self):
+        # Number of tasks submitted and not finished yet.
+        with self._lock:
+            return self._size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self._size,
+                "running": self._running,
+                "scheduled": self._scheduled,
+            }
+
+
+if __name__ == "__main__":
+    main()
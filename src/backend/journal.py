@@ -0,0 +1,354 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import namedtuple
+
+from sfcs.sfcs_lib import CIRCUIT_OPEN, is_transient
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+# Intent states. A SENDING intent is owned by a worker, a PENDING one by the
+# flusher.
+SENDING = "sending"
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+# A recovered intent was SENDING when the process stopped, SFCS may have
+# accepted it.
+Intent = namedtuple(
+    "Intent", "id usn operation payload attempts recovered", defaults=(False,)
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usn TEXT,
+    operation TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    response TEXT,
+    recovered INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS intents_state ON intents (state, usn, id);
+"""
+
+
+def main():
+    pass
+
+
+class Journal:
+    """
+    Append-only, crash-safe journal of the SFCS upload/complete intents.
+
+    Every intent is written (SQLite in WAL mode, synchronous FULL) before
+    it is sent. Intents still SENDING after a crash are handed to the
+    flusher on the next start. Without a path the journal is disabled and
+    every method is a no-op.
+    """
+
+    def __init__(self, path=None, retention=7 * 24 * 3600):
+        self.path = path
+        self.retention = retention
+        self.backlog = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def add_listener(self, listener):
+        # The listener is called with the backlog size whenever it changes.
+        self._listeners.append(listener)
+
+    def _connection(self):
+        # Open the database on first use, the caller holds the lock.
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(SCHEMA)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(intents)")]
+            if "recovered" not in columns:
+                # Journals written before the column existed.
+                conn.execute(
+                    "ALTER TABLE intents ADD COLUMN recovered INTEGER NOT NULL DEFAULT 0"
+                )
+            now = time.time()
+            with conn:
+                conn.execute(
+                    "UPDATE intents SET state = ?, recovered = 1, updated_at = ?"
+                    " WHERE state = ?",
+                    (PENDING, now, SENDING),
+                )
+                conn.execute(
+                    "DELETE FROM intents WHERE state = ? AND updated_at < ?",
+                    (DONE, now - self.retention),
+                )
+            self._conn = conn
+            self._refresh_backlog()
+        return self._conn
+
+    def _refresh_backlog(self):
+        (backlog,) = self._conn.execute(
+            "SELECT COUNT(*) FROM intents WHERE state = ?", (PENDING,)
+        ).fetchone()
+        changed = backlog != self.backlog
+        self.backlog = backlog
+        return changed
+
+    def _notify(self, changed):
+        if not changed:
+            return
+        for listener in self._listeners:
+            try:
+                listener(self.backlog)
+            except Exception:
+                logger.exception("Journal backlog listener failed.")
+
+    def open(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._connection()
+        self._notify(True)
+
+    def record(self, usn, operation, payload, state=SENDING):
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO intents"
+                    " (usn, operation, payload, state, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (usn, operation, json.dumps(payload), state, now, now),
+                )
+            changed = state == PENDING and self._refresh_backlog()
+        self._notify(changed)
+        return cursor.lastrowid
+
+    def mark(self, intent_id, state, response=None):
+        self.mark_many([(intent_id, state, response, 0)])
+
+    def mark_many(self, updates):
+        # Apply (id, state, response, extra attempts) updates in one transaction.
+        updates = [update for update in updates if update[0] is not None]
+        if not self.enabled or not updates:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "UPDATE intents SET state = ?, response = ?,"
+                    " attempts = attempts + ?, updated_at = ? WHERE id = ?",
+                    [
+                        (state, response, attempts, now, intent_id)
+                        for intent_id, state, response, attempts in updates
+                    ],
+                )
+            changed = self._refresh_backlog()
+        self._notify(changed)
+
+    def pending(self, limit, after_id=0):
+        if not self.enabled:
+            return []
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT id, usn, operation, payload, attempts, recovered"
+                    " FROM intents WHERE state = ? AND id > ? ORDER BY id LIMIT ?",
+                    (PENDING, after_id, limit),
+                )
+                .fetchall()
+            )
+        return [
+            Intent(
+                intent_id,
+                usn,
+                operation,
+                json.loads(payload),
+                attempts,
+                bool(recovered),
+            )
+            for intent_id, usn, operation, payload, attempts, recovered in rows
+        ]
+
+    def has_pending(self, usn):
+        # True while an intent for the USN has not reached SFCS yet.
+        if not self.enabled:
+            return False
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT 1 FROM intents WHERE usn = ? AND state IN (?, ?) LIMIT 1",
+                    (usn, PENDING, SENDING),
+                )
+                .fetchone()
+            )
+        return row is not None
+
+    def failed_upload(self, usn):
+        # (csn, response) of the first queued upload of the USN that SFCS
+        # rejected, None when there is none. Uploads rejected while the
+        # operator waited were never counted and are left out.
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT payload, response FROM intents WHERE usn = ?"
+                    " AND operation = ? AND state = ? AND attempts > 0"
+                    " ORDER BY id LIMIT 1",
+                    (usn, "upload", FAILED),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        payload, response = row
+        return json.loads(payload).get("csn"), response
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class JournalFlusher:
+    """
+    Background thread that drains the pending intents to SFCS.
+
+    Every pass reads the backlog in batches in journal order and writes
+    the results back in one transaction per batch. A transient failure
+    (timeout, circuit open, connection error) holds back the rest of its
+    USN so that the intents of a USN are never sent out of order, the
+    other USNs go on. An intent sent max_attempts times without an answer
+    is failed. The complete of a USN with a rejected upload is failed
+    without being sent, its unit was counted when the upload was queued.
+    """
+
+    def __init__(self, journal, handlers, interval=5.0, batch_size=50, max_attempts=10):
+        self.journal = journal
+        self.handlers = handlers
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._listeners = []
+        self.flushed = 0
+        self.failed = 0
+
+    def add_listener(self, listener):
+        # The listener is called with (intent, response) for failed intents.
+        self._listeners.append(listener)
+
+    def start(self):
+        if self.journal.enabled and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="JournalFlusher", daemon=True
+            )
+            self._thread.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                while self.journal.backlog and self.flush():
+                    pass
+            except Exception:
+                logger.exception("Journal flush failed.")
+
+    def flush(self):
+        # Send the backlog once, returns True if no USN was held back.
+        held = set()
+        failed_uploads = {}
+        after_id = 0
+        while True:
+            intents = self.journal.pending(self.batch_size, after_id)
+            if not intents:
+                return not held
+            after_id = intents[-1].id
+            self._flush_batch(intents, held, failed_uploads)
+
+    def _flush_batch(self, intents, held, failed_uploads):
+        updates = []
+        failures = []
+        for intent in intents:
+            if intent.usn in held:
+                continue
+            if intent.operation == "complete":
+                failed = failed_uploads.get(intent.usn) or self.journal.failed_upload(
+                    intent.usn
+                )
+                if failed:
+                    response = f"Upload failed for {failed[0]}: {failed[1]}"
+                    updates.append((intent.id, FAILED, response, 1))
+                    failures.append((intent, response))
+                    self.failed += 1
+                    continue
+            response = self.handlers[intent.operation](intent.payload)
+            # A request rejected by the open circuit was not sent.
+            sent = 0 if response == CIRCUIT_OPEN else 1
+            if is_transient(response) and intent.attempts + sent < self.max_attempts:
+                updates.append((intent.id, PENDING, response, sent))
+                held.add(intent.usn)
+                logger.warning(
+                    f"Journal flush of {intent.usn} held at {intent.operation}: {response}"
+                )
+                continue
+            if is_transient(response):
+                response = f"No answer after {self.max_attempts} attempts: {response}"
+            if response == "OK" or (
+                intent.operation == "upload"
+                and intent.recovered
+                and "unique constraint" in response
+            ):
+                # An upload cut off by a crash may have got through, its replay
+                # then hits the unique constraint. For the others it is an NG.
+                updates.append((intent.id, DONE, response, 1))
+                self.flushed += 1
+            else:
+                updates.append((intent.id, FAILED, response, 1))
+                failures.append((intent, response))
+                self.failed += 1
+                if intent.operation == "upload":
+                    failed_uploads.setdefault(
+                        intent.usn, (intent.payload.get("csn"), response)
+                    )
+        self.journal.mark_many(updates)
+
+        for intent, response in failures:
+            logger.error(
+                f"Journal {intent.operation} failed for {intent.usn}: {response}"
+            )
+            for listener in self._listeners:
+                try:
+                    listener(intent, response)
+                except Exception:
+                    logger.exception("Journal failure listener failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,164 @@
 import time
 import threading
 import logging
-from queue import Queue
 
 from sfcs.sfcs_lib import (
     check_route,
+    is_transient,
     send_complete,
     upload_USN_item_with_barcode_validation,
     validate_hdd,
 )
-
+from backend.dispatcher import KeyedDispatcher
+from backend.duplicates import CSNIndex
+from backend.journal import DONE, FAILED, PENDING, Journal, JournalFlusher
+from backend.retry import RetryPolicy, RetryScheduler
 from plc.communication import send_signal
-from config import MAX_RETRIES, RETRY_DELAY, ROUTES
+from helpers.metrics import get_registry
+from helpers.tracing import get_tracer
+from config import (
+    MAX_RETRIES,
+    RETRY_DELAY,
+    RETRY_MAX_DELAY,
+    RETRY_BACKOFF,
+    RETRY_JITTER,
+    ROUTES,
+    CSN_INDEX_PERSIST,
+    CSN_INDEX_PATH,
+    JOURNAL_ENABLED,
+    JOURNAL_PATH,
+    JOURNAL_FLUSH_INTERVAL,
+    JOURNAL_BATCH_SIZE,
+    JOURNAL_MAX_ATTEMPTS,
+    ASYNC_ENGINE,
+)
+
+# The asyncio client and engine are only loaded when they are used.
+if ASYNC_ENGINE:
+    from sfcs.aio import (
+        check_route_async,
+        send_complete_async,
+        upload_USN_item_with_barcode_validation_async,
+        validate_hdd_async,
+    )
+    from backend.engine import AsyncEngine
+
+# Global dispatcher for making the SFCS requests, ordered per workstation/USN.
+tasks_dispatcher = KeyedDispatcher()
+
+# Retries wait on a timer and go back to the dispatcher when they are due.
+retry_scheduler = RetryScheduler(tasks_dispatcher.submit)
+
+# With ASYNC_ENGINE, the scans run as coroutines on one event loop thread
+# instead of on the worker pool. Their journal and CSN index writes run on
+# the engine's writer thread, the loop never waits for an fsync.
+engine = AsyncEngine() if ASYNC_ENGINE else None
 
-# Global ThreadPoolExecutor for making the SFCS requests.
-tasks_queue = Queue()
+# CSNs accepted per USN, repeated scans are rejected without calling SFCS.
+csn_index = CSNIndex(CSN_INDEX_PATH if CSN_INDEX_PERSIST else None)
+
+
+def elapsed_ms(started_at):
+    # Milliseconds since a time.perf_counter() reading, for the log records.
+    return round((time.perf_counter() - started_at) * 1000, 1)
+
+
+def flush_upload(payload):
+    return upload_USN_item_with_barcode_validation(**payload)
+
+
+def flush_complete(payload):
+    # Validate the quantity and send the complete deferred by check_restart.
+    current_qty = validate_hdd(payload["usn"])
+    if is_transient(current_qty):
+        return current_qty
+    if current_qty != payload["goal_qty"]:
+        return (
+            f"HDD Quantity Mismatch: Expected {payload['goal_qty']}, Got {current_qty}"
+        )
+    if not payload["send_complete"]:
+        return "OK"
+    return send_complete(
+        payload["usn"], payload["line"], payload["station"], payload["username"]
+    )
+
+
+# Uploads and completes are journaled before they are sent, the ones that
+# could not reach SFCS are sent later by the flusher.
+journal = Journal(JOURNAL_PATH if JOURNAL_ENABLED else None)
+journal_flusher = JournalFlusher(
+    journal,
+    {"upload": flush_upload, "complete": flush_complete},
+    interval=JOURNAL_FLUSH_INTERVAL,
+    batch_size=JOURNAL_BATCH_SIZE,
+    max_attempts=JOURNAL_MAX_ATTEMPTS,
+)
+
+# Retry policies per SFCS operation.
+RETRY_POLICIES = {
+    "upload": RetryPolicy(
+        MAX_RETRIES,
+        RETRY_DELAY,
+        max_delay=RETRY_MAX_DELAY,
+        multiplier=RETRY_BACKOFF,
+        jitter=RETRY_JITTER,
+    ),
+}
+
+# Scan outcomes and the state of the worker pool.
+metrics = get_registry()
+scan_results = metrics.counter(
+    "scan_results_total", "Scanned CSNs by result.", ["result"]
+)
+upload_retries = metrics.counter(
+    "upload_retries_total", "Upload retries by reason.", ["reason"]
+)
+metrics.gauge(
+    "tasks_queue_depth",
+    "Tasks submitted and not finished yet.",
+    function=tasks_dispatcher.qsize,
+)
+metrics.gauge("workers_busy", "Workers running a task.", function=tasks_dispatcher.busy)
+metrics.gauge(
+    "workers_total",
+    "Workers in the task pool.",
+    function=lambda: tasks_dispatcher.workers,
+)
+metrics.gauge(
+    "retries_scheduled",
+    "Retries waiting for their delay.",
+    function=lambda: retry_scheduler.stats()["scheduled"],
+)
+metrics.gauge(
+    "engine_tasks_in_flight",
+    "Tasks submitted to the async engine and not finished yet.",
+    function=lambda: engine.qsize() if engine is not None else 0,
+)
+metrics.gauge(
+    "journal_backlog",
+    "Journaled intents waiting for SFCS.",
+    function=lambda: journal.backlog,
+)
 
 
 class PLCAutoScanningLogic:
     def __init__(self, app, logger: logging.Logger = logging.getLogger(__name__)):
         self.app = app
         self.logger = logger.getChild(__class__.__name__)
+        self._counter_lock = threading.Lock()
+
+    def task_key(self, usn):
+        # Tasks for the same workstation and USN run one after the other.
+        return (self.app.workstation, usn)
 
     def handle_serials_submit(self, event=None):
         serial_number = self.app.serial_numbers.get()
-        self.logger.info(f"Serial Number Scanned: {serial_number}")
+        # Every scan starts a trace, the tasks that handle it inherit its ID.
+        with get_tracer().trace("submit", serial=serial_number):
+            self.submit_serial(serial_number)
+
+    def submit_serial(self, serial_number):
+        self.logger.info("Serial Number Scanned: %s", serial_number)
         if serial_number:
             if serial_number.startswith("WTR"):
                 if serial_number == self.app.old_USN:
@@ -38,10 +172,26 @@ class PLCAutoScanningLogic:
                     )
                     send_signal(self.app.robot_number, self.app.line, False)
                     return
-                tasks_queue.put((self.process_check_route, (serial_number,)))
+                # The route check sets the current USN, queue it behind the
+                # uploads and the complete of the current one.
+                self.dispatch(
+                    self.task_key(self.app.current_USN),
+                    self.process_check_route,
+                    self.process_check_route_async,
+                    serial_number,
+                )
             else:
-                if self.app.current_USN:
-                    tasks_queue.put((self.process_serial, (serial_number,)))
+                current_usn = self.app.current_USN
+                if current_usn:
+                    # The upload belongs to the USN of the scan, even when it
+                    # is retried after the USN was completed.
+                    self.dispatch(
+                        self.task_key(current_usn),
+                        self.process_serial,
+                        self.process_serial_async,
+                        serial_number,
+                        current_usn,
+                    )
                 else:
                     self.app.update_text_widget(
                         self.app.error_text, "Please scan a valid L10.", "red"
@@ -49,105 +199,261 @@ class PLCAutoScanningLogic:
                     self.logger.info(f"Invalid L10 scanned.")
                     send_signal(self.app.robot_number, self.app.line, False)
 
-    def process_serial(self, serial_number: str):
-        # Check if counter is less than the quantity.
+    def dispatch(self, key, task, async_task, *args):
+        # Run the task on the worker pool, or its coroutine on the async engine.
+        if engine is not None:
+            engine.submit(key, async_task, *args)
+        else:
+            tasks_dispatcher.submit(key, task, *args)
+
+    def process_serial(
+        self, serial_number: str, usn: str, attempt: int = 1, intent_id: int = None
+    ):
+        if attempt == 1:
+            if not self.accept_upload(serial_number, usn):
+                return
+            intent_id = self.journal_upload(serial_number, usn)
+
+        self.logger.info(
+            "Processing Upload for %s - Attempt %d", serial_number, attempt
+        )
+        started_at = time.perf_counter()
+        response = upload_USN_item_with_barcode_validation(
+            usn,
+            serial_number,
+            self.app.line,
+            self.app.workstation,
+            self.app.employee_id,
+        )
+        delay = self.handle_upload_response(
+            serial_number, usn, attempt, intent_id, response, started_at
+        )
+        if delay is not None:
+            # Reschedule the upload and free the worker while waiting.
+            retry_scheduler.retry(
+                self.task_key(usn),
+                delay,
+                self.process_serial,
+                serial_number,
+                usn,
+                attempt + 1,
+                intent_id,
+            )
+            return
+
+        # Check if the counter needs to set to 0 and the current USN needs to be set to None.
+        self.check_restart(usn)
+
+    async def process_serial_async(
+        self, serial_number: str, usn: str, attempt: int = 1, intent_id: int = None
+    ):
+        if attempt == 1:
+            if not await engine.run_blocking(self.accept_upload, serial_number, usn):
+                return
+            intent_id = await engine.run_blocking(
+                self.journal_upload, serial_number, usn
+            )
+
+        self.logger.info(
+            "Processing Upload for %s - Attempt %d", serial_number, attempt
+        )
+        started_at = time.perf_counter()
+        response = await upload_USN_item_with_barcode_validation_async(
+            usn,
+            serial_number,
+            self.app.line,
+            self.app.workstation,
+            self.app.employee_id,
+        )
+        delay = await engine.run_blocking(
+            self.handle_upload_response,
+            serial_number,
+            usn,
+            attempt,
+            intent_id,
+            response,
+            started_at,
+        )
+        if delay is not None:
+            engine.call_later(
+                delay,
+                self.task_key(usn),
+                self.process_serial_async,
+                serial_number,
+                usn,
+                attempt + 1,
+                intent_id,
+            )
+            return
+
+        await self.check_restart_async(usn)
+
+    def accept_upload(self, serial_number, usn):
+        # Reject the scans over the quantity and the repeated ones without calling SFCS.
         if self.app.counter >= self.app.quantity:
             self.app.update_text_widget(
                 self.app.error_text, f"Quantity limit reached.", "red"
             )
+            scan_results.inc(result="quantity_limit")
             send_signal(self.app.robot_number, self.app.line, False)
-            return
-
-        # Flag to check if the upload was successful.
-        successful_upload = False
+            return False
 
-        for attempt in range(MAX_RETRIES):
-            self.logger.info(
-                f"Processing Upload for {serial_number} - Attempt {attempt + 1}"
+        if csn_index.contains(usn, serial_number):
+            self.app.update_text_widget(
+                self.app.error_text,
+                f"Duplicate scan for {serial_number}: already uploaded to {usn}",
+                "red",
             )
-            response = upload_USN_item_with_barcode_validation(
-                self.app.current_USN,
+            self.logger.info(
+                "Duplicate scan rejected for %s",
                 serial_number,
-                self.app.line,
-                self.app.workstation,
-                self.app.employee_id,
+                extra={
+                    "usn": usn,
+                    "csn": serial_number,
+                    "operation": "upload",
+                    "result": "DUPLICATE",
+                },
             )
-            self.logger.info(f"Upload Response for {serial_number}: {response}")
-            if response == "OK":
-                self.app.counter += 1
-                self.app.update_labels(
-                    self.app.quantity_label,
-                    "Quantity",
-                    f"{self.app.counter}/{self.app.quantity}",
-                )
-                self.app.update_text_widget(
-                    self.app.response_text,
-                    f"Upload Response for {serial_number}: {response}",
-                    "green",
-                )
-                # Mark the upload as successful.
-                successful_upload = True
-
-                # Exit the loop since upload was successful.
-                break
+            scan_results.inc(result="duplicate")
+            send_signal(self.app.robot_number, self.app.line, False)
+            return False
+        return True
 
-            elif "unique constraint" in response:
-                self.app.update_text_widget(
-                    self.app.error_text,
-                    f"Upload Failed for {serial_number}: {response}",
-                    "red",
-                )
-                self.app.update_text_widget(
-                    self.app.error_text,
-                    f"Retrying for {serial_number} due to unique constraint error. Attempt {attempt + 1}",
-                    "orange",
-                )
+    def journal_upload(self, serial_number, usn):
+        # Journal the upload before it is sent.
+        return journal.record(
+            usn,
+            "upload",
+            {
+                "usn": usn,
+                "csn": serial_number,
+                "line": self.app.line,
+                "workstation": self.app.workstation,
+                "employee_id": self.app.employee_id,
+            },
+        )
 
-                # Wait before retrying.
-                time.sleep(RETRY_DELAY)
+    def handle_upload_response(
+        self, serial_number, usn, attempt, intent_id, response, started_at
+    ):
+        """
+        Report an upload response, shared by both engines.
 
-            elif "TIMEOUT" in response:
-                self.app.update_text_widget(
-                    self.app.error_text,
-                    f"Upload Failed for {serial_number}: {response}",
-                    "red",
-                )
-                self.app.update_text_widget(
-                    self.app.error_text,
-                    f"Retrying for {serial_number} due to timeout error. Attempt {attempt + 1}",
-                    "orange",
-                )
+        Returns the delay before the next attempt when the upload is to be
+        retried, None once the upload is settled.
+        """
+        self.logger.info(
+            "Upload Response for %s: %s",
+            serial_number,
+            response,
+            extra={
+                "usn": usn,
+                "csn": serial_number,
+                "operation": "upload",
+                "latency": elapsed_ms(started_at),
+                "result": response,
+            },
+        )
+        retryable = bool(
+            response and ("unique constraint" in response or "TIMEOUT" in response)
+        )
+        policy = RETRY_POLICIES["upload"]
+        if response == "OK":
+            journal.mark(intent_id, DONE, response)
+            scan_results.inc(result="ok")
+            self.count_upload(serial_number, usn)
+            self.app.update_text_widget(
+                self.app.response_text,
+                f"Upload Response for {serial_number}: {response}",
+                "green",
+            )
 
-                # Wait before retrying.
-                time.sleep(RETRY_DELAY)
-            else:
-                self.app.update_text_widget(
-                    self.app.error_text,
-                    f"Upload Failed for {serial_number}: {response}",
-                    "red",
-                )
-                send_signal(self.app.robot_number, self.app.line, False)
+        elif retryable and policy.should_retry(attempt):
+            reason = (
+                "unique constraint" if "unique constraint" in response else "timeout"
+            )
+            upload_retries.inc(reason=reason)
+            self.app.update_text_widget(
+                self.app.error_text,
+                f"Upload Failed for {serial_number}: {response}",
+                "red",
+            )
+            self.app.update_text_widget(
+                self.app.error_text,
+                f"Retrying for {serial_number} due to {reason} error. Attempt {attempt}",
+                "orange",
+            )
+            return policy.delay(attempt)
 
-                # Break on first non-retryable error.
-                break
+        elif intent_id is not None and is_transient(response):
+            # SFCS is unreachable, leave the upload to the journal flusher.
+            journal.mark(intent_id, PENDING, response)
+            journal_flusher.notify()
+            scan_results.inc(result="queued")
+            self.count_upload(serial_number, usn)
+            self.app.update_text_widget(
+                self.app.error_text,
+                f"SFCS unavailable ({response}), upload for {serial_number} queued. Backlog: {journal.backlog}",
+                "orange",
+            )
 
-        if not successful_upload and attempt == MAX_RETRIES - 1:
-            # If after all retries, upload wasn't successful, log the final failure.
+        else:
+            journal.mark(intent_id, FAILED, response)
+            scan_results.inc(result="ng")
             self.app.update_text_widget(
                 self.app.error_text,
-                f"Upload Failed after {MAX_RETRIES} retries for {serial_number}: {response}",
+                f"Upload Failed for {serial_number}: {response}",
                 "red",
             )
+            if retryable:
+                # If after all retries, upload wasn't successful, log the final failure.
+                self.app.update_text_widget(
+                    self.app.error_text,
+                    f"Upload Failed after {policy.max_attempts} retries for {serial_number}: {response}",
+                    "red",
+                )
             send_signal(self.app.robot_number, self.app.line, False)
+        return None
 
-        # Check if the counter needs to set to 0 and the current USN needs to be set to None.
-        self.check_restart()
+    def count_upload(self, serial_number, usn):
+        with self._counter_lock:
+            if usn != self.app.current_USN:
+                # The USN was completed while the upload was retried.
+                return
+            csn_index.add(usn, serial_number)
+            self.app.counter += 1
+            counter = self.app.counter
+        self.app.update_labels(
+            self.app.quantity_label,
+            "Quantity",
+            f"{counter}/{self.app.quantity}",
+        )
 
     def process_check_route(self, serial_number: str):
-        self.logger.info(f"Processing Check Route for {serial_number}")
-        check_route_response = check_route(serial_number)
+        self.logger.info("Processing Check Route for %s", serial_number)
+        started_at = time.perf_counter()
+        response = check_route(serial_number)
+        self.handle_check_route_response(serial_number, response, started_at)
+
+    async def process_check_route_async(self, serial_number: str):
+        self.logger.info("Processing Check Route for %s", serial_number)
+        started_at = time.perf_counter()
+        response = await check_route_async(serial_number)
+        self.handle_check_route_response(serial_number, response, started_at)
+
+    def handle_check_route_response(
+        self, serial_number, check_route_response, started_at
+    ):
         self.logger.info(
-            f"Check Route Response for {serial_number}: {check_route_response}"
+            "Check Route Response for %s: %s",
+            serial_number,
+            check_route_response,
+            extra={
+                "usn": serial_number,
+                "operation": "check_route",
+                "latency": elapsed_ms(started_at),
+                "result": check_route_response,
+            },
         )
         if check_route_response != "OK":
             self.app.update_text_widget(
@@ -184,78 +490,190 @@ class PLCAutoScanningLogic:
                 )
                 send_signal(self.app.robot_number, self.app.line, False)
 
-    def check_restart(self):
-        should_restart = False
-        if self.app.counter >= self.app.quantity:
+    def retry_pending(self, usn):
+        # An upload retry of the USN completes it once it is done.
+        key = self.task_key(usn)
+        if engine is not None:
+            return engine.pending(key) > 0
+        return retry_scheduler.pending(key) > 0
+
+    def check_restart(self, usn):
+        if usn != self.app.current_USN or self.app.counter < self.app.quantity:
+            return
+        if self.retry_pending(usn):
+            return
+        if not self.queue_complete(usn):
             # Validate the quantity of HDDs scanned.
-            goal_qty = ROUTES["GC"][self.app.robot_number]
-            self.logger.info(f"Validating HDD Quantity for {self.app.current_USN}")
-            current_qty = validate_hdd(self.app.current_USN)
-            self.logger.info(
-                f"Quantity Validation Response for {self.app.current_USN}: {current_qty}"
-            )
+            self.logger.info("Validating HDD Quantity for %s", usn)
+            started_at = time.perf_counter()
+            current_qty = validate_hdd(usn)
+            # SFCS went away after the last upload, the flusher completes the USN.
+            if is_transient(current_qty) and self.queue_complete(usn, current_qty):
+                self.restart()
+                return
+            if not self.handle_hdd_validation(usn, current_qty, started_at):
+                return
 
-            # Check for errors.
-            if "NG" in current_qty:
-                self.app.update_text_widget(
-                    self.app.error_text,
-                    f"Error: HDD Quantity and Validators Quantity don't match for {self.app.current_USN}",
-                    "red",
+            # Send the complete for the previous USN if robot number is 3.
+            if self.app.robot_number == 3:
+                self.logger.info("Sending Complete for %s", usn)
+                started_at = time.perf_counter()
+                complete_response = send_complete(
+                    usn,
+                    self.app.line,
+                    self.app.workstation,
+                    self.app.employee_id,
                 )
-                send_signal(self.app.robot_number, self.app.line, False)
+                queued = is_transient(complete_response) and self.queue_complete(
+                    usn, complete_response
+                )
+                if not queued and not self.handle_complete_response(
+                    usn, complete_response, started_at
+                ):
+                    return
+        self.restart()
+
+    async def check_restart_async(self, usn):
+        if usn != self.app.current_USN or self.app.counter < self.app.quantity:
+            return
+        if self.retry_pending(usn):
+            return
+        if not await engine.run_blocking(self.queue_complete, usn):
+            self.logger.info("Validating HDD Quantity for %s", usn)
+            started_at = time.perf_counter()
+            current_qty = await validate_hdd_async(usn)
+            if is_transient(current_qty) and await engine.run_blocking(
+                self.queue_complete, usn, current_qty
+            ):
+                await engine.run_blocking(self.restart)
+                return
+            if not self.handle_hdd_validation(usn, current_qty, started_at):
                 return
 
-            if current_qty != goal_qty:
-                self.app.update_text_widget(
-                    self.app.error_text,
-                    f"HDD Quantity Mismatch for {self.app.current_USN}: Expected {goal_qty}, Got {current_qty}",
-                    "red",
+            if self.app.robot_number == 3:
+                self.logger.info("Sending Complete for %s", usn)
+                started_at = time.perf_counter()
+                complete_response = await send_complete_async(
+                    usn,
+                    self.app.line,
+                    self.app.workstation,
+                    self.app.employee_id,
                 )
-                send_signal(self.app.robot_number, self.app.line, False)
-                return
-            else:
-                # Send the complete for the previous USN if robot number is 3.
-                if self.app.robot_number == 3:
-                    self.logger.info(f"Sending Complete for {self.app.current_USN}")
-                    complete_response = send_complete(
-                        self.app.current_USN,
-                        self.app.line,
-                        self.app.workstation,
-                        self.app.employee_id,
-                    )
-                    self.logger.info(
-                        f"Complete Response for {self.app.current_USN}: {complete_response}"
-                    )
-                    if complete_response != "OK":
-                        self.app.update_text_widget(
-                            self.app.error_text,
-                            f"Complete Failed for {self.app.current_USN}: {complete_response}",
-                            "red",
-                        )
-                    else:
-                        self.app.update_text_widget(
-                            self.app.response_text,
-                            f"Complete Response for {self.app.current_USN}: {complete_response}",
-                            "green",
-                        )
-                        should_restart = True
-                else:
-                    should_restart = True
-        if should_restart:
+                queued = is_transient(complete_response) and await engine.run_blocking(
+                    self.queue_complete, usn, complete_response
+                )
+                if not queued and not self.handle_complete_response(
+                    usn, complete_response, started_at
+                ):
+                    return
+        await engine.run_blocking(self.restart)
+
+    def queue_complete(self, usn, response=None):
+        """
+        Journal the validation and complete of the USN for the flusher.
+
+        They are queued while uploads of the USN are still queued, or when
+        SFCS gave the transient response to them. Returns False when nothing
+        was queued, with the journal disabled the caller reports the NG.
+        """
+        if response is None and not journal.has_pending(usn):
+            return False
+        if not journal.enabled:
+            return False
+        journal.record(
+            usn,
+            "complete",
+            {
+                "usn": usn,
+                "goal_qty": ROUTES["GC"][self.app.robot_number],
+                "send_complete": self.app.robot_number == 3,
+                "line": self.app.line,
+                "station": self.app.workstation,
+                "username": self.app.employee_id,
+            },
+            state=PENDING,
+        )
+        journal_flusher.notify()
+        reason = f" ({response})" if response is not None else ""
+        self.app.update_text_widget(
+            self.app.error_text,
+            f"SFCS unavailable{reason}, validation and complete for {usn} queued. Backlog: {journal.backlog}",
+            "orange",
+        )
+        return True
+
+    def handle_hdd_validation(self, usn, current_qty, started_at):
+        # True when the HDD quantity matches the goal quantity of the robot.
+        self.logger.info(
+            "Quantity Validation Response for %s: %s",
+            usn,
+            current_qty,
+            extra={
+                "usn": usn,
+                "operation": "validate_hdd",
+                "latency": elapsed_ms(started_at),
+                "result": current_qty,
+            },
+        )
+
+        # Check for errors.
+        if current_qty and "NG" in current_qty:
+            self.app.update_text_widget(
+                self.app.error_text,
+                f"Error: HDD Quantity and Validators Quantity don't match for {usn}",
+                "red",
+            )
+            send_signal(self.app.robot_number, self.app.line, False)
+            return False
+
+        goal_qty = ROUTES["GC"][self.app.robot_number]
+        if current_qty != goal_qty:
+            self.app.update_text_widget(
+                self.app.error_text,
+                f"HDD Quantity Mismatch for {usn}: Expected {goal_qty}, Got {current_qty}",
+                "red",
+            )
+            send_signal(self.app.robot_number, self.app.line, False)
+            return False
+        return True
+
+    def handle_complete_response(self, usn, complete_response, started_at):
+        self.logger.info(
+            "Complete Response for %s: %s",
+            usn,
+            complete_response,
+            extra={
+                "usn": usn,
+                "operation": "complete",
+                "latency": elapsed_ms(started_at),
+                "result": complete_response,
+            },
+        )
+        if complete_response != "OK":
+            self.app.update_text_widget(
+                self.app.error_text,
+                f"Complete Failed for {usn}: {complete_response}",
+                "red",
+            )
+            return False
+        self.app.update_text_widget(
+            self.app.response_text,
+            f"Complete Response for {usn}: {complete_response}",
+            "green",
+        )
+        return True
+
+    def restart(self):
+        # The USN is done, the next scan starts a new one.
+        csn_index.discard(self.app.current_USN)
+        with self._counter_lock:
             self.app.counter = 0
             self.app.old_USN = self.app.current_USN
             self.app.current_USN = None
 
     def start_tasks_workers(self, number_of_workers=18):
-        def task_worker():
-            while True:
-                task, args = tasks_queue.get(block=True)
-                try:
-                    task(*args)
-                finally:
-                    tasks_queue.task_done()
-
-        for _ in range(number_of_workers):
-            worker = threading.Thread(target=task_worker)
-            worker.daemon = True
-            worker.start()
+        if engine is not None:
+            engine.start()
+        else:
+            tasks_dispatcher.start(number_of_workers)
+        journal_flusher.start()
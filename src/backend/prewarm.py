@@ -0,0 +1,129 @@
+import time
+import logging
+import threading
+from config import PREWARM_CONNECTIONS
+from helpers.utils import read_allowed_users
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+def main():
+    pass
+
+
+class Prewarm:
+    """
+    Gets the first scan ready while the operator fills the login dialogs.
+
+    Loads the users file, opens connections of the SFCS pool and the PLC
+    session of the line, every step on its own thread. The backend modules
+    are imported on those threads too. A failed step is only logged, the
+    first scan then connects as it would have without the prewarm.
+    """
+
+    STEPS = ("users", "sfcs", "plc")
+
+    def __init__(self, line, users_path="users.txt", connections=PREWARM_CONNECTIONS):
+        self.line = line
+        self.users_path = users_path
+        self.connections = connections
+        self.users = None
+        self._states = dict.fromkeys(self.STEPS, PENDING)
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._threads = []
+
+    def add_listener(self, listener):
+        # The listener is called with the states of all the steps after every step.
+        self._listeners.append(listener)
+
+    def states(self):
+        with self._lock:
+            return dict(self._states)
+
+    @property
+    def ready(self):
+        return all(state == READY for state in self.states().values())
+
+    def start(self):
+        steps = {
+            "users": self._load_users,
+            "sfcs": self._open_sfcs,
+            "plc": self._open_plc,
+        }
+        for step in self.STEPS:
+            thread = threading.Thread(
+                target=self._run,
+                args=(step, steps[step]),
+                name=f"Prewarm-{step}",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def wait(self, timeout=None):
+        # True when every step finished within timeout seconds.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(
+                None if deadline is None else max(0, deadline - time.monotonic())
+            )
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def _run(self, step, function):
+        start = time.perf_counter()
+        try:
+            function()
+        except Exception as e:
+            logger.warning(f"Prewarm of {step} failed. Error: {e!r}.")
+            state = FAILED
+        else:
+            logger.info(
+                "Prewarm of %s ready in %.0f ms.",
+                step,
+                (time.perf_counter() - start) * 1000,
+            )
+            state = READY
+        with self._lock:
+            self._states[step] = state
+            states = dict(self._states)
+        for listener in self._listeners:
+            try:
+                listener(states)
+            except Exception:
+                logger.exception("Prewarm listener failed.")
+
+    def _load_users(self):
+        self.users = read_allowed_users(self.users_path)
+
+    def _open_sfcs(self):
+        from backend.logic import engine
+
+        if self.connections <= 0:
+            return
+        if engine is None:
+            from sfcs.sfcs_lib import open_connections
+
+            open_connections(self.connections)
+            return
+
+        # The async client belongs to the engine loop, open the connections there.
+        from sfcs.aio import open_connections_async
+
+        engine.start()
+        engine.run(open_connections_async(self.connections)).result()
+
+    def _open_plc(self):
+        from plc.communication import get_plc_ip
+        from plc.session import get_session_manager
+
+        get_session_manager().get(get_plc_ip(self.line)).connect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+import contextvars
+from helpers.tracing import get_tracer
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+
+def main():
+    pass
+
+
+class RetryPolicy:
+    """Exponential backoff with proportional jitter and a cap on attempts."""
+
+    def __init__(
+        self, max_attempts, base_delay, max_delay=None, multiplier=2.0, jitter=0.1
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def should_retry(self, attempt):
+        return attempt < self.max_attempts
+
+    def delay(self, attempt):
+        # Delay before the retry that follows the given (1-based) attempt.
+        delay = self.base_delay * self.multiplier ** (attempt - 1)
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class RetryScheduler:
+    """
+    Delay queue for retries.
+
+    Retries wait on a timer heap instead of sleeping in a worker. When a
+    retry is due it is handed back to the dispatcher through submit, so
+    it keeps the ordering of its key. The other tasks of the key run
+    during the delay, pending() tells them a retry of the key is waiting.
+    """
+
+    def __init__(self, submit, clock=time.monotonic):
+        self._submit = submit
+        self._clock = clock
+        self._heap = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._in_flight = 0
+        # Retries per key that did not start running yet.
+        self._keys = {}
+        self.total = 0
+
+    def retry(self, key, delay, task, *args):
+        # Keep the caller's context, so the retry stays in its trace.
+        context = contextvars.copy_context()
+        queued_at = time.monotonic()
+        with self._cond:
+            self.total += 1
+            self._keys[key] = self._keys.get(key, 0) + 1
+            heapq.heappush(
+                self._heap,
+                (
+                    self._clock() + delay,
+                    next(self._sequence),
+                    key,
+                    task,
+                    args,
+                    context,
+                    queued_at,
+                ),
+            )
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="RetryScheduler", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (
+                    not self._heap or self._heap[0][0] > self._clock()
+                ):
+                    timeout = self._heap[0][0] - self._clock() if self._heap else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, key, task, args, context, queued_at = heapq.heappop(self._heap)
+                self._in_flight += 1
+            try:
+                context.run(
+                    get_tracer().record, "retry_wait", queued_at, task=task.__name__
+                )
+                context.run(self._submit, key, self._execute, key, task, args)
+            except Exception:
+                logger.exception(f"Failed to dispatch retry of {task.__name__}.")
+                self._started(key)
+                self._done()
+
+    def _execute(self, key, task, args):
+        self._started(key)
+        try:
+            task(*args)
+        finally:
+            self._done()
+
+    def _started(self, key):
+        with self._cond:
+            self._keys[key] -= 1
+            if not self._keys[key]:
+                del self._keys[key]
+
+    def pending(self, key):
+        # Number of retries of key waiting for their delay or their turn.
+        with self._cond:
+            return self._keys.get(key, 0)
+
+    def _done(self):
+        with self._cond:
+            self._in_flight -= 1
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "scheduled": len(self._heap),
+                "in_flight": self._in_flight,
+                "total": self.total,
+            }
+
+
+if __name__ == "__main__":
+    main()
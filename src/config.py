@@ -1,73 +1,173 @@
 import os
 import sys
-import logging.config
-from pycomm3.logger import configure_default_logger
+import logging
+import threading
 from environs import Env
 
 env = Env()
-env.read_env()
 
 if getattr(sys, "frozen", False):
     # If the application is run as a bundled executable.
     application_path = sys._MEIPASS
     logs_path = os.path.dirname(sys.executable)
+    # A .env in the working directory takes precedence over the bundled one.
+    env.read_env(os.path.join(os.getcwd(), ".env"))
 else:
     # If it's run as a regular script.
     application_path = os.path.dirname(os.path.abspath(__file__))
     logs_path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+# Searches the parent directories too, as a run from the sources needs.
 env_path = os.path.join(application_path, ".env")
 env.read_env(env_path)
 
 ROUTES = {"GC": {1: "24", 2: "48", 3: "72"}}
 MAX_RETRIES = env.int("MAX_RETRIES")
 RETRY_DELAY = env.int("RETRY_DELAY")
+RETRY_MAX_DELAY = env.float("RETRY_MAX_DELAY", 30.0)
+RETRY_BACKOFF = env.float("RETRY_BACKOFF", 2.0)
+RETRY_JITTER = env.float("RETRY_JITTER", 0.1)
 PLC_3L3 = env.str("PLC_3L3")
 PLC_3L6 = env.str("PLC_3L6")
 SFCS_SERVER = env.str("SFCS_SERVER")
 STAGE = env.str("STAGE")
 CATEGORY = env.str("CATEGORY")
 PLC_DELAY = env.float("PLC_DELAY")
+PLC_BATCH_WINDOW = env.float("PLC_BATCH_WINDOW", 0.005)
 MAX_BYTES = env.int("MAX_BYTES")
 BACKUP_COUNT = env.int("BACKUP_COUNT")
 
+# SFCS connection pool.
+SFCS_POOL_SIZE = env.int("SFCS_POOL_SIZE", 18)
+SFCS_POOL_IDLE_TIMEOUT = env.float("SFCS_POOL_IDLE_TIMEOUT", 60.0)
+SFCS_STALE_RETRIES = env.int("SFCS_STALE_RETRIES", 1)
+
+# SFCS circuit breaker.
+SFCS_BREAKER_THRESHOLD = env.int("SFCS_BREAKER_THRESHOLD", 5)
+SFCS_BREAKER_RESET_TIMEOUT = env.float("SFCS_BREAKER_RESET_TIMEOUT", 30.0)
+SFCS_BREAKER_HALF_OPEN_PROBES = env.int("SFCS_BREAKER_HALF_OPEN_PROBES", 1)
+
+# SFCS route check cache, a TTL of 0 disables the cache.
+SFCS_CACHE_SIZE = env.int("SFCS_CACHE_SIZE", 256)
+SFCS_ROUTE_CACHE_TTL = env.float("SFCS_ROUTE_CACHE_TTL", 5.0)
+
 # Create logs directory if it doesn't exist.
 
 LOGS_DIR = os.path.join(logs_path, "logs")
 if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
 
-# Logging configuration.
-
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "standard": {"format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s"}
-    },
-    "handlers": {
-        "console": {
-            "level": "INFO",
-            "class": "logging.StreamHandler",
-            "formatter": "standard",
-        },
-        "file": {
-            "level": "INFO",
-            "class": "logging.handlers.RotatingFileHandler",
-            "formatter": "standard",
-            "filename": "logs/plc_auto_scanning.log",
-            "maxBytes": MAX_BYTES,
-            "backupCount": BACKUP_COUNT,
-            "encoding": "utf8",
-        },
-    },
-    "root": {"level": "INFO", "handlers": ["console", "file"]},
-}
+# Keep the accepted CSNs per USN in a file under the logs directory.
+CSN_INDEX_PERSIST = env.bool("CSN_INDEX_PERSIST", False)
+CSN_INDEX_PATH = os.path.join(LOGS_DIR, "csn_index.jsonl")
+
+# Store-and-forward journal of the SFCS uploads and completes.
+JOURNAL_ENABLED = env.bool("JOURNAL_ENABLED", True)
+JOURNAL_PATH = os.path.join(LOGS_DIR, "journal.sqlite3")
+JOURNAL_FLUSH_INTERVAL = env.float("JOURNAL_FLUSH_INTERVAL", 5.0)
+JOURNAL_BATCH_SIZE = env.int("JOURNAL_BATCH_SIZE", 50)
+JOURNAL_MAX_ATTEMPTS = env.int("JOURNAL_MAX_ATTEMPTS", 10)
+
+# Lines kept in the PASS and ERROR views of the interface.
+LOG_VIEW_MAX_LINES = env.int("LOG_VIEW_MAX_LINES", 500)
+
+# Frames per second of the interface update loop.
+UI_FRAME_RATE = env.int("UI_FRAME_RATE", 30)
+
+# Local /metrics endpoint in the Prometheus text format, 0 disables it.
+METRICS_PORT = env.int("METRICS_PORT", 0)
+
+# Run the scans as coroutines on an asyncio event loop instead of the worker pool.
+ASYNC_ENGINE = env.bool("ASYNC_ENGINE", False)
+
+# Scans socket of the headless runtime, HOST:PORT or a Unix socket path.
+# Empty reads the scans from stdin.
+HEADLESS_LISTEN = env.str("HEADLESS_LISTEN", "")
+
+# Workstations hosted by the multi-station server, a JSON list.
+STATIONS_PATH = env.str("STATIONS_PATH", "stations.json")
+
+# Per-scan trace spans, summarized with python -m helpers.tracing.
+TRACE_ENABLED = env.bool("TRACE_ENABLED", True)
+TRACE_PATH = os.path.join(LOGS_DIR, "traces.jsonl")
+TRACE_MAX_BYTES = env.int("TRACE_MAX_BYTES", MAX_BYTES)
+TRACE_BACKUP_COUNT = env.int("TRACE_BACKUP_COUNT", BACKUP_COUNT)
 
-logging.config.dictConfig(LOGGING_CONFIG)
+# Seconds from the start of main.py to the Employee ID dialog on screen.
+STARTUP_BUDGET = env.float("STARTUP_BUDGET", 2.0)
+
+# SFCS connections opened while the operator logs in, 0 skips SFCS.
+PREWARM_CONNECTIONS = env.int("PREWARM_CONNECTIONS", 2)
 
 # Create a logger for the application.
 logger = logging.getLogger("App")
 
-# Configure the default logger for pycomm3.
-configure_default_logger(level=logging.WARNING, filename="logs/pycomm3.log")
+# Queue listener of the logging handlers, started by configure_logging.
+log_listener = None
+_logging_lock = threading.Lock()
+
+
+def build_logging_config():
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "standard": {
+                "()": "helpers.log_queue.StructuredFormatter",
+                "format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            }
+        },
+        "handlers": {
+            "console": {
+                "level": "INFO",
+                "class": "logging.StreamHandler",
+                "formatter": "standard",
+            },
+            "file": {
+                "level": "INFO",
+                "class": "logging.handlers.RotatingFileHandler",
+                "formatter": "standard",
+                "filename": "logs/plc_auto_scanning.log",
+                "maxBytes": MAX_BYTES,
+                "backupCount": BACKUP_COUNT,
+                "encoding": "utf8",
+            },
+        },
+        "root": {"level": "INFO", "handlers": ["console", "file"]},
+    }
+
+
+def configure_logging():
+    """
+    Configure the console, file and pycomm3 logging once and return the listener.
+
+    Importing config only reads the settings, the entry points call this
+    before their first record. logging.config, the handlers and pycomm3
+    are imported here instead of on every import of config.
+    """
+    global log_listener
+    with _logging_lock:
+        if log_listener is not None:
+            return log_listener
+
+        import logging.config
+        from pycomm3.logger import configure_default_logger
+        from helpers.log_queue import detach_handlers, start_queue_logging
+
+        logging.config.dictConfig(build_logging_config())
+
+        # Configure the default logger for pycomm3.
+        configure_default_logger(level=logging.WARNING, filename="logs/pycomm3.log")
+
+        # Keep only the pycomm3 file, its records already reach the console through the root logger.
+        pycomm3_handlers = [
+            handler
+            for handler in detach_handlers("pycomm3")
+            if isinstance(handler, logging.FileHandler)
+        ]
+        for handler in pycomm3_handlers:
+            handler.addFilter(logging.Filter("pycomm3"))
+
+        # Run the handlers on a listener thread, the callers only enqueue the records.
+        log_listener = start_queue_logging(extra_handlers=pycomm3_handlers)
+        return log_listener
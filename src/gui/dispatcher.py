@@ -0,0 +1,113 @@
+import time
+import logging
+import threading
+from helpers.tracing import current_trace, get_tracer
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+
+def main():
+    pass
+
+
+class UIDispatcher:
+    """
+    Thread-safe queue of UI updates drained once per frame on the Tk thread.
+
+    Worker threads only queue updates. Every frame the pending label
+    options are applied once per label (the latest value wins), the
+    queued messages are inserted with one operation per view and the
+    messages queued before a clear of their view are dropped.
+    """
+
+    def __init__(self, frame_rate=30):
+        self.interval = max(1, int(1000 / frame_rate))
+        self._lock = threading.Lock()
+        self._labels = {}
+        self._views = {}
+        self._traces = []
+        self._root = None
+        self.frames = 0
+        self.label_updates = 0
+        self.merged = 0
+        self.appends = 0
+        self.dropped = 0
+
+    def set_label(self, label, **options):
+        with self._lock:
+            pending = self._labels.get(label)
+            if pending is None:
+                self._labels[label] = options
+            else:
+                pending.update(options)
+                self.merged += 1
+
+    def append(self, view, message, color=None):
+        trace_id = current_trace()
+        with self._lock:
+            self._views.setdefault(view, [False, []])[1].append((message, color))
+            if trace_id is not None:
+                self._traces.append((trace_id, time.monotonic()))
+
+    def clear(self, view):
+        with self._lock:
+            pending = self._views.setdefault(view, [False, []])
+            self.dropped += len(pending[1])
+            self._views[view] = [True, []]
+
+    def start(self, root):
+        # Start the drain loop on the Tk thread.
+        if self._root is None:
+            self._root = root
+            root.after(self.interval, self._tick)
+
+    def _tick(self):
+        try:
+            self.drain()
+        except Exception:
+            logger.exception("UI update failed.")
+        finally:
+            self._root.after(self.interval, self._tick)
+
+    def drain(self):
+        with self._lock:
+            labels, self._labels = self._labels, {}
+            views, self._views = self._views, {}
+            traces, self._traces = self._traces, []
+        if not labels and not views:
+            return
+        self.frames += 1
+
+        for label, options in labels.items():
+            label.config(**options)
+            self.label_updates += 1
+
+        for view, (clear, messages) in views.items():
+            if clear:
+                view.clear()
+            view.append_many(messages)
+            self.appends += len(messages)
+
+        # Time from the update request to its message being on screen.
+        tracer = get_tracer()
+        for trace_id, queued_at in traces:
+            tracer.record("ui", queued_at, trace_id=trace_id)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._labels) + sum(
+                len(messages) for _, messages in self._views.values()
+            )
+        return {
+            "frames": self.frames,
+            "label_updates": self.label_updates,
+            "merged": self.merged,
+            "appends": self.appends,
+            "dropped": self.dropped,
+            "pending": pending,
+        }
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
+import time
 import logging
+import threading
 import tkinter as tk
 from tkinter import font, simpledialog, messagebox
-from PIL import ImageTk, Image
 from helpers.utils import (
     get_workstation_name,
     get_line,
@@ -9,14 +10,30 @@ from helpers.utils import (
     read_allowed_users,
 )
 
-from backend.logic import PLCAutoScanningLogic
+from config import LOG_VIEW_MAX_LINES, STARTUP_BUDGET, UI_FRAME_RATE
+from gui.dispatcher import UIDispatcher
+from gui.log_view import LogView
+from backend.prewarm import FAILED, PENDING, Prewarm
+from sfcs.breaker import CLOSED
+
+# Seconds to wait for the Employee ID dialog before loading the backend anyway.
+DIALOG_TIMEOUT = 5.0
 
 
 class PLCAutoScanningInterface:
 
-    def __init__(self, logger: logging.Logger = logging.getLogger(__name__)) -> None:
+    def __init__(
+        self,
+        logger: logging.Logger = logging.getLogger(__name__),
+        started_at: float = None,
+    ) -> None:
         self.logger = logger.getChild(__class__.__name__)
-        self.logic = PLCAutoScanningLogic(self, logger=self.logger)
+        # Created on the backend thread, once the Employee ID dialog is up.
+        self.logic = None
+        self.backend_thread = None
+        self.prewarm = None
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.ui = UIDispatcher(UI_FRAME_RATE)
         self.aqua = "#4dcbbd"
         self.green = "#6ccc9c"
         self.yellow = "#c1c95a"
@@ -30,15 +47,11 @@ class PLCAutoScanningInterface:
 
     def create_serial_number_window(self):
         self.root = tk.Tk()
+        self.ui.start(self.root)
         self.logger.info("Application started.")
         self.root.title("PLC Auto Scanning App")
         self.root.state("zoomed")
 
-        # Load logo image.
-        logo_path = resource_path("assets/logo.png")
-        logo_photo = ImageTk.PhotoImage(Image.open(logo_path))
-        self.root.iconphoto(False, logo_photo)
-
         # Font Style.
         default_font = font.nametofont("TkDefaultFont")
         default_font.configure(family="Helvetica", size=24)
@@ -91,6 +104,23 @@ class PLCAutoScanningInterface:
         )
         self.unit_serial_number_label.pack(fill="x", padx=5, pady=5)
 
+        # SFCS Status Label.
+        self.sfcs_status_label = tk.Label(
+            right_frame, text=f"SFCS: {CLOSED}", bg=self.green
+        )
+        self.sfcs_status_label.pack(fill="x", padx=5, pady=5)
+        self.backlog_label = tk.Label(right_frame, text="Backlog: 0")
+        self.backlog_label.pack(fill="x", padx=5, pady=5)
+
+        # Prewarm Label.
+        self.prewarm_label = tk.Label(
+            right_frame, text="Connections: warming up", bg=self.yellow
+        )
+        self.prewarm_label.pack(fill="x", padx=5, pady=5)
+        if self.prewarm is not None:
+            self.prewarm.add_listener(self.update_prewarm)
+            self.update_prewarm(self.prewarm.states())
+
         # Serial Numbers Entry.
         self.serial_numbers = tk.StringVar()
         tk.Label(self.root, text="Serial Numbers:").pack(padx=5, pady=5)
@@ -124,14 +154,15 @@ class PLCAutoScanningInterface:
         pass_label.pack(side="top", fill="x")
 
         # Text widget to display the PASS responses.
-        self.response_text = tk.Text(pass_frame, wrap="word")
-        self.response_text.config(state=tk.DISABLED)
+        response_widget = tk.Text(pass_frame, wrap="word")
+        response_widget.config(state=tk.DISABLED)
         scrollbar = tk.Scrollbar(
-            pass_frame, orient="vertical", command=self.response_text.yview
+            pass_frame, orient="vertical", command=response_widget.yview
         )
-        self.response_text.config(yscrollcommand=scrollbar.set)
+        response_widget.config(yscrollcommand=scrollbar.set)
         scrollbar.pack(side="right", fill="y")
-        self.response_text.pack(side="left", fill="both", expand=True, padx=10, pady=10)
+        response_widget.pack(side="left", fill="both", expand=True, padx=10, pady=10)
+        self.response_text = LogView(response_widget, LOG_VIEW_MAX_LINES)
 
         # Frame for the ERROR responses Text widget.
         error_frame = tk.Frame(main_text_frame)
@@ -142,14 +173,20 @@ class PLCAutoScanningInterface:
         error_label.pack(side="top", fill="x")
 
         # Text widget to display the ERROR responses.
-        self.error_text = tk.Text(error_frame, wrap="word")
-        self.error_text.config(state=tk.DISABLED)
+        error_widget = tk.Text(error_frame, wrap="word")
+        error_widget.config(state=tk.DISABLED)
         scrollbar = tk.Scrollbar(
-            error_frame, orient="vertical", command=self.error_text.yview
+            error_frame, orient="vertical", command=error_widget.yview
         )
-        self.error_text.config(yscrollcommand=scrollbar.set)
+        error_widget.config(yscrollcommand=scrollbar.set)
         scrollbar.pack(side="right", fill="y")
-        self.error_text.pack(side="left", fill="both", expand=True, padx=10, pady=10)
+        error_widget.pack(side="left", fill="both", expand=True, padx=10, pady=10)
+        self.error_text = LogView(error_widget, LOG_VIEW_MAX_LINES)
+
+        # Load the backend while the operator types, once the dialog is drawn.
+        self.after_dialog_shown(
+            self.report_startup_time, self.load_logo, self.start_backend
+        )
 
         # Open the modal window for employee ID on top of the main window.
         self.create_employee_id_window()
@@ -164,14 +201,107 @@ class PLCAutoScanningInterface:
 
         self.create_quantity_window()
 
+        # The scans need the backend, even if a dialog closed before it loaded.
+        self.start_backend()
         self.root.mainloop()
 
+    def after_dialog_shown(self, *callbacks, deadline=None):
+        # Run the callbacks once a dialog of the root window is on screen, or
+        # once the backend was started or DIALOG_TIMEOUT passed without one.
+        if deadline is None:
+            deadline = time.monotonic() + DIALOG_TIMEOUT
+        try:
+            dialogs = [
+                child
+                for child in self.root.winfo_children()
+                if isinstance(child, tk.Toplevel) and child.winfo_viewable()
+            ]
+            if (
+                not dialogs
+                and self.backend_thread is None
+                and time.monotonic() < deadline
+            ):
+                self.root.after(
+                    10, lambda: self.after_dialog_shown(*callbacks, deadline=deadline)
+                )
+                return
+        except tk.TclError:
+            # The window was closed before a dialog was shown.
+            return
+        if not dialogs and self.backend_thread is None:
+            self.logger.warning(
+                "No dialog shown after %.0f ms, loading the backend anyway.",
+                DIALOG_TIMEOUT * 1000,
+            )
+        for callback in callbacks:
+            callback()
+
+    def report_startup_time(self):
+        elapsed = time.perf_counter() - self.started_at
+        self.logger.info("Employee ID dialog shown after %.0f ms.", elapsed * 1000)
+        if elapsed > STARTUP_BUDGET:
+            self.logger.warning(
+                "Startup took longer than the budget of %.0f ms.", STARTUP_BUDGET * 1000
+            )
+
+    def load_logo(self):
+        from PIL import ImageTk, Image
+
+        logo_path = resource_path("assets/logo.png")
+        self.logo_photo = ImageTk.PhotoImage(Image.open(logo_path))
+        self.root.iconphoto(False, self.logo_photo)
+
+    def start_backend(self):
+        # Load the SFCS, PLC and journal pipeline on its own thread, once, so
+        # the dialogs stay responsive meanwhile.
+        if self.backend_thread is not None:
+            return
+        self.backend_thread = threading.Thread(
+            target=self.load_backend, name="Backend", daemon=True
+        )
+        self.backend_thread.start()
+
+    def load_backend(self):
+        try:
+            from backend.logic import PLCAutoScanningLogic, journal, journal_flusher
+            from helpers.metrics import start_metrics_server
+            from sfcs.breaker import get_breaker
+            from config import METRICS_PORT
+
+            logic = PLCAutoScanningLogic(self, logger=self.logger)
+            breaker = get_breaker()
+            self.update_sfcs_status(breaker.state)
+            breaker.add_listener(self.update_sfcs_status)
+            journal.add_listener(self.update_backlog)
+            journal_flusher.add_listener(self.report_flush_failure)
+            journal.open()
+            start_metrics_server(METRICS_PORT)
+            logic.start_tasks_workers()
+        except Exception as e:
+            self.logger.exception("The backend failed to start.")
+            self.update_text_widget(
+                self.error_text, f"The backend failed to start: {e}", "red"
+            )
+            return
+        self.logic = logic
+        self.enable_scans()
+
+    def enable_scans(self):
+        # The scans need the quantity and the backend. Both are set before
+        # this is called, so the later of the two always enables the scans.
+        if self.logic is None or self.quantity is None:
+            return
+        self.ui.set_label(self.serials_entry, state="normal")
+
     def create_employee_id_window(self):
         employee_id = simpledialog.askstring(
             "Employee ID", "Please enter your Employee ID:", parent=self.root
         )
         self.logger.info(f"Employee ID entered: {employee_id}")
-        allowed_users = read_allowed_users("users.txt")
+        # The prewarm usually read the users file while the dialog was up.
+        allowed_users = self.prewarm.users if self.prewarm is not None else None
+        if allowed_users is None:
+            allowed_users = read_allowed_users("users.txt")
 
         if employee_id and employee_id.upper() in allowed_users:
             self.employee_id = employee_id
@@ -204,53 +334,52 @@ class PLCAutoScanningInterface:
         if quantity:
             self.quantity = int(quantity)
             self.update_labels(self.quantity_label, "Quantity", quantity)
-            self.serials_entry.config(state="normal")
+            self.enable_scans()
             self.root.lift()
             self.root.focus_force()
             self.serials_entry.focus_set()
         else:
             self.root.destroy()
 
-    def clean_text_widget(self, text_widget):
-
-        # Enable the text widget to insert the message.
-        text_widget.config(state=tk.NORMAL)
-
-        # Delete the content of the text widget.
-        text_widget.delete("1.0", tk.END)
-
-        # Disable the text widget to prevent editing.
-        text_widget.config(state=tk.DISABLED)
+    def clean_text_widget(self, log_view):
+        self.ui.clear(log_view)
 
-    def update_text_widget(self, text_widget, message: str, color: str = None):
-        def _update():
-
-            # Enable the text widget to insert the message.
-            text_widget.config(state=tk.NORMAL)
-
-            if text_widget.get("1.0", tk.END).strip():
-                text_widget.insert(tk.END, "\n")
-            text_widget.insert(tk.END, message)
-            text_widget.yview(tk.END)
-            if color:
-                text_widget.tag_add("colored", "1.0", "end")
-                text_widget.tag_config(
-                    "colored",
-                    background=color,
-                    foreground="white",
-                    spacing3=5,
-                )
-
-            # Disable the text widget to prevent editing.
-            text_widget.config(state=tk.DISABLED)
-
-        text_widget.after(0, _update)
+    def update_text_widget(self, log_view, message: str, color: str = None):
+        self.ui.append(log_view, message, color)
 
     def update_labels(self, label, value_text, value):
-        label.config(text=f"{value_text}: {value}")
+        self.ui.set_label(label, text=f"{value_text}: {value}")
+
+    def update_sfcs_status(self, state):
+        color = self.green if state == CLOSED else "red"
+        self.ui.set_label(self.sfcs_status_label, text=f"SFCS: {state}", bg=color)
+
+    def update_backlog(self, backlog):
+        self.ui.set_label(self.backlog_label, text=f"Backlog: {backlog}")
+
+    def update_prewarm(self, states):
+        names = {"users": "Users", "sfcs": "SFCS", "plc": "PLC"}
+        failed = [names[step] for step, state in states.items() if state == FAILED]
+        pending = [names[step] for step, state in states.items() if state == PENDING]
+        if failed:
+            text, color = f"{', '.join(failed)} failed", "red"
+        elif pending:
+            text, color = f"warming up {', '.join(pending)}", self.yellow
+        else:
+            text, color = "ready", self.green
+        self.ui.set_label(self.prewarm_label, text=f"Connections: {text}", bg=color)
+
+    def report_flush_failure(self, intent, response):
+        self.update_text_widget(
+            self.error_text,
+            f"Queued {intent.operation} failed for {intent.usn}: {response}",
+            "red",
+        )
 
     def run_app(self):
-        self.logic.start_tasks_workers()
+        # Open what the first scan needs while the operator logs in.
+        self.prewarm = Prewarm(get_line(get_workstation_name()))
+        self.prewarm.start()
         self.create_serial_number_window()
 
 
@@ -0,0 +1,69 @@
+import tkinter as tk
+
+
+def main():
+    pass
+
+
+class LogView:
+    """
+    Bounded, append-only view over a Text widget.
+
+    Keeps the last max_lines messages, trims the oldest lines from the top
+    as new ones arrive and tags only the inserted message with its colour.
+    The number of lines is tracked here, so the buffer is never read back.
+    """
+
+    def __init__(self, widget, max_lines=500):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.lines = 0
+        self._tags = set()
+
+    @property
+    def empty(self):
+        return self.lines == 0
+
+    def _tag(self, color):
+        # Configure each colour tag once and reuse it for every line.
+        tag = f"color-{color}"
+        if tag not in self._tags:
+            self.widget.tag_config(
+                tag, background=color, foreground="white", spacing3=5
+            )
+            self._tags.add(tag)
+        return tag
+
+    def append(self, message, color=None):
+        self.append_many([(message, color)])
+
+    def append_many(self, messages):
+        # Insert (message, color) pairs with a single enable/disable cycle.
+        if not messages:
+            return
+        self.widget.config(state=tk.NORMAL)
+        for message, color in messages[-self.max_lines :]:
+            text = message if self.empty else "\n" + message
+            if color:
+                self.widget.insert(tk.END, text, (self._tag(color),))
+            else:
+                self.widget.insert(tk.END, text)
+            self.lines += message.count("\n") + 1
+
+        # Drop the oldest lines in one delete.
+        excess = self.lines - self.max_lines
+        if excess > 0:
+            self.widget.delete("1.0", f"{excess + 1}.0")
+            self.lines = self.max_lines
+        self.widget.yview(tk.END)
+        self.widget.config(state=tk.DISABLED)
+
+    def clear(self):
+        self.widget.config(state=tk.NORMAL)
+        self.widget.delete("1.0", tk.END)
+        self.widget.config(state=tk.DISABLED)
+        self.lines = 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import io
+import os
+import sys
+import json
+import signal
+import logging
+import argparse
+import threading
+import socketserver
+from datetime import datetime
+from time import monotonic, sleep
+
+from config import HEADLESS_LISTEN, METRICS_PORT, configure_logging
+from config import logger as app_logger
+from backend.logic import (
+    PLCAutoScanningLogic,
+    engine,
+    journal,
+    journal_flusher,
+    retry_scheduler,
+    tasks_dispatcher,
+)
+from helpers.metrics import start_metrics_server
+from helpers.utils import get_line, get_workstation_name, read_allowed_users
+from sfcs.breaker import get_breaker
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+# Result of a message, from the color the interface would show it in.
+RESULTS = {"green": "pass", "red": "fail", "orange": "pending"}
+
+
+class ScanInput:
+    """Stand-in for the StringVar of the serial numbers entry."""
+
+    def __init__(self):
+        self._value = ""
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+
+class JsonLinesSink:
+    """
+    Writes every event as a JSON line to the attached text streams.
+
+    The context fields are added to every event. With a parent, the events
+    are also passed on to it unless emitted with propagate=False.
+    """
+
+    def __init__(self, *streams, parent=None, **context):
+        self._lock = threading.Lock()
+        self._streams = list(streams)
+        self.parent = parent
+        self.context = context
+
+    def attach(self, stream):
+        with self._lock:
+            self._streams.append(stream)
+
+    def detach(self, stream):
+        with self._lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+    def emit(self, event, propagate=True, **fields):
+        fields = {**self.context, **fields}
+        if propagate and self.parent is not None:
+            self.parent.emit(event, **fields)
+        record = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "event": event,
+            **fields,
+        }
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            for stream in self._streams[:]:
+                try:
+                    stream.write(line)
+                    stream.flush()
+                except (OSError, ValueError):
+                    # The client went away, stop writing to it.
+                    self._streams.remove(stream)
+
+
+class StationState:
+    """
+    Plain replacement of the interface for PLCAutoScanningLogic.
+
+    Holds the attributes the logic reads and writes. The views and labels
+    are names, and every update the interface would draw is emitted to
+    the sink as an event instead.
+    """
+
+    response_text = "pass"
+    error_text = "error"
+    quantity_label = "quantity"
+    unit_serial_number_label = "usn"
+
+    def __init__(self, sink, workstation, employee_id, robot_number, quantity):
+        self.sink = sink
+        self.serial_numbers = ScanInput()
+        self.workstation = workstation
+        self.line = get_line(workstation)
+        self.employee_id = employee_id
+        self.robot_number = robot_number
+        self.quantity = quantity
+        self.current_USN = None
+        self.old_USN = None
+        self.counter = 0
+
+    def update_text_widget(self, view, message: str, color: str = None):
+        self.sink.emit(
+            "message", view=view, result=RESULTS.get(color, "info"), message=message
+        )
+
+    def update_labels(self, label, value_text, value):
+        self.sink.emit("label", label=label, value=str(value))
+
+    def clean_text_widget(self, view):
+        self.sink.emit("clear", view=view)
+
+    def update_sfcs_status(self, state):
+        # SFCS and the journal are shared, a multi-station server reports them once.
+        self.sink.emit("sfcs", propagate=False, state=state)
+
+    def update_backlog(self, backlog):
+        self.sink.emit("backlog", propagate=False, backlog=backlog)
+
+    def report_flush_failure(self, intent, response):
+        self.update_text_widget(
+            self.error_text,
+            f"Queued {intent.operation} failed for {intent.usn}: {response}",
+            "red",
+        )
+
+
+class HeadlessRuntime:
+    """Runs the scan pipeline for a StationState, without tkinter."""
+
+    def __init__(self, state, logger: logging.Logger = logger, logic=None):
+        self.state = state
+        self.logger = logger.getChild(__class__.__name__)
+        self.logic = logic or PLCAutoScanningLogic(state, logger=self.logger)
+        self._submit_lock = threading.Lock()
+
+    def start(self, number_of_workers=18):
+        # The only station of the process gets the shared SFCS and journal updates.
+        get_breaker().add_listener(self.state.update_sfcs_status)
+        journal.add_listener(self.state.update_backlog)
+        journal_flusher.add_listener(self.state.report_flush_failure)
+        journal.open()
+        self.run(number_of_workers)
+
+    def run(self, number_of_workers=18):
+        # The worker pool is shared, it is only grown to number_of_workers.
+        self.logic.start_tasks_workers(number_of_workers)
+        self.state.sink.emit(
+            "ready",
+            workstation=self.state.workstation,
+            line=self.state.line,
+            robot_number=self.state.robot_number,
+            quantity=self.state.quantity,
+        )
+
+    def submit(self, serial_number):
+        # The logic reads the scan from the entry, so one scan at a time.
+        serial_number = serial_number.strip()
+        if not serial_number:
+            return
+        with self._submit_lock:
+            self.state.serial_numbers.set(serial_number)
+            self.logic.handle_serials_submit()
+            self.state.serial_numbers.set("")
+
+    def read(self, stream):
+        # Submit every line of a text stream until its end.
+        for line in stream:
+            self.submit(line)
+
+    def idle(self):
+        if engine is not None:
+            return engine.qsize() == 0 and engine.stats()["scheduled"] == 0
+        retries = retry_scheduler.stats()
+        return (
+            tasks_dispatcher.qsize() == 0
+            and retries["scheduled"] == 0
+            and retries["in_flight"] == 0
+        )
+
+    def wait_idle(self, timeout):
+        # Wait for the queued tasks and the retries, True once there are none.
+        deadline = monotonic() + timeout
+        while not self.idle():
+            if monotonic() > deadline:
+                return False
+            sleep(0.05)
+        return True
+
+
+class _ScanHandler(socketserver.StreamRequestHandler):
+    runtime = None
+
+    def handle(self):
+        # Every client gets the events while it is connected.
+        stream = io.TextIOWrapper(self.wfile, encoding="utf8", write_through=True)
+        sink = self.runtime.state.sink
+        sink.attach(stream)
+        try:
+            for line in self.rfile:
+                self.runtime.submit(line.decode("utf8", errors="replace"))
+        except ConnectionError:
+            # A client that resets the connection is only gone.
+            pass
+        finally:
+            sink.detach(stream)
+            stream.detach()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve(runtime, address):
+    """
+    Accept scans, one per line, on a local socket from a daemon thread.
+
+    address is HOST:PORT for TCP or the path of a Unix socket. Returns the
+    started server.
+    """
+    handler = type("ScanHandler", (_ScanHandler,), {"runtime": runtime})
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        server = _TCPServer((host, int(port)), handler)
+    else:
+        if os.path.exists(address):
+            os.unlink(address)
+        server = socketserver.ThreadingUnixStreamServer(address, handler)
+        server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="ScanServer", daemon=True
+    ).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the scan pipeline without the interface. Scans are "
+        "read one per line and the outcomes are written as JSON lines."
+    )
+    parser.add_argument("--employee-id", required=True)
+    parser.add_argument("--robot-number", type=int, required=True)
+    parser.add_argument("--quantity", type=int, required=True)
+    parser.add_argument("--workstation", default=get_workstation_name())
+    parser.add_argument(
+        "--listen",
+        default=HEADLESS_LISTEN,
+        help="HOST:PORT or Unix socket path to read the scans from instead of stdin",
+    )
+    parser.add_argument("--workers", type=int, default=18)
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=60.0,
+        help="seconds to wait for the queued tasks at the end of stdin",
+    )
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    sink = JsonLinesSink(sys.stdout)
+    if args.employee_id.upper() not in read_allowed_users("users.txt"):
+        sink.emit("error", message="You are not authorized to use this application.")
+        return 1
+
+    state = StationState(
+        sink, args.workstation, args.employee_id, args.robot_number, args.quantity
+    )
+    runtime = HeadlessRuntime(state, logger=app_logger)
+    start_metrics_server(METRICS_PORT)
+    runtime.start(args.workers)
+
+    if args.listen:
+        server = serve(runtime, args.listen)
+        sink.emit("listening", address=args.listen)
+        stopped = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+        try:
+            stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        server.shutdown()
+        server.server_close()
+    else:
+        runtime.read(sys.stdin)
+
+    idle = runtime.wait_idle(args.drain_timeout)
+    sink.emit("stopped", idle=idle, backlog=journal.backlog)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
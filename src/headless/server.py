@@ -0,0 +1,148 @@
+import sys
+import json
+import signal
+import logging
+import argparse
+import threading
+
+from config import STATIONS_PATH, METRICS_PORT, configure_logging
+from config import logger as app_logger
+from backend.logic import journal, journal_flusher
+from headless.runtime import HeadlessRuntime, JsonLinesSink, StationState, serve
+from helpers.metrics import start_metrics_server
+from helpers.utils import read_allowed_users
+from sfcs.breaker import get_breaker
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+# Settings every station of the stations file needs.
+STATION_FIELDS = ("workstation", "employee_id", "robot_number", "quantity", "listen")
+
+
+class StationServer:
+    """
+    Hosts many workstation sessions in one process.
+
+    Every session has its own StationState, runtime and scan endpoint.
+    The SFCS connection pool, the PLC sessions, the journal and the worker
+    pool are the shared ones of the process, so adding a station adds a
+    socket and no threads or connections of its own.
+    """
+
+    def __init__(self, sink, logger: logging.Logger = logger):
+        self.sink = sink
+        self.logger = logger
+        self.sessions = {}
+        self._servers = []
+
+    def add_session(self, workstation, employee_id, robot_number, quantity, listen):
+        if workstation in self.sessions:
+            raise ValueError(f"Workstation {workstation} is already hosted.")
+        sink = JsonLinesSink(parent=self.sink, workstation=workstation)
+        state = StationState(sink, workstation, employee_id, robot_number, quantity)
+        runtime = HeadlessRuntime(state, logger=self.logger.getChild(workstation))
+        self.sessions[workstation] = (runtime, listen)
+        return runtime
+
+    def start(self, number_of_workers=18):
+        get_breaker().add_listener(self.update_sfcs_status)
+        journal.add_listener(self.update_backlog)
+        journal_flusher.add_listener(self.report_flush_failure)
+        journal.open()
+        for runtime, listen in self.sessions.values():
+            runtime.run(number_of_workers)
+            self._servers.append(serve(runtime, listen))
+            runtime.state.sink.emit("listening", address=listen)
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+
+    def update_sfcs_status(self, state):
+        self.sink.emit("sfcs", state=state)
+        for runtime, _ in self.sessions.values():
+            runtime.state.update_sfcs_status(state)
+
+    def update_backlog(self, backlog):
+        self.sink.emit("backlog", backlog=backlog)
+        for runtime, _ in self.sessions.values():
+            runtime.state.update_backlog(backlog)
+
+    def report_flush_failure(self, intent, response):
+        # Uploads name the workstation, completes the station.
+        workstation = intent.payload.get("workstation") or intent.payload.get("station")
+        session = self.sessions.get(workstation)
+        if session is None:
+            self.sink.emit(
+                "message",
+                view="error",
+                result="fail",
+                message=f"Queued {intent.operation} failed for {intent.usn}: {response}",
+            )
+            return
+        session[0].state.report_flush_failure(intent, response)
+
+
+def load_stations(path):
+    """
+    Read the stations file, a JSON list with one object per station.
+
+    Every object has the STATION_FIELDS, for example:
+    {"workstation": "3L06B1AO17", "employee_id": "E12345",
+     "robot_number": 1, "quantity": 24, "listen": "127.0.0.1:9017"}
+    """
+    with open(path, encoding="utf8") as f:
+        stations = json.load(f)
+    for index, station in enumerate(stations):
+        missing = [field for field in STATION_FIELDS if field not in station]
+        if missing:
+            raise ValueError(
+                f"Station {index} of {path} is missing {', '.join(missing)}."
+            )
+    return stations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Host many workstations in one process. Every workstation "
+        "reads its scans from its own socket, the events of all of them are "
+        "written to stdout as JSON lines."
+    )
+    parser.add_argument("--stations", default=STATIONS_PATH)
+    parser.add_argument("--workers", type=int, default=18)
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    sink = JsonLinesSink(sys.stdout)
+    server = StationServer(sink, logger=app_logger)
+    allowed_users = read_allowed_users("users.txt")
+    for station in load_stations(args.stations):
+        if station["employee_id"].upper() not in allowed_users:
+            sink.emit(
+                "error",
+                workstation=station["workstation"],
+                message="You are not authorized to use this application.",
+            )
+            continue
+        server.add_session(*(station[field] for field in STATION_FIELDS))
+    if not server.sessions:
+        return 1
+
+    start_metrics_server(METRICS_PORT)
+    server.start(args.workers)
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    try:
+        stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    sink.emit("stopped", backlog=journal.backlog)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# Structured fields that can be passed to the loggers with extra={...}.
+FIELDS = ("usn", "csn", "operation", "latency", "result")
+
+
+def main():
+    pass
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formatter that appends the structured fields set on the record."""
+
+    def format(self, record):
+        message = super().format(record)
+        fields = [
+            f"{field}={getattr(record, field)}"
+            for field in FIELDS
+            if getattr(record, field, None) is not None
+        ]
+        if fields:
+            message = f"{message} [{' '.join(fields)}]"
+        return message
+
+
+def start_queue_logging(root=None, extra_handlers=()):
+    """
+    Move the handlers of the root logger behind a queue.
+
+    The root logger keeps a single QueueHandler, so logging calls only
+    enqueue the record and the console/file handlers run on the listener
+    thread. Returns the started QueueListener, stopped at exit.
+    """
+    root = root or logging.getLogger()
+    handlers = list(root.handlers) + list(extra_handlers)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_queue_logging, listener)
+    return listener
+
+
+def stop_queue_logging(listener):
+    # Flush the queued records, stopping twice is a no-op.
+    if listener._thread is not None:
+        listener.stop()
+
+
+def detach_handlers(name):
+    # Take the handlers off a library logger, so they can be queued instead.
+    library_logger = logging.getLogger(name)
+    handlers = library_logger.handlers[:]
+    for handler in handlers:
+        library_logger.removeHandler(handler)
+    return handlers
+
+
+if __name__ == "__main__":
+    main()
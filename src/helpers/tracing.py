@@ -0,0 +1,196 @@
+import sys
+import json
+import glob
+import time
+import uuid
+import atexit
+import logging
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from queue import SimpleQueue
+from logging.handlers import QueueListener, RotatingFileHandler
+
+# Trace ID of the scan being handled, copied along with the context to the
+# workers that handle it.
+TRACE_ID = contextvars.ContextVar("trace_id", default=None)
+
+PERCENTILES = (50, 95, 99)
+
+
+def current_trace():
+    return TRACE_ID.get()
+
+
+class _SpanFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, separators=(",", ":"))
+
+
+class Tracer:
+    """
+    Per-scan trace spans written to a rotating JSON lines file.
+
+    A trace is started for every scan and its ID travels in a context
+    variable. Spans record monotonic start times and durations and are
+    only enqueued by the caller, the file is written by a listener thread.
+    Without a path, or outside of a trace, spans are no-ops.
+    """
+
+    def __init__(self, path=None, max_bytes=10_000_000, backup_count=3):
+        self.path = path
+        self._queue = None
+        self._listener = None
+        if path:
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding="utf8",
+                delay=True,
+            )
+            handler.setFormatter(_SpanFormatter())
+            self._queue = SimpleQueue()
+            self._listener = QueueListener(self._queue, handler)
+            self._listener.start()
+            atexit.register(self.close)
+
+    @property
+    def enabled(self):
+        return self._queue is not None
+
+    @contextmanager
+    def trace(self, stage, **attributes):
+        # Start a new trace and record stage as its first span.
+        if not self.enabled:
+            yield None
+            return
+        trace_id = uuid.uuid4().hex[:16]
+        token = TRACE_ID.set(trace_id)
+        start = time.monotonic()
+        try:
+            yield trace_id
+        finally:
+            TRACE_ID.reset(token)
+            self.record(stage, start, trace_id=trace_id, **attributes)
+
+    @contextmanager
+    def span(self, stage, **attributes):
+        trace_id = TRACE_ID.get()
+        if trace_id is None or not self.enabled:
+            yield
+            return
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, start, trace_id=trace_id, **attributes)
+
+    def record(self, stage, start, end=None, trace_id=None, **attributes):
+        # Record a span measured elsewhere, for stages that cross threads.
+        trace_id = trace_id or TRACE_ID.get()
+        if trace_id is None or not self.enabled:
+            return
+        end = time.monotonic() if end is None else end
+        span = {
+            "trace": trace_id,
+            "stage": stage,
+            "start": round(start, 6),
+            "duration_ms": round((end - start) * 1000, 3),
+        }
+        span.update(attributes)
+        self._queue.put(logging.makeLogRecord({"msg": span}))
+
+    def close(self):
+        # Write the queued spans, closing twice is a no-op.
+        if self._listener is not None and self._listener._thread is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    # Create the shared tracer on first use.
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                from config import (
+                    TRACE_ENABLED,
+                    TRACE_PATH,
+                    TRACE_MAX_BYTES,
+                    TRACE_BACKUP_COUNT,
+                )
+
+                _tracer = Tracer(
+                    TRACE_PATH if TRACE_ENABLED else None,
+                    TRACE_MAX_BYTES,
+                    TRACE_BACKUP_COUNT,
+                )
+    return _tracer
+
+
+def percentile(values, percent):
+    # Nearest-rank percentile of sorted values.
+    index = max(0, -(-len(values) * percent // 100) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def summarize(paths):
+    durations = {}
+    for path in paths:
+        with open(path, encoding="utf8") as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except ValueError:
+                    continue
+                durations.setdefault(span["stage"], []).append(span["duration_ms"])
+
+    summary = {}
+    for stage, values in durations.items():
+        values.sort()
+        summary[stage] = {
+            "count": len(values),
+            **{f"p{p}": percentile(values, p) for p in PERCENTILES},
+            "max": values[-1],
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Summarize the per-stage latency of the scan traces."
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="trace files, the configured trace file and its backups by default",
+    )
+    args = parser.parse_args(argv)
+    paths = args.paths
+    if not paths:
+        from config import TRACE_PATH
+
+        paths = sorted(glob.glob(TRACE_PATH + "*"))
+
+    summary = summarize(paths)
+    if not summary:
+        print("No spans found.", file=sys.stderr)
+        return 1
+    print(f"{'stage':<16}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for stage, row in sorted(summary.items()):
+        print(
+            f"{stage:<16}{row['count']:>8}{row['p50']:>10.1f}"
+            f"{row['p95']:>10.1f}{row['p99']:>10.1f}{row['max']:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
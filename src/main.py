@@ -1,6 +1,12 @@
-from config import logger
-from gui.interface import PLCAutoScanningInterface
+import time
+
+# The startup time is measured from here, before the imports.
+started_at = time.perf_counter()
+
+from config import configure_logging, logger  # noqa: E402
+from gui.interface import PLCAutoScanningInterface  # noqa: E402
 
 if __name__ == "__main__":
-    app = PLCAutoScanningInterface(logger=logger)
+    configure_logging()
+    app = PLCAutoScanningInterface(logger=logger, started_at=started_at)
     app.run_app()
@@ -1,8 +1,6 @@
-import time
-import threading
 import logging
-from pycomm3 import LogixDriver
 from config import PLC_3L3, PLC_3L6, PLC_DELAY
+from plc.pulse import get_pulse_scheduler
 
 # Create a logger object.
 logger = logging.getLogger(__name__)
@@ -12,28 +10,17 @@ def main():
     pass
 
 
+def get_plc_ip(line):
+    return PLC_3L3 if line == "3L3" else PLC_3L6
+
+
 def send_signal(robot, line, signal=True):
-    def task():
-        plc_ip = PLC_3L3 if line == "3L3" else PLC_3L6
-        tag = ("OK_" if signal else "NG_") + str(robot)
-        try:
-            logger.info(f"Attempting to send signal to {plc_ip} for tag {tag}.")
-            with LogixDriver(plc_ip) as plc:
-                plc.write(tag, True)
-                logger.info(f"Signal ON sent to {plc_ip} for tag {tag}.")
-                time.sleep(PLC_DELAY)
-                plc.write(tag, False)
-                logger.info(f"Signal OFF sent to {plc_ip} for tag {plc_ip}.")
-        except Exception as e:
-            logger.error(
-                f"Failed to send signal to {plc_ip} with tag: {tag}. Error: {e}."
-            )
-            return
-
-    # Start the task in a new thread.
-    thread = threading.Thread(target=task)
-    thread.daemon = True
-    thread.start()
+    plc_ip = get_plc_ip(line)
+    tag = ("OK_" if signal else "NG_") + str(robot)
+    logger.info("Attempting to send signal to %s for tag %s.", plc_ip, tag)
+
+    # The ON and OFF writes run on the shared pulse scheduler thread.
+    return get_pulse_scheduler().pulse(plc_ip, tag, PLC_DELAY)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+import time
+import queue
+import heapq
+import logging
+import itertools
+import threading
+from config import PLC_BATCH_WINDOW
+from plc.session import LatencyStats, get_session_manager
+from helpers.tracing import current_trace, get_tracer
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+ON = "ON"
+OFF = "OFF"
+
+
+def main():
+    pass
+
+
+class Pulse:
+    def __init__(self, plc_ip, tag, on_at, off_at):
+        self.plc_ip = plc_ip
+        self.tag = tag
+        self.on_at = on_at
+        self.off_at = off_at
+        self.on_written_at = None
+        self.trace = current_trace()
+        self.results = {}
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        # Wait for the OFF write, True once both writes were attempted.
+        return self._done.wait(timeout)
+
+    def _set_result(self, action, result):
+        self.results[action] = result
+        if action == OFF:
+            self._done.set()
+
+
+class PulseScheduler:
+    """
+    Scheduler for the PLC OK/NG pulses.
+
+    Every pulse queues an ON write now and the matching OFF write on a
+    monotonic-clock timer heap. A pulse requested for a tag that is
+    already ON extends the running pulse instead of starting another.
+    Writes to the same controller that fall due within batch_window
+    seconds of each other are sent as one multi-tag write request.
+
+    The scheduler thread only pops the due writes, each controller has
+    its own writer thread so that a controller that is reconnecting does
+    not hold back the deadlines of the others. stop() ends the threads,
+    the next pulse starts them again.
+    """
+
+    def __init__(self, sessions=None, clock=time.monotonic, batch_window=None):
+        self._sessions = sessions
+        self._clock = clock
+        self.batch_window = PLC_BATCH_WINDOW if batch_window is None else batch_window
+        self._heap = []
+        self._sequence = itertools.count()
+        self._active = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._writers = {}
+        self.pulses = 0
+        self.merged = 0
+        self.batches = 0
+        self.writes = 0
+        self.width = LatencyStats()
+        self.jitter = LatencyStats()
+
+    @property
+    def sessions(self):
+        if self._sessions is None:
+            self._sessions = get_session_manager()
+        return self._sessions
+
+    def pulse(self, plc_ip, tag, width):
+        with self._cond:
+            now = self._clock()
+            key = (plc_ip, tag)
+            pulse = self._active.get(key)
+            if pulse is not None:
+                # Overlapping pulse on the same tag, keep it ON for longer.
+                self.merged += 1
+                if now + width > pulse.off_at:
+                    pulse.off_at = now + width
+                    self._push(pulse.off_at, OFF, pulse)
+                return pulse
+
+            self.pulses += 1
+            pulse = Pulse(plc_ip, tag, now, now + width)
+            self._active[key] = pulse
+            self._push(now, ON, pulse)
+            self._push(pulse.off_at, OFF, pulse)
+            self._start()
+            self._cond.notify()
+            return pulse
+
+    def _push(self, deadline, action, pulse):
+        heapq.heappush(self._heap, (deadline, next(self._sequence), action, pulse))
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="PLCPulseScheduler", daemon=True
+            )
+            self._thread.start()
+
+    def _writer(self, plc_ip):
+        # Start the writer thread of the controller on its first batch.
+        writer = self._writers.get(plc_ip)
+        if writer is None:
+            writer = queue.SimpleQueue()
+            self._writers[plc_ip] = writer
+            threading.Thread(
+                target=self._write,
+                args=(plc_ip, writer),
+                name=f"PLCPulseWriter-{plc_ip}",
+                daemon=True,
+            ).start()
+        return writer
+
+    def _write(self, plc_ip, writer):
+        while True:
+            batch = writer.get()
+            if batch is None:
+                return
+            self._execute(plc_ip, batch)
+
+    def _pop_due(self):
+        now = self._clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, action, pulse = heapq.heappop(self._heap)
+            if action == OFF:
+                if deadline != pulse.off_at:
+                    # Superseded by a merged pulse.
+                    continue
+                del self._active[(pulse.plc_ip, pulse.tag)]
+            due.append((deadline, action, pulse))
+        return due
+
+    def _run(self):
+        thread = threading.current_thread()
+        while True:
+            with self._cond:
+                # Hold the earliest event for the batch window so that the
+                # writes landing right after it go out in the same request.
+                while self._thread is thread and (
+                    not self._heap
+                    or self._heap[0][0] + self.batch_window > self._clock()
+                ):
+                    timeout = (
+                        self._heap[0][0] + self.batch_window - self._clock()
+                        if self._heap
+                        else None
+                    )
+                    self._cond.wait(timeout)
+                if self._thread is not thread:
+                    return
+                for plc_ip, batch in self._group(self._pop_due()):
+                    self._writer(plc_ip).put(batch)
+
+    def _group(self, due):
+        # Group the due events per controller, a tag appears at most once per
+        # request so that an ON and its OFF never end up in the same packet.
+        batches = []
+        open_batches = {}
+        for event in due:
+            plc_ip, tag = event[2].plc_ip, event[2].tag
+            batch = open_batches.get(plc_ip)
+            if batch is None or tag in batch[1]:
+                batch = (plc_ip, set(), [])
+                open_batches[plc_ip] = batch
+                batches.append(batch)
+            batch[1].add(tag)
+            batch[2].append(event)
+        return [(plc_ip, events) for plc_ip, _, events in batches]
+
+    def _execute(self, plc_ip, batch):
+        tags_values = [(pulse.tag, action == ON) for _, action, pulse in batch]
+        write_started = self._clock()
+        try:
+            results = self.sessions.write_many(plc_ip, tags_values)
+        except Exception as e:
+            logger.error(
+                f"Failed to send signals to {plc_ip} with tags: {tags_values}. Error: {e}."
+            )
+            results = [e] * len(batch)
+
+        written_at = self._clock()
+        with self._cond:
+            self.batches += 1
+            self.writes += len(batch)
+        for (deadline, action, pulse), result in zip(batch, results):
+            pulse._set_result(action, result)
+            if isinstance(result, Exception) or getattr(result, "error", None):
+                if not isinstance(result, Exception):
+                    logger.error(
+                        f"Failed to send signal {action} to {plc_ip} with tag: {pulse.tag}. Error: {result.error}."
+                    )
+                continue
+
+            self.jitter.record(written_at - deadline)
+            if action == ON:
+                pulse.on_written_at = written_at
+            elif pulse.on_written_at is not None:
+                self.width.record(written_at - pulse.on_written_at)
+            logger.info("Signal %s sent to %s for tag %s.", action, plc_ip, pulse.tag)
+            if pulse.trace is not None:
+                get_tracer().record(
+                    f"plc_{action.lower()}",
+                    write_started,
+                    written_at,
+                    trace_id=pulse.trace,
+                    plc=plc_ip,
+                    tag=pulse.tag,
+                )
+
+    def stop(self):
+        with self._cond:
+            # The writers finish the batches they were handed, the pulses
+            # left on the heap are written once the scheduler is restarted.
+            self._thread = None
+            for writer in self._writers.values():
+                writer.put(None)
+            self._writers = {}
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._active)
+        return {
+            "pulses": self.pulses,
+            "merged": self.merged,
+            "batches": self.batches,
+            "writes": self.writes,
+            "pending": pending,
+            "width": self.width.snapshot(),
+            "jitter": self.jitter.snapshot(),
+        }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_pulse_scheduler():
+    # Create the shared pulse scheduler on first use.
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = PulseScheduler()
+    return _scheduler
+
+
+if __name__ == "__main__":
+    main()
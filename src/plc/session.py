@@ -0,0 +1,185 @@
+import time
+import logging
+import threading
+from pycomm3 import LogixDriver
+from pycomm3.exceptions import CommError
+from helpers.metrics import get_registry
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+write_duration = get_registry().histogram(
+    "plc_write_duration_seconds", "Duration of the PLC tag writes.", ["plc"]
+)
+write_failures = get_registry().counter(
+    "plc_write_failures_total", "PLC writes that dropped the session.", ["plc"]
+)
+
+
+def main():
+    pass
+
+
+class LatencyStats:
+    """Thread-safe count/total/max accumulator for latencies in seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            self.max = max(self.max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "count": self.count,
+                "avg": self.total / self.count if self.count else 0.0,
+                "max": self.max,
+                "last": self.last,
+            }
+
+
+class PLCSession:
+    """
+    Long-lived LogixDriver connection to a single controller.
+
+    Writes are serialized on the session lock. If the connection dropped,
+    the driver is reopened and the write is retried once.
+    """
+
+    def __init__(self, plc_ip, driver_factory=LogixDriver):
+        self.plc_ip = plc_ip
+        self._driver_factory = driver_factory
+        self._driver = None
+        self._lock = threading.Lock()
+        self.connect_latency = LatencyStats()
+        self.write_latency = LatencyStats()
+        self.reconnects = 0
+
+    @property
+    def connected(self):
+        return self._driver is not None and self._driver.connected
+
+    def connect(self):
+        with self._lock:
+            self._ensure_connected()
+
+    def _ensure_connected(self):
+        if self.connected:
+            return self._driver
+
+        if self._driver is not None:
+            self.reconnects += 1
+            self._close_driver()
+
+        start = time.perf_counter()
+        driver = self._driver_factory(self.plc_ip)
+        if not driver.open():
+            raise CommError(f"Failed to register a session with {self.plc_ip}")
+        self.connect_latency.record(time.perf_counter() - start)
+        logger.info(f"PLC session opened to {self.plc_ip}.")
+        self._driver = driver
+        return driver
+
+    def _close_driver(self):
+        try:
+            self._driver.close()
+        except Exception as e:
+            logger.warning(f"Failed to close PLC session to {self.plc_ip}. Error: {e}.")
+        self._driver = None
+
+    def write(self, *tags_values):
+        with self._lock:
+            for attempt in range(2):
+                driver = self._ensure_connected()
+                try:
+                    start = time.perf_counter()
+                    result = driver.write(*tags_values)
+                    elapsed = time.perf_counter() - start
+                    self.write_latency.record(elapsed)
+                    write_duration.observe(elapsed, plc=self.plc_ip)
+                    return result
+                except CommError as e:
+                    write_failures.inc(plc=self.plc_ip)
+                    # The controller dropped the session, reopen it and retry once.
+                    logger.warning(
+                        f"PLC session to {self.plc_ip} dropped during write. Error: {e}."
+                    )
+                    self._close_driver()
+                    if attempt:
+                        raise
+
+    def close(self):
+        with self._lock:
+            if self._driver is not None:
+                self._close_driver()
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "connect": self.connect_latency.snapshot(),
+            "write": self.write_latency.snapshot(),
+        }
+
+
+class PLCSessionManager:
+    """Keeps one PLCSession per controller IP."""
+
+    def __init__(self, driver_factory=LogixDriver):
+        self._driver_factory = driver_factory
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, plc_ip):
+        with self._lock:
+            session = self._sessions.get(plc_ip)
+            if session is None:
+                session = PLCSession(plc_ip, self._driver_factory)
+                self._sessions[plc_ip] = session
+            return session
+
+    def write(self, plc_ip, *tags_values):
+        return self.get(plc_ip).write(*tags_values)
+
+    def write_many(self, plc_ip, tags_values):
+        # Send all the (tag, value) pairs in a single multi-tag request.
+        result = self.write(plc_ip, *tags_values)
+        return result if isinstance(result, list) else [result]
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            session.close()
+
+    def stats(self):
+        with self._lock:
+            sessions = dict(self._sessions)
+        return {plc_ip: session.stats() for plc_ip, session in sessions.items()}
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    # Create the shared session manager on first use.
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = PLCSessionManager()
+    return _manager
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from xml.etree.ElementTree import ParseError, fromstring
+from config import (
+    SFCS_SERVER,
+    STAGE,
+    CATEGORY,
+    SFCS_POOL_SIZE,
+    SFCS_POOL_IDLE_TIMEOUT,
+    SFCS_STALE_RETRIES,
+)
+from sfcs.breaker import get_breaker
+from sfcs.parser import SOAPFault, parse_result
+from sfcs.transport import TransportStats
+from sfcs.sfcs_lib import (
+    CHECK_ROUTE,
+    CHECK_ROUTE_RESULT,
+    COMPLETE_RESULT,
+    ENDPOINT,
+    UNREACHABLE,
+    UPLOAD_RESULT,
+    VALIDATE_HDD,
+    VALIDATE_HDD_RESULT,
+    complete_body,
+    invalidate_usn,
+    is_cacheable,
+    record_request,
+    reject_request,
+    route_cache,
+    upload_body,
+)
+from helpers.tracing import get_tracer
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+
+def main():
+    pass
+
+
+class HTTPStatusError(Exception):
+    """The server answered with an HTTP error status."""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class AsyncSOAPClient:
+    """
+    Keep-alive HTTP/1.1 client for the SFCS SOAP calls on asyncio streams.
+
+    At most pool_size requests are sent at once, the others wait for a
+    connection without holding a thread. Connections idle for more than
+    idle_timeout seconds are closed, and a request that fails on a reused
+    connection is sent again on a new one up to stale_retries times, within
+    the timeout of the request. A timed out request is never sent again. The client belongs to the event
+    loop that first uses it.
+    """
+
+    def __init__(
+        self,
+        server=SFCS_SERVER,
+        pool_size=SFCS_POOL_SIZE,
+        idle_timeout=SFCS_POOL_IDLE_TIMEOUT,
+        stale_retries=SFCS_STALE_RETRIES,
+    ):
+        host, _, port = server.partition(":")
+        self.host = host
+        self.port = int(port or 80)
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.stale_retries = stale_retries
+        self.stats = TransportStats()
+        self._idle = deque()
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def post(self, endpoint, body, timeout):
+        # Return (status, content) of a POST of body to endpoint.
+        self.stats.increment("requests")
+        async with self._slots:
+            # The retries only get the time left by the failed attempts.
+            deadline = time.monotonic() + timeout
+            attempt = 0
+            while True:
+                reader, writer, reused = await self._connect(
+                    deadline - time.monotonic()
+                )
+                try:
+                    status, content, keep_alive = await asyncio.wait_for(
+                        self._exchange(reader, writer, endpoint, body),
+                        deadline - time.monotonic(),
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    writer.close()
+                    if not reused or attempt >= self.stale_retries:
+                        raise
+                    attempt += 1
+                    self.stats.increment("stale_retries")
+                    logger.warning(
+                        f"Connection to {self.host} failed, retrying on a new connection. Error: {e!r}."
+                    )
+                    continue
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    self._idle.append((reader, writer, time.monotonic()))
+                else:
+                    writer.close()
+                return status, content
+
+    async def prewarm(self, connections=1, timeout=5):
+        # Open idle connections ahead of the first request.
+        connections = min(connections, self.pool_size)
+        for _ in range(connections):
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout
+            )
+            self.stats.increment("new_connections")
+            self._idle.append((reader, writer, time.monotonic()))
+        return connections
+
+    async def _connect(self, timeout):
+        # Reuse the most recently released connection that is still usable.
+        while self._idle:
+            reader, writer, released_at = self._idle.pop()
+            if writer.is_closing() or reader.at_eof():
+                writer.close()
+                continue
+            if time.monotonic() - released_at > self.idle_timeout:
+                logger.debug(f"Evicting idle connection to {self.host}.")
+                writer.close()
+                self.stats.increment("idle_evictions")
+                continue
+            self.stats.increment("reused_connections")
+            return reader, writer, True
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout
+        )
+        self.stats.increment("new_connections")
+        return reader, writer, False
+
+    async def _exchange(self, reader, writer, endpoint, body):
+        head = (
+            f"POST /{endpoint} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: text/xml\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readuntil(b"\r\n")
+        version, status = status_line.split(None, 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        keep_alive = headers.get("connection") != "close" and version != b"HTTP/1.0"
+        if "chunked" in headers.get("transfer-encoding", ""):
+            content = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            content = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # The body ends with the connection.
+            content = await reader.read()
+            keep_alive = False
+        return int(status), content, keep_alive
+
+    async def _read_chunked(self, reader):
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        # Skip the trailers up to the empty line.
+        while await reader.readuntil(b"\r\n") != b"\r\n":
+            pass
+        return b"".join(chunks)
+
+    def close(self):
+        while self._idle:
+            _, writer, _ = self._idle.pop()
+            writer.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_async_client():
+    # Create the shared client on first use.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AsyncSOAPClient()
+    return _client
+
+
+async def post_request_async(body, endpoint, timeout=5, result=None, operation="soap"):
+    """
+    Post a SOAP request to SFCS without blocking the event loop.
+
+    Returns the same values as sfcs_lib.post_request and records the same
+    metrics, the breaker is shared with the blocking client.
+    """
+    url = f"http://{SFCS_SERVER}/{endpoint}"
+    breaker = get_breaker()
+    if not breaker.allow():
+        return reject_request(url, operation)
+    start = time.perf_counter()
+    with get_tracer().span("sfcs", operation=operation):
+        value = await _post_request_async(url, endpoint, body, timeout, result, breaker)
+    record_request(operation, start, value)
+    return value
+
+
+async def _post_request_async(url, endpoint, body, timeout, result, breaker):
+    try:
+        status, content = await get_async_client().post(endpoint, body, timeout)
+        try:
+            value = (
+                fromstring(content)
+                if result is None
+                else parse_result([content], result)
+            )
+        except ParseError:
+            # Error pages are usually not XML, report the HTTP status instead.
+            if status >= 400:
+                raise HTTPStatusError(status)
+            raise
+        if status >= 400:
+            raise HTTPStatusError(status)
+    except asyncio.TimeoutError:
+        logger.error(f"Request to {url} timed out after {timeout} seconds.")
+        breaker.record_failure()
+        return "TIMEOUT"
+    except (OSError, asyncio.IncompleteReadError) as e:
+        logger.error(f"Could not connect to {url}: {e!r}")
+        breaker.record_failure()
+        return UNREACHABLE
+    except HTTPStatusError as e:
+        logger.error(f"Error while making request: {e!r}")
+        breaker.record_failure()
+        return
+    except SOAPFault as e:
+        # The server answered, the request itself was rejected.
+        logger.error(f"SOAP Fault from {url}: {e.faultcode} {e.faultstring}")
+        breaker.record_success()
+        return f"SOAP Fault: {e.faultstring}"
+    except ParseError as e:
+        logger.error(f"Invalid XML response from {url}: {e}")
+        breaker.record_failure()
+        return
+    breaker.record_success()
+    return value
+
+
+async def open_connections_async(connections=1, timeout=5):
+    # Resolve SFCS and open connections of the client on the running loop.
+    return await get_async_client().prewarm(connections, timeout)
+
+
+# Loads in flight per (cache, key), the callers for the same key share one.
+_loading = {}
+_MISSING = object()
+
+
+async def _cached(cache, key, load):
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    future = _loading.get((id(cache), key))
+    if future is not None:
+        return await asyncio.shield(future)
+
+    generation = cache.generation
+    future = _loading[(id(cache), key)] = asyncio.get_running_loop().create_future()
+    try:
+        value = await load()
+    except BaseException as e:
+        future.set_exception(e)
+        # Nobody may be waiting, do not report the exception as lost.
+        future.exception()
+        raise
+    finally:
+        del _loading[(id(cache), key)]
+    future.set_result(value)
+    if is_cacheable(value):
+        cache.put(key, value, generation)
+    return value
+
+
+async def check_route_async(usn, stage=STAGE):
+    body = CHECK_ROUTE.build(usn=usn, stage=stage)
+    return await _cached(
+        route_cache,
+        (usn, stage),
+        lambda: post_request_async(
+            body, ENDPOINT, result=CHECK_ROUTE_RESULT, operation="check_route"
+        ),
+    )
+
+
+async def upload_USN_item_with_barcode_validation_async(
+    usn,
+    csn,
+    line,
+    workstation,
+    employee_id,
+    stage=STAGE,
+    assembly="true",
+    category=CATEGORY,
+):
+    body = upload_body(
+        usn, csn, line, workstation, employee_id, stage, assembly, category
+    )
+    response = await post_request_async(
+        body, ENDPOINT, result=UPLOAD_RESULT, operation="upload"
+    )
+    invalidate_usn(usn)
+    return response
+
+
+async def send_complete_async(serial_number, line, station, username, stage=STAGE):
+    body = complete_body(serial_number, line, station, username, stage)
+    response = await post_request_async(
+        body, ENDPOINT, result=COMPLETE_RESULT, operation="complete"
+    )
+    invalidate_usn(serial_number)
+    return response
+
+
+async def validate_hdd_async(usn):
+    body = VALIDATE_HDD.build(usn=usn)
+    return await post_request_async(
+        body, ENDPOINT, result=VALIDATE_HDD_RESULT, operation="validate_hdd"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import time
+import logging
+import threading
+from config import (
+    SFCS_BREAKER_THRESHOLD,
+    SFCS_BREAKER_RESET_TIMEOUT,
+    SFCS_BREAKER_HALF_OPEN_PROBES,
+)
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+CLOSED = "ONLINE"
+OPEN = "OFFLINE"
+HALF_OPEN = "PROBING"
+
+
+def main():
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the SFCS server.
+
+    Opens after failure_threshold consecutive failures or timeouts. While
+    open every call is rejected right away; after reset_timeout seconds up
+    to half_open_probes calls go through as probes, the first success
+    closes the circuit again and a failed probe reopens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=SFCS_BREAKER_THRESHOLD,
+        reset_timeout=SFCS_BREAKER_RESET_TIMEOUT,
+        half_open_probes=SFCS_BREAKER_HALF_OPEN_PROBES,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.state = CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = None
+        self._probes = 0
+
+    def add_listener(self, listener):
+        # The listener is called with the new state after every transition.
+        self._listeners.append(listener)
+
+    def allow(self):
+        with self._lock:
+            transition = None
+            if (
+                self.state == OPEN
+                and self._clock() - self._opened_at >= self.reset_timeout
+            ):
+                transition = self._set_state(HALF_OPEN)
+                self._probes = 0
+
+            if self.state == CLOSED:
+                allowed = True
+            elif self.state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                allowed = True
+            else:
+                self.rejected += 1
+                allowed = False
+        self._notify(transition)
+        return allowed
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            transition = self._set_state(CLOSED)
+        self._notify(transition)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            transition = None
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.failures >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+                transition = self._set_state(OPEN)
+        self._notify(transition)
+
+    def _set_state(self, state):
+        if state == self.state:
+            return None
+        logger.warning(f"SFCS circuit breaker changed from {self.state} to {state}.")
+        self.state = state
+        return state
+
+    def _notify(self, state):
+        if state is None:
+            return
+        for listener in self._listeners:
+            try:
+                listener(state)
+            except Exception:
+                logger.exception("SFCS circuit breaker listener failed.")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected,
+            }
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_breaker():
+    # Create the shared circuit breaker on first use.
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker()
+    return _breaker
+
+
+if __name__ == "__main__":
+    main()
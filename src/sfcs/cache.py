@@ -0,0 +1,133 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+def main():
+    pass
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Read-through LRU cache with a time-to-live and single-flight loading.
+
+    Concurrent get_or_load calls for a key that is being loaded wait for
+    that load instead of starting their own. Entries expire after ttl
+    seconds and the least recently used entry is evicted past maxsize.
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_load(self, key, loader, cacheable=lambda value: True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                self.misses += 1
+                call = self._in_flight[key] = _Call()
+                generation = self._generation
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                # Results loaded across an invalidation may already be stale.
+                if (
+                    call.error is None
+                    and generation == self._generation
+                    and self.ttl > 0
+                    and cacheable(call.value)
+                ):
+                    self._entries[key] = (self._clock() + self.ttl, call.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+            call.done.set()
+        return call.value
+
+    @property
+    def generation(self):
+        # Read before a load, so that put can tell if it went stale meanwhile.
+        with self._lock:
+            return self._generation
+
+    def get(self, key, default=None):
+        # Fresh value of key or default, for callers that load values themselves.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, generation=None):
+        with self._lock:
+            if self.ttl <= 0 or generation not in (None, self._generation):
+                return
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        # Drop the entries whose key matches predicate, or all of them.
+        with self._lock:
+            self._generation += 1
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+
+if __name__ == "__main__":
+    main()
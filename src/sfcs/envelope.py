@@ -0,0 +1,52 @@
+import re
+from string import Formatter
+from xml.sax.saxutils import escape
+
+ENVELOPE_START = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<soap:Envelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+    ' xmlns:xsd="http://www.w3.org/2001/XMLSchema"'
+    ' xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+    "<soap:Body>"
+)
+ENVELOPE_END = "</soap:Body></soap:Envelope>"
+
+# Whitespace between two tags carries no data in the SOAP requests.
+_INTER_TAG_WHITESPACE = re.compile(r">\s+<")
+
+
+def main():
+    pass
+
+
+class SOAPEnvelope:
+    """
+    SOAP request compiled once from a query template.
+
+    The template uses the same {name} placeholders as generate_soap_body.
+    It is wrapped in the envelope, stripped of the whitespace between tags
+    and split into encoded fragments, so build only has to escape and
+    join the values.
+    """
+
+    def __init__(self, query):
+        template = _INTER_TAG_WHITESPACE.sub(
+            "><", ENVELOPE_START + query.strip() + ENVELOPE_END
+        )
+        self.parts = [
+            (literal.encode("utf-8"), field)
+            for literal, field, _, _ in Formatter().parse(template)
+        ]
+        self.fields = [field for _, field in self.parts if field is not None]
+
+    def build(self, **values):
+        body = []
+        for literal, field in self.parts:
+            body.append(literal)
+            if field is not None:
+                body.append(escape(str(values[field])).encode("utf-8"))
+        return b"".join(body)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+from xml.etree.ElementTree import XMLPullParser
+
+SOAP_FAULT = "{http://schemas.xmlsoap.org/soap/envelope/}Fault"
+
+
+def main():
+    pass
+
+
+class SOAPFault(Exception):
+    """The SOAP response carried a Fault element instead of a result."""
+
+    def __init__(self, faultcode, faultstring):
+        super().__init__(faultstring)
+        self.faultcode = faultcode
+        self.faultstring = faultstring
+
+
+def parse_result(chunks, result):
+    """
+    Return the text of the first result element found in the chunks.
+
+    The response is fed to a pull parser chunk by chunk and parsing stops
+    at the end tag of result (a {namespace}tag name), so the rest of the
+    body is never parsed. Returns None if the element is not present and
+    raises SOAPFault if the body holds a SOAP Fault.
+    """
+    parser = XMLPullParser(events=("end",))
+    fault = {}
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, element in parser.read_events():
+            if element.tag == result:
+                return element.text
+            if element.tag == SOAP_FAULT:
+                raise SOAPFault(fault.get("faultcode"), fault.get("faultstring"))
+            if element.tag in ("faultcode", "faultstring"):
+                fault[element.tag] = element.text
+            # Nothing else is needed, so do not let the tree grow.
+            element.clear()
+    parser.close()
+    return None
+
+
+if __name__ == "__main__":
+    main()
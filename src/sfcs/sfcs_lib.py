@@ -1,35 +1,164 @@
+import time
 import logging
 import requests
-from xml.etree.ElementTree import fromstring
-from config import SFCS_SERVER, STAGE, CATEGORY
+from xml.etree.ElementTree import ParseError, fromstring
+from config import (
+    SFCS_SERVER,
+    STAGE,
+    CATEGORY,
+    SFCS_CACHE_SIZE,
+    SFCS_ROUTE_CACHE_TTL,
+)
+from sfcs.breaker import get_breaker
+from sfcs.cache import TTLCache
+from sfcs.envelope import SOAPEnvelope
+from sfcs.parser import SOAPFault, parse_result
+from sfcs.transport import get_transport
+from helpers.metrics import get_registry
+from helpers.tracing import get_tracer
 
 # Create a logger object.
 logger = logging.getLogger(__name__)
 
 HEADERS = {"content-type": "text/xml"}
+CIRCUIT_OPEN = "SFCS UNAVAILABLE (circuit open)"
+UNREACHABLE = "SFCS UNREACHABLE (connection error)"
+ENDPOINT = "Tester.WebService/WebService.asmx"
+TESTER_NAMESPACE = "{http://localhost/Tester.WebService/WebService}"
+CHECK_ROUTE_RESULT = TESTER_NAMESPACE + "CheckRouteResult"
+UPLOAD_RESULT = TESTER_NAMESPACE + "UploadUSNItemWithBarcodeValidationResult"
+COMPLETE_RESULT = TESTER_NAMESPACE + "CompleteResult"
+VALIDATE_HDD_RESULT = TESTER_NAMESPACE + "DynamicDBFunctionResult"
 NAMESPACES = {
     "soap": "http://schemas.xmlsoap.org/soap/envelope/",
     "a": "http://localhost/Tester.WebService/WebService",
     "b": "http://localhost/Basic.WebService/WebService",
 }
 
+# Read-through cache of the route checks, keyed by USN first. It only hits
+# when a WTR is scanned again within the TTL, before any upload changed its
+# state, which the station NGs anyway while that USN is current. The HDD
+# count is read once per USN right after its last upload, so it is not
+# cached.
+route_cache = TTLCache(SFCS_CACHE_SIZE, SFCS_ROUTE_CACHE_TTL)
+
+# Latency and outcome of every request that reached the transport.
+request_duration = get_registry().histogram(
+    "sfcs_request_duration_seconds",
+    "Duration of the SFCS SOAP requests.",
+    ["operation"],
+)
+requests_total = get_registry().counter(
+    "sfcs_requests_total",
+    "SFCS SOAP requests by outcome.",
+    ["operation", "outcome"],
+)
+
 
 def main():
     pass
 
 
-def post_request(body, endpoint, timeout=5):
+def post_request(body, endpoint, timeout=5, result=None, operation="soap"):
+    """
+    Post a SOAP request to SFCS.
+
+    Without result, the whole response is parsed and its tree returned.
+    With result (a {namespace}tag name), only the text of that element is
+    returned. "TIMEOUT", CIRCUIT_OPEN or
+    UNREACHABLE are returned when SFCS could not be reached, None when it
+    answered with an HTTP error or an invalid response. The latency and
+    outcome are recorded in the metrics under operation.
+    """
     url = f"http://{SFCS_SERVER}/{endpoint}"
+    breaker = get_breaker()
+    if not breaker.allow():
+        return reject_request(url, operation)
+    start = time.perf_counter()
+    with get_tracer().span("sfcs", operation=operation):
+        value = _post_request(url, body, timeout, result, breaker)
+    record_request(operation, start, value)
+    return value
+
+
+def reject_request(url, operation):
+    # Fail fast while the SFCS server is known to be down.
+    logger.error(f"Request to {url} rejected, SFCS circuit is open.")
+    requests_total.inc(operation=operation, outcome="circuit_open")
+    return CIRCUIT_OPEN
+
+
+def record_request(operation, start, value):
+    # Latency and outcome of a request that reached the transport.
+    request_duration.observe(time.perf_counter() - start, operation=operation)
+    requests_total.inc(operation=operation, outcome=_outcome(value))
+
+
+def _outcome(value):
+    if value is None or value == UNREACHABLE:
+        return "error"
+    if value == "TIMEOUT":
+        return "timeout"
+    if isinstance(value, str) and value.startswith("SOAP Fault"):
+        return "fault"
+    return "ok"
+
+
+def _post_request(url, body, timeout, result, breaker):
     try:
-        response = requests.post(url, data=body, headers=HEADERS, timeout=timeout)
-        response.raise_for_status()
-        return fromstring(response.content)
+        response = get_transport().post(url, body, HEADERS, timeout)
+        if result is None:
+            response.raise_for_status()
+            value = fromstring(response.content)
+        else:
+            value = _parse_result(response, result)
     except requests.exceptions.Timeout:
         logger.error(f"Request to {url} timed out after {timeout} seconds.")
+        breaker.record_failure()
         return "TIMEOUT"
+    except requests.exceptions.ConnectionError as e:
+        logger.error(f"Could not connect to {url}: {e}")
+        breaker.record_failure()
+        return UNREACHABLE
     except requests.exceptions.RequestException as e:
         logger.error(f"Error while making request: {e}")
+        breaker.record_failure()
+        return
+    except SOAPFault as e:
+        # The server answered, the request itself was rejected.
+        logger.error(f"SOAP Fault from {url}: {e.faultcode} {e.faultstring}")
+        breaker.record_success()
+        return f"SOAP Fault: {e.faultstring}"
+    except ParseError as e:
+        logger.error(f"Invalid XML response from {url}: {e}")
+        breaker.record_failure()
         return
+    breaker.record_success()
+    return value
+
+
+def _parse_result(response, result):
+    # The responses hold a single result element, streaming them does not
+    # pay off (see benchmarks/bench_parser.py), so parse the whole body.
+    try:
+        value = parse_result([response.content], result)
+    except ParseError:
+        # Error pages are usually not XML, report the HTTP status instead.
+        response.raise_for_status()
+        raise
+    response.raise_for_status()
+    return value
+
+
+def open_connections(connections=1, timeout=5):
+    """
+    Resolve SFCS and open connections of the pool before the first request.
+
+    A connection error is raised to the caller and does not count against
+    the breaker, the first request connects again.
+    """
+    url = f"http://{SFCS_SERVER}/{ENDPOINT}"
+    return get_transport().prewarm(url, connections, timeout)
 
 
 def find_xml_value(tree, path, split=False):
@@ -54,22 +183,88 @@ def generate_soap_body(query, **params):
     return body_template.format(query.format(**params))
 
 
+CHECK_ROUTE = SOAPEnvelope("""
+    <CheckRoute xmlns="http://localhost/Tester.WebService/WebService">
+        <UnitSerialNumber>{usn}</UnitSerialNumber>
+        <StageCode>{stage}</StageCode>
+    </CheckRoute>
+    """)
+
+UPLOAD_USN_ITEM_WITH_BARCODE_VALIDATION = SOAPEnvelope("""
+    <UploadUSNItemWithBarcodeValidation xmlns="http://localhost/Tester.WebService/WebService">
+        <UnitSerialNumber>{usn}</UnitSerialNumber>
+        <StageCode>{stage}</StageCode>
+        <ComponentSerialNumber>{csn}</ComponentSerialNumber>
+        <Assembly>{assembly}</Assembly>
+        <CheckUsedCategory>{category}</CheckUsedCategory>
+        <Line>{line}</Line>
+        <Workstation>{workstation}</Workstation>
+        <UserID>{employee_id}</UserID>
+    </UploadUSNItemWithBarcodeValidation>
+    """)
+
+COMPLETE = SOAPEnvelope("""
+    <Complete xmlns="http://localhost/Tester.WebService/WebService">
+        <UnitSerialNumber>{serial_number}</UnitSerialNumber>
+        <Line>{line}</Line>
+        <StageCode>{stage}</StageCode>
+        <StationName>{station}</StationName>
+        <EmployeeID>{username}</EmployeeID>
+        <Pass>1</Pass>
+        <TrnDatas>
+            <TrnData></TrnData>
+        </TrnDatas>
+    </Complete>
+    """)
+
+VALIDATE_HDD = SOAPEnvelope("""
+    <DynamicDBFunction xmlns="http://localhost/Tester.WebService/WebService">
+        <FunctionName>FUNC_VALIDATEHDD</FunctionName>
+        <Stage>AO</Stage>
+        <DynamicParameters>
+            <DynamicParameter>
+                <strParam>P_USN</strParam>
+                <strValue>{usn}</strValue>
+            </DynamicParameter>
+        </DynamicParameters>
+    </DynamicDBFunction>
+    """)
+
+
+def is_transient(response):
+    # SFCS was not reached, sending the request again may succeed. HTTP
+    # errors and invalid responses (None) are answers and are not retried.
+    return response in ("TIMEOUT", CIRCUIT_OPEN, UNREACHABLE)
+
+
+def is_cacheable(response):
+    # Only real answers from the server are cached.
+    return (
+        response is not None
+        and not is_transient(response)
+        and not response.startswith("SOAP Fault")
+    )
+
+
+def invalidate_usn(usn):
+    # Called whenever the state of the unit changes on the server.
+    route_cache.invalidate(lambda key: key[0] == usn)
+
+
 def check_route(usn, stage=STAGE):
-    body = generate_soap_body(
-        """
-        <CheckRoute xmlns="http://localhost/Tester.WebService/WebService">
-            <UnitSerialNumber>{usn}</UnitSerialNumber>
-            <StageCode>{stage}</StageCode>
-        </CheckRoute>
-        """,
-        usn=usn,
-        stage=stage,
+    return route_cache.get_or_load(
+        (usn, stage), lambda: _check_route(usn, stage), cacheable=is_cacheable
     )
-    tree = post_request(body, "Tester.WebService/WebService.asmx")
-    return find_xml_value(tree, ".//a:CheckRouteResult")
 
 
-def upload_USN_item_with_barcode_validation(
+def _check_route(usn, stage):
+    body = CHECK_ROUTE.build(usn=usn, stage=stage)
+    return post_request(
+        body, ENDPOINT, result=CHECK_ROUTE_RESULT, operation="check_route"
+    )
+
+
+def upload_body(
     usn,
     csn,
     line,
@@ -79,19 +274,7 @@ def upload_USN_item_with_barcode_validation(
     assembly="true",
     category=CATEGORY,
 ):
-    body = generate_soap_body(
-        """
-        <UploadUSNItemWithBarcodeValidation xmlns="http://localhost/Tester.WebService/WebService">
-            <UnitSerialNumber>{usn}</UnitSerialNumber>
-            <StageCode>{stage}</StageCode>
-            <ComponentSerialNumber>{csn}</ComponentSerialNumber>
-            <Assembly>{assembly}</Assembly>
-            <CheckUsedCategory>{category}</CheckUsedCategory>
-            <Line>{line}</Line>
-            <Workstation>{workstation}</Workstation>
-            <UserID>{employee_id}</UserID>
-        </UploadUSNItemWithBarcodeValidation>
-        """,
+    return UPLOAD_USN_ITEM_WITH_BARCODE_VALIDATION.build(
         usn=usn,
         stage=stage,
         csn=csn,
@@ -101,55 +284,49 @@ def upload_USN_item_with_barcode_validation(
         workstation=workstation,
         employee_id=employee_id,
     )
-    tree = post_request(body, "Tester.WebService/WebService.asmx")
-    return find_xml_value(tree, ".//a:UploadUSNItemWithBarcodeValidationResult")
 
 
-def send_complete(serial_number, line, station, username, stage=STAGE):
-    body = generate_soap_body(
-        """
-    <Complete xmlns="http://localhost/Tester.WebService/WebService">
-        <UnitSerialNumber>{serial_number}</UnitSerialNumber>
-        <Line>{line}</Line>
-        <StageCode>{stage}</StageCode>
-        <StationName>{station}</StationName>
-        <EmployeeID>{username}</EmployeeID>
-        <Pass>1</Pass>
-        <TrnDatas>
-            <TrnData></TrnData>
-        </TrnDatas>
-    </Complete>
-    """,
+def upload_USN_item_with_barcode_validation(
+    usn,
+    csn,
+    line,
+    workstation,
+    employee_id,
+    stage=STAGE,
+    assembly="true",
+    category=CATEGORY,
+):
+    body = upload_body(
+        usn, csn, line, workstation, employee_id, stage, assembly, category
+    )
+    response = post_request(body, ENDPOINT, result=UPLOAD_RESULT, operation="upload")
+    invalidate_usn(usn)
+    return response
+
+
+def complete_body(serial_number, line, station, username, stage=STAGE):
+    return COMPLETE.build(
         serial_number=serial_number,
         line=line,
         stage=stage,
         station=station,
         username=username,
     )
-    tree = post_request(body, "Tester.WebService/WebService.asmx")
-    return find_xml_value(tree, ".//a:CompleteResult")
-
 
-def validate_hdd(usn):
-    body = generate_soap_body(
-        """
-    <DynamicDBFunction xmlns="http://localhost/Tester.WebService/WebService">
-      <FunctionName>FUNC_VALIDATEHDD</FunctionName>
-      <Stage>AO</Stage>
-      <DynamicParameters>
-        <DynamicParameter>
-          <strParam>P_USN</strParam>
-          <strValue>{usn}</strValue>
-        </DynamicParameter>
-      </DynamicParameters>
-    </DynamicDBFunction>
 
-    """,
-        usn=usn,
+def send_complete(serial_number, line, station, username, stage=STAGE):
+    body = complete_body(serial_number, line, station, username, stage)
+    response = post_request(
+        body, ENDPOINT, result=COMPLETE_RESULT, operation="complete"
     )
-    tree = post_request(body, "Tester.WebService/WebService.asmx")
-    return find_xml_value(
-        tree, "./soap:Body" "/a:DynamicDBFunctionResponse" "/a:DynamicDBFunctionResult"
+    invalidate_usn(serial_number)
+    return response
+
+
+def validate_hdd(usn):
+    body = VALIDATE_HDD.build(usn=usn)
+    return post_request(
+        body, ENDPOINT, result=VALIDATE_HDD_RESULT, operation="validate_hdd"
     )
 
 
@@ -0,0 +1,199 @@
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ProtocolError
+from config import SFCS_POOL_SIZE, SFCS_POOL_IDLE_TIMEOUT, SFCS_STALE_RETRIES
+
+# Create a logger object.
+logger = logging.getLogger(__name__)
+
+
+def main():
+    pass
+
+
+class TransportStats:
+    """Thread-safe counters for the SFCS connection pool."""
+
+    FIELDS = (
+        "requests",
+        "new_connections",
+        "reused_connections",
+        "idle_evictions",
+        "stale_retries",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def increment(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+class _KeepAlivePoolMixin:
+    # Set on the per-transport subclass created by SFCSTransport.
+    stats = None
+    idle_timeout = None
+    # Per thread, whether the last connection taken was a pooled one.
+    local = None
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+
+        # Drop connections that sat idle for longer than the server keeps them.
+        released_at = getattr(conn, "released_at", None)
+        if (
+            conn.is_connected
+            and released_at is not None
+            and time.monotonic() - released_at > self.idle_timeout
+        ):
+            logger.debug(f"Evicting idle connection to {self.host}.")
+            conn.close()
+            self.stats.increment("idle_evictions")
+
+        self.local.reused = conn.is_connected
+        if conn.is_connected:
+            self.stats.increment("reused_connections")
+        else:
+            self.stats.increment("new_connections")
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.released_at = time.monotonic()
+        super()._put_conn(conn)
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    def __init__(self, pool_classes, **kwargs):
+        self._pool_classes = pool_classes
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+
+class SFCSTransport:
+    """
+    Shared keep-alive HTTP transport for the SFCS SOAP calls.
+
+    Wraps a single requests Session whose connection pool is bounded to
+    pool_size connections, evicts connections idle for more than
+    idle_timeout seconds and retries requests that fail on a stale
+    connection. Only a pooled connection the server dropped is retried,
+    a refused connect or a timeout is never sent again.
+    """
+
+    def __init__(
+        self,
+        pool_size=SFCS_POOL_SIZE,
+        idle_timeout=SFCS_POOL_IDLE_TIMEOUT,
+        stale_retries=SFCS_STALE_RETRIES,
+    ):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.stale_retries = stale_retries
+        self.stats = TransportStats()
+        self._local = threading.local()
+
+        attributes = {
+            "stats": self.stats,
+            "idle_timeout": idle_timeout,
+            "local": self._local,
+        }
+        pool_classes = {
+            "http": type(
+                "KeepAliveHTTPConnectionPool",
+                (_KeepAlivePoolMixin, HTTPConnectionPool),
+                attributes,
+            ),
+            "https": type(
+                "KeepAliveHTTPSConnectionPool",
+                (_KeepAlivePoolMixin, HTTPSConnectionPool),
+                attributes,
+            ),
+        }
+        adapter = _KeepAliveAdapter(
+            pool_classes,
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, url, data, headers, timeout):
+        self.stats.increment("requests")
+        attempt = 0
+        while True:
+            try:
+                return self.session.post(
+                    url, data=data, headers=headers, timeout=timeout
+                )
+            except requests.exceptions.Timeout:
+                # Never replay a request the server may still be processing.
+                raise
+            except requests.exceptions.ConnectionError as e:
+                if attempt >= self.stale_retries or not self._is_stale(e):
+                    raise
+                attempt += 1
+                self.stats.increment("stale_retries")
+                logger.warning(
+                    f"Connection to {url} failed, retrying on a new connection. Error: {e}."
+                )
+
+    def _is_stale(self, error):
+        # A reused connection the server closed while it sat in the pool,
+        # anything else may have reached the server and is not replayed.
+        reason = error.args[0] if error.args else None
+        return getattr(self._local, "reused", False) and isinstance(
+            reason, ProtocolError
+        )
+
+    def prewarm(self, url, connections=1, timeout=5):
+        # Open connections to the host of url ahead of the first request.
+        # HEAD requests through the session land in the pool the requests to
+        # url take. Their responses are only read once all of them are sent,
+        # so every request opens a connection of its own.
+        connections = min(connections, self.pool_size)
+        responses = []
+        try:
+            for _ in range(connections):
+                responses.append(self.session.head(url, timeout=timeout, stream=True))
+        finally:
+            for response in responses:
+                # Reading the empty body hands the connection back to the pool.
+                response.content
+        return connections
+
+    def close(self):
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    # Create the shared transport on first use.
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = SFCSTransport()
+    return _transport
+
+
+if __name__ == "__main__":
+    main()
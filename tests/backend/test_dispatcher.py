@@ -0,0 +1,64 @@
+import time
+import threading
+from src.backend.dispatcher import KeyedDispatcher
+
+
+def wait_until_idle(dispatcher, timeout=2):
+    deadline = time.monotonic() + timeout
+    while dispatcher.qsize() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return dispatcher.qsize() == 0
+
+
+def test_same_key_tasks_run_in_order():
+    dispatcher = KeyedDispatcher()
+    dispatcher.start(4)
+    results = []
+
+    def task(value):
+        time.sleep(0.002)
+        results.append(value)
+
+    for value in range(20):
+        dispatcher.submit("WTR1", task, value)
+    assert wait_until_idle(dispatcher)
+    assert results == list(range(20))
+
+
+def test_different_keys_run_in_parallel():
+    dispatcher = KeyedDispatcher()
+    dispatcher.start(2)
+    barrier = threading.Barrier(2, timeout=2)
+    finished = []
+
+    def task(key):
+        # Both tasks must be running at once to pass the barrier.
+        barrier.wait()
+        finished.append(key)
+
+    dispatcher.submit("WTR1", task, "WTR1")
+    dispatcher.submit("WTR2", task, "WTR2")
+    assert wait_until_idle(dispatcher)
+    assert sorted(finished) == ["WTR1", "WTR2"]
+
+
+def test_failing_task_does_not_block_its_key():
+    dispatcher = KeyedDispatcher()
+    dispatcher.start(1)
+    results = []
+
+    def fail():
+        raise ValueError("boom")
+
+    dispatcher.submit("WTR1", fail)
+    dispatcher.submit("WTR1", results.append, "next")
+    assert wait_until_idle(dispatcher)
+    assert results == ["next"]
+    assert dispatcher.workers == 1
+
+
+def test_start_is_idempotent():
+    dispatcher = KeyedDispatcher()
+    dispatcher.start(3)
+    dispatcher.start(3)
+    assert dispatcher.workers == 3
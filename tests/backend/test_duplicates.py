@@ -0,0 +1,66 @@
+from src.backend.duplicates import CSNIndex
+
+
+def test_index_tracks_csns_per_usn():
+    index = CSNIndex()
+    index.add("WTR1", "CSN1")
+    assert index.contains("WTR1", "CSN1")
+    assert not index.contains("WTR2", "CSN1")
+    index.discard("WTR1")
+    assert not index.contains("WTR1", "CSN1")
+
+
+def test_index_is_persisted(tmp_path):
+    path = str(tmp_path / "csn_index.jsonl")
+    index = CSNIndex(path)
+    index.add("WTR1", "CSN1")
+    index.add("WTR1", "CSN2")
+    index.add("WTR2", "CSN3")
+    index.discard("WTR2")
+
+    reloaded = CSNIndex(path)
+    assert reloaded.contains("WTR1", "CSN1")
+    assert reloaded.count("WTR1") == 2
+    assert not reloaded.contains("WTR2", "CSN3")
+
+    # The file was compacted to the open USNs.
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+
+
+def test_index_ignores_a_torn_last_line(tmp_path):
+    path = tmp_path / "csn_index.jsonl"
+    path.write_text('{"op": "add", "usn": "WTR1", "csn": "CSN1"}\n{"op": "ad')
+    assert CSNIndex(str(path)).contains("WTR1", "CSN1")
+
+
+def test_abandoned_usns_expire(tmp_path):
+    path = str(tmp_path / "csn_index.jsonl")
+    now = [1000.0]
+    index = CSNIndex(path, retention=60, clock=lambda: now[0])
+    index.add("WTR1", "CSN1")
+    now[0] += 30
+    index.add("WTR2", "CSN2")
+    now[0] += 45
+    index.add("WTR3", "CSN3")
+    assert not index.contains("WTR1", "CSN1")
+    assert index.contains("WTR2", "CSN2")
+
+    now[0] += 45
+    reloaded = CSNIndex(path, retention=60, clock=lambda: now[0])
+    assert not reloaded.contains("WTR2", "CSN2")
+    assert reloaded.contains("WTR3", "CSN3")
+    with open(path) as f:
+        assert len(f.readlines()) == 1
+
+
+def test_file_is_compacted_while_running(tmp_path):
+    path = str(tmp_path / "csn_index.jsonl")
+    index = CSNIndex(path)
+    for unit in range(200):
+        index.add(f"WTR{unit}", "CSN1")
+        index.discard(f"WTR{unit}")
+    index.add("WTR1", "CSN1")
+    with open(path) as f:
+        assert len(f.readlines()) <= 102
+    assert CSNIndex(path).count("WTR1") == 1
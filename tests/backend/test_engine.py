@@ -0,0 +1,133 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from src.backend.engine import AsyncEngine
+from helpers.tracing import TRACE_ID, Tracer
+
+
+@pytest.fixture(autouse=True)
+def tracer(mocker):
+    """Keep the queue spans out of the logs directory."""
+    return mocker.patch("helpers.tracing._tracer", Tracer())
+
+
+@pytest.fixture
+def engine():
+    engine = AsyncEngine()
+    engine.start()
+    yield engine
+    engine.stop()
+
+
+def wait_until_idle(engine, timeout=2):
+    deadline = time.monotonic() + timeout
+    while engine.qsize() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return engine.qsize() == 0
+
+
+def test_same_key_tasks_run_in_order(engine):
+    results = []
+
+    async def task(value):
+        # The earlier tasks wait the longest, they still finish first.
+        await asyncio.sleep(0.001 * (20 - value))
+        results.append(value)
+
+    for value in range(20):
+        engine.submit("WTR1", task, value)
+    assert wait_until_idle(engine)
+    assert results == list(range(20))
+
+
+def test_different_keys_wait_side_by_side(engine):
+    async def task():
+        await asyncio.sleep(0.2)
+
+    start = time.monotonic()
+    for key in range(50):
+        engine.submit(key, task)
+    assert wait_until_idle(engine)
+    assert time.monotonic() - start < 1
+
+
+def test_failed_task_does_not_block_its_key(engine):
+    results = []
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def task():
+        results.append("done")
+
+    engine.submit("WTR1", fail)
+    engine.submit("WTR1", task)
+    assert wait_until_idle(engine)
+    assert results == ["done"]
+
+
+def test_call_later_submits_after_the_delay(engine):
+    done = threading.Event()
+
+    async def task():
+        done.set()
+
+    engine.call_later(0.05, "WTR1", task)
+    assert engine.stats()["scheduled"] == 1
+    assert done.wait(2)
+    assert wait_until_idle(engine)
+    assert engine.stats() == {"in_flight": 0, "running": 0, "scheduled": 0}
+
+
+def test_call_later_tasks_are_pending_until_they_start(engine):
+    seen = []
+    done = threading.Event()
+
+    async def task():
+        seen.append(engine.pending("WTR1"))
+        done.set()
+
+    engine.call_later(0.05, "WTR1", task)
+    assert engine.pending("WTR1") == 1
+    assert done.wait(2)
+    assert seen == [0]
+
+
+def test_tasks_keep_the_trace_id_of_the_caller(engine):
+    seen = []
+
+    async def task():
+        seen.append(TRACE_ID.get())
+
+    token = TRACE_ID.set("trace-1")
+    try:
+        engine.submit("WTR1", task)
+    finally:
+        TRACE_ID.reset(token)
+    assert wait_until_idle(engine)
+    assert seen == ["trace-1"]
+
+
+def test_run_returns_the_result(engine):
+    async def answer():
+        return 42
+
+    assert engine.run(answer()).result(timeout=2) == 42
+
+
+def test_run_blocking_runs_on_the_writer_thread(engine):
+    async def write():
+        return await engine.run_blocking(
+            lambda: (threading.current_thread().name, TRACE_ID.get())
+        )
+
+    token = TRACE_ID.set("trace-1")
+    try:
+        name, trace_id = engine.run(write()).result(timeout=2)
+    finally:
+        TRACE_ID.reset(token)
+    assert name.startswith("AsyncEngineWriter")
+    assert trace_id == "trace-1"
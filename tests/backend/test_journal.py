@@ -0,0 +1,214 @@
+import sqlite3
+
+import pytest
+
+from src.backend.journal import (
+    DONE,
+    FAILED,
+    PENDING,
+    SENDING,
+    Journal,
+    JournalFlusher,
+)
+from src.sfcs.sfcs_lib import CIRCUIT_OPEN
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = Journal(str(tmp_path / "journal.sqlite3"))
+    yield journal
+    journal.close()
+
+
+def states(journal):
+    return journal._conn.execute("SELECT state FROM intents ORDER BY id").fetchall()
+
+
+def test_disabled_journal_is_a_noop():
+    journal = Journal()
+    assert journal.record("WTR1", "upload", {}) is None
+    journal.mark(None, DONE)
+    assert journal.pending(10) == []
+    assert not journal.has_pending("WTR1")
+
+
+def test_record_and_mark(journal):
+    intent_id = journal.record("WTR1", "upload", {"csn": "CSN1"})
+    assert journal.has_pending("WTR1")
+    assert journal.backlog == 0
+    journal.mark(intent_id, PENDING, "TIMEOUT")
+    assert journal.backlog == 1
+    (intent,) = journal.pending(10)
+    assert intent.id == intent_id
+    assert intent.payload == {"csn": "CSN1"}
+    journal.mark(intent_id, DONE, "OK")
+    assert journal.backlog == 0
+    assert not journal.has_pending("WTR1")
+
+
+def test_sending_intents_are_recovered_on_open(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    journal = Journal(path)
+    journal.record("WTR1", "upload", {"csn": "CSN1"}, state=SENDING)
+    journal.close()
+
+    reopened = Journal(path)
+    reopened.open()
+    assert reopened.backlog == 1
+    assert [intent.usn for intent in reopened.pending(10)] == ["WTR1"]
+    reopened.close()
+
+
+def test_backlog_listener(journal):
+    backlogs = []
+    journal.add_listener(backlogs.append)
+    intent_id = journal.record("WTR1", "upload", {}, state=PENDING)
+    journal.mark(intent_id, DONE, "OK")
+    assert backlogs == [1, 0]
+
+
+def test_flush_sends_in_order(journal, mocker):
+    handler = mocker.Mock(side_effect=["OK", "OK", "NG"])
+    failures = []
+    flusher = JournalFlusher(journal, {"upload": handler})
+    flusher.add_listener(lambda intent, response: failures.append(response))
+    for csn in ("CSN1", "CSN2", "CSN3"):
+        journal.record("WTR1", "upload", {"csn": csn}, state=PENDING)
+
+    assert flusher.flush()
+    assert [call.args[0]["csn"] for call in handler.call_args_list] == [
+        "CSN1",
+        "CSN2",
+        "CSN3",
+    ]
+    assert states(journal) == [(DONE,), (DONE,), (FAILED,)]
+    assert failures == ["NG"]
+    assert journal.backlog == 0
+
+
+def test_unique_constraint_is_done_only_for_recovered_uploads(tmp_path, mocker):
+    path = str(tmp_path / "journal.sqlite3")
+    journal = Journal(path)
+    # Cut off by a crash while it was sent, and only ever queued.
+    journal.record("WTR1", "upload", {"csn": "CSN1"}, state=SENDING)
+    journal.record("WTR2", "upload", {"csn": "CSN2"}, state=PENDING)
+    journal.close()
+
+    reopened = Journal(path)
+    handler = mocker.Mock(return_value="unique constraint")
+    flusher = JournalFlusher(reopened, {"upload": handler})
+    assert [intent.recovered for intent in reopened.pending(10)] == [True, False]
+    assert flusher.flush()
+    assert states(reopened) == [(DONE,), (FAILED,)]
+    reopened.close()
+
+
+def test_journal_without_recovered_column_is_migrated(tmp_path):
+    path = str(tmp_path / "journal.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE intents (id INTEGER PRIMARY KEY AUTOINCREMENT, usn TEXT,"
+        " operation TEXT NOT NULL, payload TEXT NOT NULL, state TEXT NOT NULL,"
+        " attempts INTEGER NOT NULL DEFAULT 0, response TEXT,"
+        " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO intents (usn, operation, payload, state, created_at, updated_at)"
+        " VALUES ('WTR1', 'upload', '{}', ?, 0, 0)",
+        (SENDING,),
+    )
+    conn.commit()
+    conn.close()
+
+    journal = Journal(path)
+    (intent,) = journal.pending(10)
+    assert intent.recovered
+    journal.close()
+
+
+def test_flush_stops_at_transient_failure(journal, mocker):
+    handler = mocker.Mock(side_effect=["OK", "TIMEOUT"])
+    flusher = JournalFlusher(journal, {"upload": handler})
+    for csn in ("CSN1", "CSN2", "CSN3"):
+        journal.record("WTR1", "upload", {"csn": csn}, state=PENDING)
+
+    assert not flusher.flush()
+    assert handler.call_count == 2
+    assert states(journal) == [(DONE,), (PENDING,), (PENDING,)]
+    assert journal.backlog == 2
+
+
+def test_transient_failure_holds_back_only_its_usn(journal, mocker):
+    handler = mocker.Mock(side_effect=["TIMEOUT", "OK", "OK"])
+    flusher = JournalFlusher(journal, {"upload": handler}, batch_size=1)
+    journal.record("WTR1", "upload", {"csn": "CSN1"}, state=PENDING)
+    journal.record("WTR1", "upload", {"csn": "CSN2"}, state=PENDING)
+    journal.record("WTR2", "upload", {"csn": "CSN3"}, state=PENDING)
+    journal.record("WTR3", "upload", {"csn": "CSN4"}, state=PENDING)
+
+    assert not flusher.flush()
+    assert [call.args[0]["csn"] for call in handler.call_args_list] == [
+        "CSN1",
+        "CSN3",
+        "CSN4",
+    ]
+    assert states(journal) == [(PENDING,), (PENDING,), (DONE,), (DONE,)]
+
+
+def test_intent_without_answer_fails_after_max_attempts(journal, mocker):
+    handler = mocker.Mock(return_value="TIMEOUT")
+    failures = []
+    flusher = JournalFlusher(journal, {"upload": handler}, max_attempts=3)
+    flusher.add_listener(lambda intent, response: failures.append(response))
+    journal.record("WTR1", "upload", {"csn": "CSN1"}, state=PENDING)
+
+    assert not flusher.flush()
+    assert not flusher.flush()
+    assert flusher.flush()
+    assert states(journal) == [(FAILED,)]
+    assert failures == ["No answer after 3 attempts: TIMEOUT"]
+    assert journal.backlog == 0
+
+
+def test_open_circuit_does_not_count_as_an_attempt(journal, mocker):
+    handler = mocker.Mock(return_value=CIRCUIT_OPEN)
+    flusher = JournalFlusher(journal, {"upload": handler}, max_attempts=2)
+    journal.record("WTR1", "upload", {"csn": "CSN1"}, state=PENDING)
+
+    for _ in range(5):
+        assert not flusher.flush()
+    assert [intent.attempts for intent in journal.pending(10)] == [0]
+
+
+def test_failed_queued_upload_fails_the_complete(journal, mocker):
+    upload = mocker.Mock(side_effect=["OK", "NG"])
+    complete = mocker.Mock(return_value="OK")
+    failures = []
+    flusher = JournalFlusher(
+        journal, {"upload": upload, "complete": complete}, batch_size=2
+    )
+    flusher.add_listener(lambda intent, response: failures.append(intent.operation))
+    for csn in ("CSN1", "CSN2"):
+        journal.record("WTR1", "upload", {"csn": csn}, state=PENDING)
+    assert flusher.flush()
+
+    # The complete is queued after the pass, it is failed from the journal.
+    journal.record("WTR1", "complete", {"usn": "WTR1"}, state=PENDING)
+    assert flusher.flush()
+    complete.assert_not_called()
+    assert states(journal) == [(DONE,), (FAILED,), (FAILED,)]
+    assert failures == ["upload", "complete"]
+    assert journal.failed_upload("WTR1") == ("CSN2", "NG")
+
+
+def test_rejected_upload_before_queueing_does_not_fail_the_complete(journal, mocker):
+    complete = mocker.Mock(return_value="OK")
+    flusher = JournalFlusher(journal, {"complete": complete})
+    # The operator got the NG of this upload and it was never counted.
+    intent_id = journal.record("WTR1", "upload", {"csn": "CSN1"})
+    journal.mark(intent_id, FAILED, "NG")
+    journal.record("WTR1", "complete", {"usn": "WTR1"}, state=PENDING)
+
+    assert flusher.flush()
+    complete.assert_called_once()
+    assert journal.failed_upload("WTR1") is None
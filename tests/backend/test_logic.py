@@ -1,6 +1,19 @@
+import asyncio
+
 import pytest
 
-from src.backend.logic import PLCAutoScanningLogic, tasks_queue
+from src.backend.duplicates import CSNIndex
+from src.backend.journal import DONE, FAILED, PENDING, Journal, JournalFlusher
+from src.helpers.tracing import Tracer
+from src.backend.logic import (
+    PLCAutoScanningLogic,
+    flush_complete,
+    flush_upload,
+    journal_flusher,
+    retry_scheduler,
+    tasks_dispatcher,
+)
+from src.sfcs.sfcs_lib import CIRCUIT_OPEN
 
 
 @pytest.fixture(autouse=True)
@@ -43,8 +56,46 @@ def logic(app):
 
 
 @pytest.fixture(autouse=True)
-def patch_sleep(mocker):
-    return mocker.patch("time.sleep", return_value=None)
+def csn_index(mocker):
+    """Use an empty in-memory CSN index for every test."""
+    return mocker.patch("src.backend.logic.csn_index", CSNIndex())
+
+
+@pytest.fixture(autouse=True)
+def journal(mocker, tmp_path):
+    """Journal to a temporary database and keep the flusher idle."""
+    journal = Journal(str(tmp_path / "journal.sqlite3"))
+    mocker.patch("src.backend.logic.journal", journal)
+    mocker.patch.object(journal_flusher, "notify")
+    yield journal
+    journal.close()
+
+
+def intent_states(journal):
+    return journal._conn.execute(
+        "SELECT operation, state FROM intents ORDER BY id"
+    ).fetchall()
+
+
+@pytest.fixture(autouse=True)
+def tracer(mocker):
+    """Keep the scan traces out of the logs directory."""
+    return mocker.patch("helpers.tracing._tracer", Tracer())
+
+
+@pytest.fixture
+def mock_submit(mocker):
+    return mocker.patch.object(tasks_dispatcher, "submit")
+
+
+@pytest.fixture(autouse=True)
+def patch_retry(mocker):
+    """Run the scheduled retries right away."""
+    return mocker.patch.object(
+        retry_scheduler,
+        "retry",
+        side_effect=lambda key, delay, task, *args: task(*args),
+    )
 
 
 # Test the handle_serials_submit method.
@@ -62,26 +113,33 @@ def test_handle_serials_submit_with_invalid_serial(logic, app, patch_dependencie
     )
 
 
-def test_handle_serials_submit_with_valid_WTR_serial(logic, app):
+def test_handle_serials_submit_with_valid_WTR_serial(logic, app, mock_submit):
     """Test handle_serials_submit with a valid WTR serial number."""
     logic.handle_serials_submit()
     app.update_text_widget.assert_not_called()
-    assert not tasks_queue.empty()
-    task, args = tasks_queue.get()
-    assert task == logic.process_check_route
-    assert args == ("WTR1234567",)
+    mock_submit.assert_called_once_with(
+        ("WS1", None), logic.process_check_route, "WTR1234567"
+    )
 
 
-def test_handle_serials_submit_with_valid_USN_serial(logic, app):
+def test_route_checks_queue_behind_the_current_usn(logic, app, mock_submit):
+    """Test a WTR scan runs after the uploads of the current USN."""
+    app.current_USN = "WTR7654321"
+    logic.handle_serials_submit()
+    mock_submit.assert_called_once_with(
+        ("WS1", "WTR7654321"), logic.process_check_route, "WTR1234567"
+    )
+
+
+def test_handle_serials_submit_with_valid_USN_serial(logic, app, mock_submit):
     """Test handle_serials_submit with a valid USN serial number."""
     app.serial_numbers.get.return_value = "USN123"
     app.current_USN = "WTR123DDE21"
     logic.handle_serials_submit()
     app.update_text_widget.assert_not_called()
-    assert not tasks_queue.empty()
-    task, args = tasks_queue.get()
-    assert task == logic.process_serial
-    assert args == ("USN123",)
+    mock_submit.assert_called_once_with(
+        ("WS1", "WTR123DDE21"), logic.process_serial, "USN123", "WTR123DDE21"
+    )
 
 
 def test_handle_serials_submit_with_same_serial_number(logic, app, patch_dependencies):
@@ -104,7 +162,7 @@ def test_handle_serials_submit_with_same_serial_number(logic, app, patch_depende
 def test_process_serial_with_quantity_limit(logic, app, patch_dependencies):
     """Test process_serial with the quantity limit reached."""
     app.counter = app.quantity
-    logic.process_serial("SERIAL123")
+    logic.process_serial("SERIAL123", app.current_USN)
     app.update_text_widget.assert_called_with(
         app.error_text, "Quantity limit reached.", "red"
     )
@@ -116,7 +174,7 @@ def test_process_serial_with_quantity_limit(logic, app, patch_dependencies):
 def test_process_serial_success(logic, app, patch_dependencies):
     """Test process_serial with a successful upload."""
     patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = "OK"
-    logic.process_serial("SERIAL123")
+    logic.process_serial("SERIAL123", app.current_USN)
     app.update_text_widget.assert_called_with(
         app.response_text, "Upload Response for SERIAL123: OK", "green"
     )
@@ -129,7 +187,7 @@ def test_process_serial_success(logic, app, patch_dependencies):
 def test_process_serial_failure(logic, app, patch_dependencies):
     """Test process_serial with a failed upload."""
     patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = "ERROR"
-    logic.process_serial("SERIAL123")
+    logic.process_serial("SERIAL123", app.current_USN)
     app.update_text_widget.assert_called_with(
         app.error_text, "Upload Failed for SERIAL123: ERROR", "red"
     )
@@ -144,7 +202,7 @@ def test_process_serial_with_retry(logic, app, patch_dependencies, mocker):
         "unique constraint",
         "OK",
     ]
-    logic.process_serial("SERIAL123")
+    logic.process_serial("SERIAL123", app.current_USN)
     retry_calls = [
         mocker.call(
             app.error_text,
@@ -173,7 +231,7 @@ def test_process_serial_with_max_retries(logic, app, patch_dependencies):
         "unique constraint",
         "unique constraint",
     ]
-    logic.process_serial("SERIAL123")
+    logic.process_serial("SERIAL123", app.current_USN)
     app.update_text_widget.assert_called_with(
         app.error_text,
         "Upload Failed after 3 retries for SERIAL123: unique constraint",
@@ -185,6 +243,185 @@ def test_process_serial_with_max_retries(logic, app, patch_dependencies):
     )
 
 
+def test_process_serial_retry_is_rescheduled(
+    logic, app, patch_dependencies, patch_retry
+):
+    """Test process_serial hands the retry to the scheduler instead of sleeping."""
+    patch_retry.side_effect = None
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = (
+        "TIMEOUT"
+    )
+    app.current_USN = "WTR123"
+    logic.process_serial("SERIAL123", app.current_USN)
+    key, delay, task, *args = patch_retry.call_args.args
+    assert key == ("WS1", "WTR123")
+    assert task == logic.process_serial
+    assert args == ["SERIAL123", "WTR123", 2, 1]
+    patch_dependencies["send_signal"].assert_not_called()
+
+
+def test_process_serial_retry_keeps_its_usn(
+    logic, app, patch_dependencies, patch_retry, csn_index
+):
+    """Test a retry pending while the USN restarts still uploads to its USN."""
+    patch_retry.side_effect = None
+    upload = patch_dependencies["upload_USN_item_with_barcode_validation"]
+    upload.return_value = "TIMEOUT"
+    app.current_USN = "WTROLD456"
+    logic.process_serial("SERIAL123", app.current_USN)
+    key, delay, task, *args = patch_retry.call_args.args
+
+    # The USN is completed and a new one scanned before the retry is due.
+    logic.restart()
+    app.current_USN = "WTRNEW789"
+    upload.return_value = "OK"
+    task(*args)
+
+    assert upload.call_args.args[:2] == ("WTROLD456", "SERIAL123")
+    assert key == ("WS1", "WTROLD456")
+    assert app.counter == 0
+    assert not csn_index.contains("WTRNEW789", "SERIAL123")
+    patch_dependencies["validate_hdd"].assert_not_called()
+
+
+def test_check_restart_waits_for_a_pending_retry(
+    logic, app, patch_dependencies, mocker
+):
+    """Test a USN is not completed while an upload retry of it is waiting."""
+    pending = mocker.patch.object(retry_scheduler, "pending", return_value=1)
+    app.current_USN = "WTR123"
+    app.counter = app.quantity
+    logic.check_restart(app.current_USN)
+    pending.assert_called_once_with(("WS1", "WTR123"))
+    patch_dependencies["validate_hdd"].assert_not_called()
+    assert app.current_USN == "WTR123"
+
+
+def test_process_serial_journals_the_upload(logic, app, patch_dependencies, journal):
+    """Test process_serial records the upload intent and marks it done."""
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = "OK"
+    app.current_USN = "WTR123"
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert intent_states(journal) == [("upload", DONE)]
+    assert journal.backlog == 0
+
+
+def test_process_serial_failure_marks_intent_failed(
+    logic, app, patch_dependencies, journal
+):
+    """Test process_serial marks a rejected upload as failed."""
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = (
+        "Invalid barcode"
+    )
+    app.current_USN = "WTR123"
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert intent_states(journal) == [("upload", FAILED)]
+
+
+def test_process_serial_queues_when_circuit_open(
+    logic, app, patch_dependencies, journal
+):
+    """Test process_serial queues the upload while SFCS is unavailable."""
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = (
+        CIRCUIT_OPEN
+    )
+    app.current_USN = "WTR123"
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert intent_states(journal) == [("upload", PENDING)]
+    assert journal.backlog == 1
+    journal_flusher.notify.assert_called_once()
+    app.update_text_widget.assert_called_with(
+        app.error_text,
+        f"SFCS unavailable ({CIRCUIT_OPEN}), upload for SERIAL123 queued. Backlog: 1",
+        "orange",
+    )
+    assert app.counter == 1
+    patch_dependencies["send_signal"].assert_not_called()
+
+
+def test_process_serial_invalid_response_is_NG(logic, app, patch_dependencies, journal):
+    """Test an HTTP error or invalid response is an NG, not a queued upload."""
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = None
+    app.current_USN = "WTR123"
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert intent_states(journal) == [("upload", FAILED)]
+    assert app.counter == 0
+    patch_dependencies["send_signal"].assert_called_with(
+        app.robot_number, app.line, False
+    )
+
+
+def test_queued_upload_later_failed_fails_the_complete(
+    logic, app, patch_dependencies, journal
+):
+    """Test a queued upload rejected by SFCS on flush fails the queued complete."""
+    upload = patch_dependencies["upload_USN_item_with_barcode_validation"]
+    upload.return_value = CIRCUIT_OPEN
+    app.current_USN = "WTR123"
+    app.counter = app.quantity - 1
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert intent_states(journal) == [("upload", PENDING), ("complete", PENDING)]
+    assert app.current_USN is None
+
+    failures = []
+    flusher = JournalFlusher(
+        journal, {"upload": flush_upload, "complete": flush_complete}
+    )
+    flusher.add_listener(lambda intent, response: failures.append(response))
+    upload.return_value = "NG"
+    assert flusher.flush()
+    assert intent_states(journal) == [("upload", FAILED), ("complete", FAILED)]
+    assert failures == ["NG", "Upload failed for SERIAL123: NG"]
+    patch_dependencies["validate_hdd"].assert_not_called()
+    patch_dependencies["send_complete"].assert_not_called()
+
+
+def test_process_serial_queues_after_timeouts(logic, app, patch_dependencies, journal):
+    """Test process_serial queues the upload once the timeout retries run out."""
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = (
+        "TIMEOUT"
+    )
+    app.current_USN = "WTR123"
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert patch_dependencies["upload_USN_item_with_barcode_validation"].call_count == 3
+    assert intent_states(journal) == [("upload", PENDING)]
+    patch_dependencies["send_signal"].assert_not_called()
+
+
+def test_process_serial_without_journal_sends_NG(
+    logic, app, patch_dependencies, mocker
+):
+    """Test process_serial fails fast when the journal is disabled."""
+    mocker.patch("src.backend.logic.journal", Journal())
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = (
+        CIRCUIT_OPEN
+    )
+    app.current_USN = "WTR123"
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert app.counter == 0
+    patch_dependencies["send_signal"].assert_called_with(
+        app.robot_number, app.line, False
+    )
+
+
+def test_process_serial_rejects_duplicate_csn(logic, app, patch_dependencies):
+    """Test process_serial rejects a CSN already uploaded to the current USN."""
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = "OK"
+    app.current_USN = "WTR123"
+    logic.process_serial("SERIAL123", app.current_USN)
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert patch_dependencies["upload_USN_item_with_barcode_validation"].call_count == 1
+    app.update_text_widget.assert_called_with(
+        app.error_text,
+        "Duplicate scan for SERIAL123: already uploaded to WTR123",
+        "red",
+    )
+    patch_dependencies["send_signal"].assert_called_with(
+        app.robot_number, app.line, False
+    )
+    assert app.counter == 1
+
+
 # Test the process_check_route method.
 
 
@@ -244,7 +481,7 @@ def test_check_restart_when_NG(logic, app, patch_dependencies):
     patch_dependencies["validate_hdd"].return_value = "NG"
     app.counter = 24
     app.quantity = 24
-    logic.check_restart()
+    logic.check_restart(app.current_USN)
     app.update_text_widget.assert_called_with(
         app.error_text,
         f"Error: HDD Quantity and Validators Quantity don't match for {app.current_USN}",
@@ -262,7 +499,7 @@ def test_check_restart_mismatch(logic, app, patch_dependencies):
     patch_dependencies["validate_hdd"].return_value = "48"
     app.counter = 24
     app.quantity = 24
-    logic.check_restart()
+    logic.check_restart(app.current_USN)
     app.update_text_widget.assert_called_with(
         app.error_text,
         f"HDD Quantity Mismatch for {current_SN}: Expected 24, Got 48",
@@ -282,7 +519,7 @@ def test_check_restart_complete_failure(logic, app, patch_dependencies):
     app.robot_number = 3
     patch_dependencies["send_complete"].return_value = "ERROR"
     patch_dependencies["validate_hdd"].return_value = "72"
-    logic.check_restart()
+    logic.check_restart(app.current_USN)
     app.update_text_widget.assert_called_with(
         app.error_text,
         f"Complete Failed for {current_SN}: ERROR",
@@ -299,12 +536,22 @@ def test_check_restart_normal_robot(logic, app, patch_dependencies):
     app.current_USN = current_SN
     patch_dependencies["validate_hdd"].return_value = "24"
     app.counter = 24
-    logic.check_restart()
+    logic.check_restart(app.current_USN)
     assert app.counter == 0
     assert app.old_USN == current_SN
     assert app.current_USN is None
 
 
+def test_check_restart_clears_csn_index(logic, app, patch_dependencies, csn_index):
+    """Test check_restart forgets the CSNs of the finished USN."""
+    app.current_USN = "WTRCURRENT123"
+    csn_index.add("WTRCURRENT123", "SERIAL123")
+    patch_dependencies["validate_hdd"].return_value = "24"
+    app.counter = 24
+    logic.check_restart(app.current_USN)
+    assert not csn_index.contains("WTRCURRENT123", "SERIAL123")
+
+
 def test_check_restart_robot_3(logic, app, patch_dependencies):
     """Test check_restart logic when robot number is 3."""
     current_SN = "WTRCURRENT123"
@@ -314,7 +561,7 @@ def test_check_restart_robot_3(logic, app, patch_dependencies):
     app.robot_number = 3
     patch_dependencies["send_complete"].return_value = "OK"
     patch_dependencies["validate_hdd"].return_value = "72"
-    logic.check_restart()
+    logic.check_restart(app.current_USN)
     app.update_text_widget.assert_called_with(
         app.response_text,
         f"Complete Response for {current_SN}: OK",
@@ -326,3 +573,202 @@ def test_check_restart_robot_3(logic, app, patch_dependencies):
     assert app.counter == 0
     assert app.old_USN == current_SN
     assert app.current_USN is None
+
+
+def test_check_restart_queues_complete_with_backlog(
+    logic, app, patch_dependencies, journal
+):
+    """Test check_restart defers the validation while uploads are queued."""
+    app.current_USN = "WTR123"
+    app.robot_number = 3
+    journal.record("WTR123", "upload", {"usn": "WTR123"}, state=PENDING)
+    app.counter = app.quantity
+    logic.check_restart(app.current_USN)
+    patch_dependencies["validate_hdd"].assert_not_called()
+    (intent,) = [i for i in journal.pending(10) if i.operation == "complete"]
+    assert intent.payload["send_complete"] is True
+    assert intent.payload["goal_qty"] == "72"
+    assert app.counter == 0
+    assert app.current_USN is None
+
+
+@pytest.mark.parametrize(
+    "robot_number, validate, complete",
+    [(1, "TIMEOUT", None), (3, "72", "TIMEOUT"), (3, CIRCUIT_OPEN, None)],
+)
+def test_check_restart_queues_complete_when_sfcs_goes_away(
+    logic, app, patch_dependencies, journal, robot_number, validate, complete
+):
+    """Test a transient validation or complete is queued and the USN restarted."""
+    patch_dependencies["upload_USN_item_with_barcode_validation"].return_value = "OK"
+    patch_dependencies["validate_hdd"].return_value = validate
+    patch_dependencies["send_complete"].return_value = complete
+    app.robot_number = robot_number
+    app.current_USN = "WTR123"
+    app.counter = app.quantity - 1
+    logic.process_serial("SERIAL123", app.current_USN)
+    assert intent_states(journal) == [("upload", DONE), ("complete", PENDING)]
+    assert app.current_USN is None
+    assert app.old_USN == "WTR123"
+    patch_dependencies["send_signal"].assert_not_called()
+
+
+def test_check_restart_without_journal_sends_NG_on_timeout(
+    logic, app, patch_dependencies, mocker
+):
+    """Test a transient validation is an NG when it cannot be queued."""
+    mocker.patch("src.backend.logic.journal", Journal())
+    patch_dependencies["validate_hdd"].return_value = "TIMEOUT"
+    app.current_USN = "WTR123"
+    app.counter = app.quantity
+    logic.check_restart(app.current_USN)
+    assert app.current_USN == "WTR123"
+    patch_dependencies["send_signal"].assert_called_with(
+        app.robot_number, app.line, False
+    )
+
+
+# Test the coroutines of the async engine.
+
+
+@pytest.fixture
+def async_dependencies(mocker):
+    return {
+        # The async client is only imported with ASYNC_ENGINE set.
+        name: mocker.patch(
+            f"src.backend.logic.{name}_async", new=mocker.AsyncMock(), create=True
+        )
+        for name in (
+            "check_route",
+            "send_complete",
+            "upload_USN_item_with_barcode_validation",
+            "validate_hdd",
+        )
+    }
+
+
+@pytest.fixture
+def engine(mocker):
+    engine = mocker.patch("src.backend.logic.engine")
+    # Run the writes of the coroutines in place of the writer thread.
+    engine.run_blocking = mocker.AsyncMock(
+        side_effect=lambda function, *args: function(*args)
+    )
+    engine.pending.return_value = 0
+    return engine
+
+
+def test_dispatch_submits_to_the_engine(logic, app, engine, mock_submit):
+    """Test handle_serials_submit hands the coroutine to the async engine."""
+    logic.handle_serials_submit()
+    mock_submit.assert_not_called()
+    engine.submit.assert_called_once_with(
+        ("WS1", None), logic.process_check_route_async, "WTR1234567"
+    )
+
+
+def test_process_check_route_async_success(logic, app, async_dependencies):
+    """Test process_check_route_async when check route is successful."""
+    async_dependencies["check_route"].return_value = "OK"
+    asyncio.run(logic.process_check_route_async("WTR1234567"))
+    assert app.current_USN == "WTR1234567"
+
+
+def test_process_serial_async_completes_the_usn(
+    logic, app, patch_dependencies, async_dependencies, engine, journal
+):
+    """Test process_serial_async uploads, validates and completes the last CSN."""
+    app.current_USN = "WTRCURRENT123"
+    app.counter = 71
+    app.quantity = 72
+    app.robot_number = 3
+    async_dependencies["upload_USN_item_with_barcode_validation"].return_value = "OK"
+    async_dependencies["validate_hdd"].return_value = "72"
+    async_dependencies["send_complete"].return_value = "OK"
+    asyncio.run(logic.process_serial_async("SERIAL123", app.current_USN))
+    async_dependencies["send_complete"].assert_awaited_once_with(
+        "WTRCURRENT123", app.line, app.workstation, app.employee_id
+    )
+    patch_dependencies["upload_USN_item_with_barcode_validation"].assert_not_called()
+    assert app.counter == 0
+    assert app.old_USN == "WTRCURRENT123"
+    # The journal writes were handed to the writer thread.
+    called = [call.args[0] for call in engine.run_blocking.call_args_list]
+    assert called == [
+        logic.accept_upload,
+        logic.journal_upload,
+        logic.handle_upload_response,
+        logic.queue_complete,
+        logic.restart,
+    ]
+    assert intent_states(journal) == [("upload", DONE)]
+
+
+def test_process_serial_async_retry_is_scheduled_on_the_engine(
+    logic, app, engine, async_dependencies
+):
+    """Test process_serial_async waits for a retry on the loop, not a worker."""
+    app.current_USN = "WTRCURRENT123"
+    async_dependencies["upload_USN_item_with_barcode_validation"].return_value = (
+        "unique constraint"
+    )
+    asyncio.run(logic.process_serial_async("SERIAL123", app.current_USN))
+    delay, key, task, serial, usn, attempt, _ = engine.call_later.call_args.args
+    assert key == ("WS1", "WTRCURRENT123")
+    assert (task, serial, usn, attempt) == (
+        logic.process_serial_async,
+        "SERIAL123",
+        "WTRCURRENT123",
+        2,
+    )
+    assert app.counter == 0
+
+
+def test_check_restart_async_queues_complete_on_timeout(
+    logic, app, engine, async_dependencies, journal
+):
+    """Test check_restart_async queues a complete that timed out."""
+    app.current_USN = "WTRCURRENT123"
+    app.counter = app.quantity
+    app.robot_number = 3
+    async_dependencies["validate_hdd"].return_value = "72"
+    async_dependencies["send_complete"].return_value = "TIMEOUT"
+    asyncio.run(logic.check_restart_async(app.current_USN))
+    assert intent_states(journal) == [("complete", PENDING)]
+    assert app.current_USN is None
+
+
+# Test the journal flush handlers.
+
+
+def test_flush_complete_sends_complete(patch_dependencies):
+    """Test flush_complete validates the quantity and sends the complete."""
+    patch_dependencies["validate_hdd"].return_value = "24"
+    patch_dependencies["send_complete"].return_value = "OK"
+    payload = {
+        "usn": "WTR123",
+        "goal_qty": "24",
+        "send_complete": True,
+        "line": "line1",
+        "station": "WS1",
+        "username": "EMP1",
+    }
+    assert flush_complete(payload) == "OK"
+    patch_dependencies["send_complete"].assert_called_once_with(
+        "WTR123", "line1", "WS1", "EMP1"
+    )
+
+
+def test_flush_complete_mismatch(patch_dependencies):
+    """Test flush_complete reports a quantity mismatch without completing."""
+    patch_dependencies["validate_hdd"].return_value = "20"
+    payload = {"usn": "WTR123", "goal_qty": "24", "send_complete": True}
+    assert flush_complete(payload) == "HDD Quantity Mismatch: Expected 24, Got 20"
+    patch_dependencies["send_complete"].assert_not_called()
+
+
+def test_flush_complete_transient(patch_dependencies):
+    """Test flush_complete hands a timeout back to the flusher."""
+    patch_dependencies["validate_hdd"].return_value = "TIMEOUT"
+    payload = {"usn": "WTR123", "goal_qty": "24", "send_complete": False}
+    assert flush_complete(payload) == "TIMEOUT"
@@ -0,0 +1,56 @@
+import pytest
+
+from src.backend.prewarm import FAILED, READY, Prewarm
+from src.plc.communication import get_plc_ip
+
+
+@pytest.fixture
+def users(tmp_path):
+    path = tmp_path / "users.txt"
+    path.write_text("E12345\nE67890\n")
+    return str(path)
+
+
+@pytest.fixture
+def open_connections(mocker):
+    mocker.patch("backend.logic.engine", None)
+    return mocker.patch("sfcs.sfcs_lib.open_connections")
+
+
+@pytest.fixture
+def session_manager(mocker):
+    return mocker.patch("plc.session.get_session_manager").return_value
+
+
+def test_prewarm_opens_the_first_scan_connections(
+    users, open_connections, session_manager
+):
+    prewarm = Prewarm("3L3", users_path=users, connections=2)
+    updates = []
+    prewarm.add_listener(updates.append)
+    prewarm.start()
+    assert prewarm.wait(5)
+    assert prewarm.ready
+    assert prewarm.users == {"E12345", "E67890"}
+    open_connections.assert_called_once_with(2)
+    session_manager.get.assert_called_once_with(get_plc_ip("3L3"))
+    session_manager.get.return_value.connect.assert_called_once_with()
+    assert len(updates) == 3
+    assert updates[-1] == dict.fromkeys(Prewarm.STEPS, READY)
+
+
+def test_failed_step_does_not_stop_the_others(users, open_connections, session_manager):
+    session_manager.get.return_value.connect.side_effect = OSError("unreachable")
+    prewarm = Prewarm("3L6", users_path=users)
+    prewarm.start()
+    assert prewarm.wait(5)
+    assert not prewarm.ready
+    assert prewarm.states() == {"users": READY, "sfcs": READY, "plc": FAILED}
+
+
+def test_no_connections_skips_sfcs(users, open_connections, session_manager):
+    prewarm = Prewarm("3L6", users_path=users, connections=0)
+    prewarm.start()
+    assert prewarm.wait(5)
+    assert prewarm.ready
+    open_connections.assert_not_called()
@@ -0,0 +1,85 @@
+import time
+import threading
+import pytest
+from src.backend.retry import RetryPolicy, RetryScheduler
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(3, 1.0, max_delay=3.0, multiplier=2.0, jitter=0)
+    assert [policy.delay(attempt) for attempt in (1, 2, 3)] == [1.0, 2.0, 3.0]
+    assert policy.should_retry(2)
+    assert not policy.should_retry(3)
+
+
+def test_retry_policy_jitter():
+    policy = RetryPolicy(3, 1.0, jitter=0.5)
+    delays = [policy.delay(1) for _ in range(50)]
+    assert all(0.5 <= delay <= 1.5 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.fixture
+def scheduler():
+    # Run the submitted tasks inline, as a dispatcher worker would.
+    submitted = []
+
+    def submit(key, task, *args):
+        submitted.append(key)
+        task(*args)
+
+    scheduler = RetryScheduler(submit)
+    scheduler.submitted = submitted
+    yield scheduler
+    scheduler.stop()
+
+
+def test_retries_run_after_their_delay(scheduler):
+    done = threading.Event()
+    start = time.monotonic()
+    scheduler.retry("WTR1", 0.05, done.set)
+    assert scheduler.stats()["scheduled"] == 1
+    assert done.wait(2)
+    assert time.monotonic() - start >= 0.045
+    assert scheduler.submitted == ["WTR1"]
+
+
+def test_retries_run_in_deadline_order(scheduler):
+    results = []
+    done = threading.Event()
+    scheduler.retry("WTR1", 0.04, lambda: (results.append("late"), done.set()))
+    scheduler.retry("WTR1", 0.01, results.append, "early")
+    assert done.wait(2)
+    assert results == ["early", "late"]
+
+
+def test_in_flight_retries_are_counted(scheduler):
+    running = threading.Event()
+    release = threading.Event()
+
+    def task():
+        running.set()
+        release.wait(2)
+
+    scheduler.retry("WTR1", 0, task)
+    assert running.wait(2)
+    assert scheduler.stats()["in_flight"] == 1
+    release.set()
+    time.sleep(0.02)
+    assert scheduler.stats() == {"scheduled": 0, "in_flight": 0, "total": 1}
+
+
+def test_retries_are_pending_until_they_start(scheduler):
+    seen = []
+    done = threading.Event()
+
+    def task():
+        # The retry that runs is no longer pending for its key.
+        seen.append(scheduler.pending("WTR1"))
+        done.set()
+
+    scheduler.retry("WTR1", 0.05, task)
+    assert scheduler.pending("WTR1") == 1
+    assert scheduler.pending("WTR2") == 0
+    assert done.wait(2)
+    assert seen == [0]
+    assert scheduler.pending("WTR1") == 0
@@ -0,0 +1,102 @@
+import tkinter as tk
+
+import pytest
+
+from src.gui.interface import PLCAutoScanningInterface
+
+
+@pytest.fixture
+def interface(mocker):
+    interface = PLCAutoScanningInterface()
+    interface.root = mocker.Mock()
+    interface.root.winfo_children.return_value = []
+    interface.ui = mocker.Mock()
+    interface.serials_entry = mocker.Mock()
+    interface.sfcs_status_label = mocker.Mock()
+    interface.error_text = mocker.Mock()
+    return interface
+
+
+def test_after_dialog_shown_polls_until_the_dialog_is_up(interface, mocker):
+    callback = mocker.Mock()
+    interface.after_dialog_shown(callback)
+    callback.assert_not_called()
+    delay, poll = interface.root.after.call_args.args
+    assert delay == 10
+
+    dialog = mocker.Mock(spec=tk.Toplevel)
+    dialog.winfo_viewable.return_value = True
+    interface.root.winfo_children.return_value = [dialog]
+    poll()
+    callback.assert_called_once_with()
+
+
+def test_after_dialog_shown_gives_up_after_the_deadline(interface, mocker):
+    callback = mocker.Mock()
+    interface.after_dialog_shown(callback, deadline=0)
+    interface.root.after.assert_not_called()
+    callback.assert_called_once_with()
+
+
+def test_after_dialog_shown_stops_once_the_backend_started(interface, mocker):
+    callback = mocker.Mock()
+    interface.backend_thread = mocker.Mock()
+    interface.after_dialog_shown(callback)
+    interface.root.after.assert_not_called()
+    callback.assert_called_once_with()
+
+
+def test_after_dialog_shown_stops_when_the_window_is_closed(interface, mocker):
+    callback = mocker.Mock()
+    interface.root.winfo_children.side_effect = tk.TclError("destroyed")
+    interface.after_dialog_shown(callback)
+    interface.root.after.assert_not_called()
+    callback.assert_not_called()
+
+
+@pytest.fixture
+def backend(mocker):
+    # The interface imports the backend on its thread, without the src prefix.
+    return {
+        "logic": mocker.patch("backend.logic.PLCAutoScanningLogic"),
+        "journal": mocker.patch("backend.logic.journal"),
+        "journal_flusher": mocker.patch("backend.logic.journal_flusher"),
+        "metrics": mocker.patch("helpers.metrics.start_metrics_server"),
+        "breaker": mocker.patch("sfcs.breaker.get_breaker"),
+    }
+
+
+def test_start_backend_loads_on_a_thread_and_enables_scans(interface, backend):
+    interface.quantity = 24
+    interface.start_backend()
+    interface.start_backend()
+    interface.backend_thread.join(5)
+    assert interface.backend_thread.name == "Backend"
+    assert interface.logic is backend["logic"].return_value
+    backend["logic"].assert_called_once()
+    backend["journal"].open.assert_called_once_with()
+    interface.logic.start_tasks_workers.assert_called_once_with()
+    interface.ui.set_label.assert_any_call(interface.serials_entry, state="normal")
+
+
+def test_scans_wait_for_the_quantity(interface, backend):
+    interface.start_backend()
+    interface.backend_thread.join(5)
+    assert interface.logic is not None
+    states = [
+        call
+        for call in interface.ui.set_label.call_args_list
+        if call.args[0] is interface.serials_entry
+    ]
+    assert states == []
+
+
+def test_failed_backend_is_reported(interface, backend):
+    backend["journal"].open.side_effect = OSError("disk full")
+    interface.quantity = 24
+    interface.start_backend()
+    interface.backend_thread.join(5)
+    assert interface.logic is None
+    interface.ui.append.assert_called_once_with(
+        interface.error_text, "The backend failed to start: disk full", "red"
+    )
@@ -0,0 +1,55 @@
+import pytest
+
+from src.gui.log_view import LogView
+
+
+@pytest.fixture
+def widget(mocker):
+    return mocker.Mock()
+
+
+def test_append_tags_only_the_new_line(widget):
+    view = LogView(widget)
+    assert view.empty
+    view.append("first", "green")
+    view.append("second")
+    widget.insert.assert_any_call("end", "first", ("color-green",))
+    widget.insert.assert_called_with("end", "\nsecond")
+    widget.tag_add.assert_not_called()
+    widget.get.assert_not_called()
+    assert view.lines == 2
+
+
+def test_colour_tags_are_configured_once(widget):
+    view = LogView(widget)
+    view.append("first", "red")
+    view.append("second", "red")
+    view.append("third", "orange")
+    assert widget.tag_config.call_count == 2
+
+
+def test_oldest_lines_are_trimmed(widget):
+    view = LogView(widget, max_lines=3)
+    for index in range(3):
+        view.append(f"line {index}")
+    widget.delete.assert_not_called()
+    view.append("line 3")
+    widget.delete.assert_called_once_with("1.0", "2.0")
+    assert view.lines == 3
+
+
+def test_append_many_trims_in_one_delete(widget):
+    view = LogView(widget, max_lines=3)
+    view.append_many([(f"line {index}", None) for index in range(3)])
+    view.append_many([("line 3", None), ("line 4", "red")])
+    widget.delete.assert_called_once_with("1.0", "3.0")
+    assert view.lines == 3
+
+
+def test_clear(widget):
+    view = LogView(widget)
+    view.append("first")
+    view.clear()
+    assert view.empty
+    view.append("second")
+    widget.insert.assert_called_with("end", "second")
@@ -0,0 +1,56 @@
+import pytest
+
+from src.gui.dispatcher import UIDispatcher
+
+
+@pytest.fixture
+def ui():
+    return UIDispatcher(frame_rate=50)
+
+
+def test_label_updates_are_merged(ui, mocker):
+    label = mocker.Mock()
+    ui.set_label(label, text="Quantity: 1/24")
+    ui.set_label(label, text="Quantity: 2/24", bg="green")
+    ui.drain()
+    label.config.assert_called_once_with(text="Quantity: 2/24", bg="green")
+    assert ui.stats()["merged"] == 1
+
+
+def test_appends_are_batched_per_view(ui, mocker):
+    view = mocker.Mock()
+    ui.append(view, "first", "green")
+    ui.append(view, "second")
+    ui.drain()
+    view.append_many.assert_called_once_with([("first", "green"), ("second", None)])
+    view.clear.assert_not_called()
+
+
+def test_clear_drops_superseded_appends(ui, mocker):
+    view = mocker.Mock()
+    ui.append(view, "old")
+    ui.clear(view)
+    ui.append(view, "new")
+    ui.drain()
+    view.clear.assert_called_once_with()
+    view.append_many.assert_called_once_with([("new", None)])
+    assert ui.stats()["dropped"] == 1
+
+
+def test_drain_empties_the_queue(ui, mocker):
+    label = mocker.Mock()
+    ui.set_label(label, text="Backlog: 1")
+    ui.drain()
+    ui.drain()
+    assert label.config.call_count == 1
+    assert ui.stats()["frames"] == 1
+    assert ui.stats()["pending"] == 0
+
+
+def test_start_schedules_the_frame_loop(ui, mocker):
+    root = mocker.Mock()
+    ui.start(root)
+    ui.start(root)
+    root.after.assert_called_once_with(20, ui._tick)
+    ui._tick()
+    assert root.after.call_count == 2
@@ -0,0 +1,112 @@
+import io
+import json
+import socket
+
+import pytest
+
+from helpers.tracing import Tracer
+from src.headless.runtime import (
+    HeadlessRuntime,
+    JsonLinesSink,
+    StationState,
+    serve,
+)
+
+
+@pytest.fixture
+def stream():
+    return io.StringIO()
+
+
+@pytest.fixture
+def state(stream):
+    return StationState(JsonLinesSink(stream), "3L06B1AO17", "EMP1", 1, 24)
+
+
+def events(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_sink_writes_json_lines(stream):
+    sink = JsonLinesSink(stream)
+    sink.emit("backlog", backlog=3)
+    (event,) = events(stream)
+    assert event["event"] == "backlog"
+    assert event["backlog"] == 3
+    assert "time" in event
+
+
+def test_sink_drops_closed_streams(stream):
+    closed = io.StringIO()
+    closed.close()
+    sink = JsonLinesSink(closed, stream)
+    sink.emit("sfcs", state="open")
+    sink.emit("sfcs", state="closed")
+    assert [event["state"] for event in events(stream)] == ["open", "closed"]
+    assert sink._streams == [stream]
+
+
+def test_state_reads_the_line_from_the_workstation(state):
+    assert state.line == "3L6"
+    assert state.serial_numbers.get() == ""
+
+
+def test_state_emits_the_interface_updates(state, stream):
+    state.update_text_widget(
+        state.response_text, "Upload Response for ZA1: OK", "green"
+    )
+    state.update_text_widget(state.error_text, "Retrying for ZA2", "orange")
+    state.update_text_widget(state.response_text, "USN: WTR1")
+    state.update_labels(state.quantity_label, "Quantity", "1/24")
+    state.clean_text_widget(state.error_text)
+    assert [
+        (event["event"], event.get("result"), event.get("value"))
+        for event in events(stream)
+    ] == [
+        ("message", "pass", None),
+        ("message", "pending", None),
+        ("message", "info", None),
+        ("label", None, "1/24"),
+        ("clear", None, None),
+    ]
+
+
+def test_submit_hands_one_scan_at_a_time_to_the_logic(state, mocker):
+    logic = mocker.Mock()
+    scans = []
+    logic.handle_serials_submit.side_effect = lambda: scans.append(
+        state.serial_numbers.get()
+    )
+    runtime = HeadlessRuntime(state, logic=logic)
+    runtime.read(io.StringIO("WTR1\n\n  ZA1 \n"))
+    assert scans == ["WTR1", "ZA1"]
+    assert state.serial_numbers.get() == ""
+
+
+def test_runtime_reuses_the_logic(state, stream, mocker):
+    mocker.patch("backend.logic.check_route", return_value="OK")
+    mocker.patch("helpers.tracing._tracer", Tracer())
+    runtime = HeadlessRuntime(state)
+    runtime.logic.process_check_route("WTR1")
+    assert state.current_USN == "WTR1"
+    labels = [(e["label"], e["value"]) for e in events(stream) if e["event"] == "label"]
+    assert ("usn", "WTR1") in labels
+
+
+def test_serve_reads_scans_and_writes_events(state, mocker):
+    logic = mocker.Mock()
+    logic.handle_serials_submit.side_effect = lambda: state.update_text_widget(
+        state.response_text, f"Scanned {state.serial_numbers.get()}", "green"
+    )
+    server = serve(HeadlessRuntime(state, logic=logic), "127.0.0.1:0")
+    try:
+        client = socket.create_connection(server.server_address, timeout=5)
+        with client, client.makefile("rw", encoding="utf8") as f:
+            f.write("ZA1\n")
+            f.flush()
+            event = json.loads(f.readline())
+        assert event["message"] == "Scanned ZA1"
+        assert event["result"] == "pass"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,114 @@
+import io
+import json
+
+import pytest
+
+from src.backend.journal import Intent
+from src.headless.server import StationServer, load_stations
+from headless.runtime import JsonLinesSink
+
+
+@pytest.fixture
+def stream():
+    return io.StringIO()
+
+
+@pytest.fixture
+def server(stream):
+    server = StationServer(JsonLinesSink(stream))
+    server.add_session("3L06B1AO17", "EMP1", 1, 24, "127.0.0.1:0")
+    server.add_session("3L03B1AO05", "EMP2", 2, 12, "127.0.0.1:0")
+    return server
+
+
+def events(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def session_stream(server, workstation):
+    stream = io.StringIO()
+    server.sessions[workstation][0].state.sink.attach(stream)
+    return stream
+
+
+def test_load_stations(tmp_path):
+    path = tmp_path / "stations.json"
+    station = {
+        "workstation": "3L06B1AO17",
+        "employee_id": "EMP1",
+        "robot_number": 1,
+        "quantity": 24,
+        "listen": "127.0.0.1:9017",
+    }
+    path.write_text(json.dumps([station]))
+    assert load_stations(str(path)) == [station]
+
+    del station["listen"]
+    path.write_text(json.dumps([station]))
+    with pytest.raises(ValueError, match="missing listen"):
+        load_stations(str(path))
+
+
+def test_workstations_are_hosted_once(server):
+    with pytest.raises(ValueError):
+        server.add_session("3L06B1AO17", "EMP3", 3, 24, "127.0.0.1:0")
+
+
+def test_sessions_keep_their_own_state(server):
+    first = server.sessions["3L06B1AO17"][0].state
+    second = server.sessions["3L03B1AO05"][0].state
+    first.current_USN = "WTR1"
+    assert second.current_USN is None
+    assert (first.line, second.line) == ("3L6", "3L3")
+    assert (first.quantity, second.quantity) == (24, 12)
+
+
+def test_session_events_name_the_workstation(server, stream):
+    state = server.sessions["3L03B1AO05"][0].state
+    own = session_stream(server, "3L03B1AO05")
+    state.update_text_widget(
+        state.response_text, "Upload Response for ZA1: OK", "green"
+    )
+    (event,) = events(stream)
+    assert event["workstation"] == "3L03B1AO05"
+    assert event["result"] == "pass"
+    assert events(own)[0]["message"] == event["message"]
+
+
+def test_shared_updates_are_reported_once(server, stream):
+    own = session_stream(server, "3L06B1AO17")
+    server.update_sfcs_status("open")
+    server.update_backlog(2)
+    assert [event["event"] for event in events(stream)] == ["sfcs", "backlog"]
+    assert [event["event"] for event in events(own)] == ["sfcs", "backlog"]
+
+
+def test_flush_failures_go_to_their_workstation(server, stream):
+    own = session_stream(server, "3L03B1AO05")
+    upload = Intent(1, "WTR1", "upload", {"workstation": "3L03B1AO05"}, 3)
+    complete = Intent(2, "WTR2", "complete", {"station": "3L99B1AO01"}, 3)
+    server.report_flush_failure(upload, "Error")
+    server.report_flush_failure(complete, "Error")
+    assert [event["message"] for event in events(own)] == [
+        "Queued upload failed for WTR1: Error"
+    ]
+    assert [event.get("workstation") for event in events(stream)] == [
+        "3L03B1AO05",
+        None,
+    ]
+
+
+def test_start_shares_the_worker_pool(server, mocker):
+    mocker.patch("src.headless.server.journal")
+    mocker.patch("src.headless.server.journal_flusher")
+    mocker.patch("src.headless.server.get_breaker")
+    serve = mocker.patch("src.headless.server.serve")
+    runs = [
+        mocker.patch.object(runtime, "run") for runtime, _ in server.sessions.values()
+    ]
+    server.start(number_of_workers=6)
+    assert serve.call_count == 2
+    for run in runs:
+        run.assert_called_once_with(6)
+    server.stop()
+    serve.return_value.shutdown.assert_called_with()
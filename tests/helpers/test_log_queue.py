@@ -0,0 +1,66 @@
+import logging
+from logging.handlers import QueueHandler
+
+from src.helpers.log_queue import (
+    StructuredFormatter,
+    detach_handlers,
+    start_queue_logging,
+    stop_queue_logging,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_record(**extra):
+    record = logging.LogRecord(
+        "App", logging.INFO, __file__, 1, "Upload Response for %s: %s", None, None
+    )
+    record.args = ("CSN1", "OK")
+    record.__dict__.update(extra)
+    return record
+
+
+def test_formatter_appends_structured_fields():
+    formatter = StructuredFormatter("%(message)s")
+    record = make_record(usn="WTR1", csn="CSN1", latency=12.5, result="OK")
+    assert formatter.format(record) == (
+        "Upload Response for CSN1: OK [usn=WTR1 csn=CSN1 latency=12.5 result=OK]"
+    )
+
+
+def test_formatter_without_fields():
+    formatter = StructuredFormatter("%(message)s")
+    assert formatter.format(make_record()) == "Upload Response for CSN1: OK"
+
+
+def test_handlers_run_behind_the_queue():
+    logger = logging.getLogger("tests.log_queue")
+    logger.propagate = False
+    handler = ListHandler()
+    logger.addHandler(handler)
+
+    listener = start_queue_logging(logger)
+    assert [type(h) for h in logger.handlers] == [QueueHandler]
+    logger.warning("Upload Response for %s", "CSN1", extra={"usn": "WTR1"})
+    stop_queue_logging(listener)
+    stop_queue_logging(listener)
+
+    (record,) = handler.records
+    assert record.getMessage() == "Upload Response for CSN1"
+    assert record.usn == "WTR1"
+    logger.handlers.clear()
+
+
+def test_detach_handlers():
+    logger = logging.getLogger("tests.log_queue.library")
+    handler = logging.NullHandler()
+    logger.addHandler(handler)
+    assert detach_handlers("tests.log_queue.library") == [handler]
+    assert logger.handlers == []
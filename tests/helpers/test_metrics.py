@@ -0,0 +1,74 @@
+import socket
+import urllib.request
+
+import pytest
+
+from src.helpers.metrics import Registry, start_metrics_server
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+def test_counter_and_gauge(registry):
+    counter = registry.counter("scans_total", "Scans.", ["result"])
+    counter.inc(result="ok")
+    counter.inc(2, result="ok")
+    counter.inc(result="ng")
+    registry.gauge("queue_depth", "Depth.", function=lambda: 7)
+    assert counter.value(result="ok") == 3
+    assert registry.render() == (
+        "# HELP scans_total Scans.\n"
+        "# TYPE scans_total counter\n"
+        'scans_total{result="ng"} 1\n'
+        'scans_total{result="ok"} 3\n'
+        "# HELP queue_depth Depth.\n"
+        "# TYPE queue_depth gauge\n"
+        "queue_depth 7\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = registry.histogram(
+        "request_seconds", "Requests.", ["operation"], buckets=(0.1, 1.0)
+    )
+    histogram.observe(0.05, operation="upload")
+    histogram.observe(0.5, operation="upload")
+    histogram.observe(3.0, operation="upload")
+    lines = registry.render().splitlines()
+    assert 'request_seconds_bucket{operation="upload",le="0.1"} 1' in lines
+    assert 'request_seconds_bucket{operation="upload",le="1.0"} 2' in lines
+    assert 'request_seconds_bucket{operation="upload",le="+Inf"} 3' in lines
+    assert 'request_seconds_count{operation="upload"} 3' in lines
+    assert histogram.count(operation="upload") == 3
+
+
+def test_registry_returns_the_registered_metric(registry):
+    counter = registry.counter("scans_total", "Scans.")
+    assert registry.counter("scans_total", "Scans.") is counter
+    with pytest.raises(ValueError):
+        registry.gauge("scans_total", "Scans.")
+
+
+def test_label_values_are_escaped(registry):
+    registry.counter("errors_total", "Errors.", ["message"]).inc(message='a "b"\n')
+    assert 'errors_total{message="a \\"b\\"\\n"} 1' in registry.render()
+
+
+def test_metrics_server(registry):
+    assert start_metrics_server(0) is None
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    registry.counter("scans_total", "Scans.").inc()
+    server = start_metrics_server(port, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "scans_total 1" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
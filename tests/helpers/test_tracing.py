@@ -0,0 +1,104 @@
+import os
+import json
+import threading
+
+import pytest
+
+from src.backend.dispatcher import KeyedDispatcher
+
+# The application modules import helpers.tracing without the src prefix,
+# use the same module so the trace context variable is shared with them.
+from helpers.tracing import Tracer, current_trace, main, percentile, summarize
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "traces.jsonl")
+
+
+@pytest.fixture
+def tracer(path, mocker):
+    tracer = Tracer(path)
+    mocker.patch("helpers.tracing._tracer", tracer)
+    yield tracer
+    tracer.close()
+
+
+def read_spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_outside_a_trace_are_not_recorded(tracer, path):
+    with tracer.span("sfcs"):
+        pass
+    tracer.record("queue", 0.0)
+    tracer.close()
+    assert not os.path.exists(path)
+
+
+def test_trace_records_its_spans(tracer, path):
+    with tracer.trace("submit", serial="CSN1") as trace_id:
+        assert current_trace() == trace_id
+        with tracer.span("sfcs", operation="upload"):
+            pass
+    assert current_trace() is None
+    tracer.close()
+
+    sfcs, submit = read_spans(path)
+    assert sfcs["stage"] == "sfcs"
+    assert sfcs["operation"] == "upload"
+    assert submit["stage"] == "submit"
+    assert submit["serial"] == "CSN1"
+    assert sfcs["trace"] == submit["trace"] == trace_id
+    assert submit["duration_ms"] >= sfcs["duration_ms"] >= 0
+
+
+def test_disabled_tracer():
+    tracer = Tracer()
+    with tracer.trace("submit") as trace_id:
+        assert trace_id is None
+        assert current_trace() is None
+
+
+def test_trace_id_follows_the_task_to_the_worker(tracer, path):
+    dispatcher = KeyedDispatcher()
+    seen = []
+    done = threading.Event()
+
+    def task():
+        seen.append(current_trace())
+        done.set()
+
+    with tracer.trace("submit") as trace_id:
+        dispatcher.submit("key", task)
+    dispatcher.start(1)
+    assert done.wait(5)
+    assert seen == [trace_id]
+
+    tracer.close()
+    stages = {span["stage"]: span["trace"] for span in read_spans(path)}
+    assert stages == {"submit": trace_id, "queue": trace_id}
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+def test_main_prints_the_summary(path, capsys):
+    with open(path, "w") as f:
+        for duration in (1.0, 2.0, 3.0, 4.0):
+            f.write(json.dumps({"stage": "sfcs", "duration_ms": duration}) + "\n")
+        f.write('{"stage": "sf')
+    assert summarize([path])["sfcs"] == {
+        "count": 4,
+        "p50": 2.0,
+        "p95": 4.0,
+        "p99": 4.0,
+        "max": 4.0,
+    }
+    assert main([path]) == 0
+    assert "sfcs" in capsys.readouterr().out
@@ -0,0 +1,138 @@
+import time
+import threading
+import pytest
+from pycomm3 import Tag
+from src.plc.pulse import OFF, ON, PulseScheduler
+
+
+class RecordingSessions:
+    def __init__(self):
+        self.writes = []
+        self.requests = []
+        self.done = threading.Event()
+
+    def write_many(self, plc_ip, tags_values):
+        self.requests.append((plc_ip, list(tags_values)))
+        for tag, value in tags_values:
+            self.writes.append((plc_ip, tag, value, time.monotonic()))
+            if not value:
+                self.done.set()
+        return [Tag(tag, value, "BOOL", None) for tag, value in tags_values]
+
+
+@pytest.fixture
+def sessions():
+    return RecordingSessions()
+
+
+@pytest.fixture
+def scheduler(sessions):
+    scheduler = PulseScheduler(sessions=sessions, batch_window=0.02)
+    yield scheduler
+    scheduler.stop()
+
+
+def test_pulse_writes_on_then_off(scheduler, sessions):
+    scheduler.pulse("1.1.1.1", "OK_1", 0.05)
+    assert sessions.done.wait(2)
+    assert [w[:3] for w in sessions.writes] == [
+        ("1.1.1.1", "OK_1", True),
+        ("1.1.1.1", "OK_1", False),
+    ]
+    assert sessions.writes[1][3] - sessions.writes[0][3] >= 0.045
+    stats = scheduler.stats()
+    assert stats["pulses"] == 1
+    assert stats["width"]["count"] == 1
+    assert stats["jitter"]["count"] == 2
+
+
+def test_overlapping_pulses_are_merged(scheduler, sessions):
+    start = time.monotonic()
+    scheduler.pulse("1.1.1.1", "NG_1", 0.05)
+    time.sleep(0.02)
+    scheduler.pulse("1.1.1.1", "NG_1", 0.05)
+    assert sessions.done.wait(2)
+    time.sleep(0.05)
+    assert [w[2] for w in sessions.writes] == [True, False]
+    # The OFF write follows the second pulse, not the first one.
+    assert sessions.writes[1][3] - start >= 0.07
+    assert scheduler.stats()["merged"] == 1
+
+
+def test_pulses_use_one_writer_per_controller(scheduler, sessions):
+    before = threading.active_count()
+    pulses = [scheduler.pulse("1.1.1.1", f"OK_{robot}", 0.01) for robot in range(10)]
+    assert all(pulse.wait(2) for pulse in pulses)
+    assert threading.active_count() <= before + 2
+
+
+def test_unreachable_controller_does_not_delay_the_others(scheduler, sessions):
+    released = threading.Event()
+    write_many = sessions.write_many
+
+    def hanging_write_many(plc_ip, tags_values):
+        # The first controller hangs on the session open.
+        if plc_ip == "1.1.1.9":
+            released.wait(2)
+        return write_many(plc_ip, tags_values)
+
+    sessions.write_many = hanging_write_many
+    stuck = scheduler.pulse("1.1.1.9", "OK_1", 0.01)
+    pulse = scheduler.pulse("1.1.1.1", "OK_1", 0.01)
+    try:
+        assert pulse.wait(1)
+        assert not stuck.wait(0)
+    finally:
+        released.set()
+    assert stuck.wait(2)
+
+
+def test_stopped_scheduler_restarts_on_the_next_pulse(scheduler, sessions):
+    assert scheduler.pulse("1.1.1.1", "OK_1", 0.01).wait(2)
+    scheduler.stop()
+    assert scheduler.pulse("1.1.1.1", "OK_2", 0.01).wait(2)
+    assert [w[1:3] for w in sessions.writes][-2:] == [("OK_2", True), ("OK_2", False)]
+
+
+def test_send_signal_schedules_pulse(mocker):
+    from src.plc import communication
+
+    scheduler = mocker.patch("src.plc.communication.get_pulse_scheduler")
+    communication.send_signal(2, "3L3", False)
+    scheduler.return_value.pulse.assert_called_once_with(
+        communication.PLC_3L3, "NG_2", communication.PLC_DELAY
+    )
+
+
+def test_writes_to_same_controller_are_batched(scheduler, sessions):
+    first = scheduler.pulse("1.1.1.2", "OK_1", 0.05)
+    second = scheduler.pulse("1.1.1.2", "OK_2", 0.05)
+    assert first.wait(2) and second.wait(2)
+    assert sessions.requests == [
+        ("1.1.1.2", [("OK_1", True), ("OK_2", True)]),
+        ("1.1.1.2", [("OK_1", False), ("OK_2", False)]),
+    ]
+    assert first.results[ON].value is True
+    assert second.results[OFF].value is False
+    assert scheduler.stats()["batches"] == 2
+
+
+def test_on_and_off_of_a_tag_are_not_batched_together(scheduler):
+    first = scheduler.pulse("1.1.1.1", "OK_1", 0.01)
+    second = scheduler.pulse("1.1.1.2", "OK_1", 0.01)
+    due = [(0, ON, first), (0, ON, second), (0, OFF, first)]
+    groups = scheduler._group(due)
+    assert [(ip, len(events)) for ip, events in groups] == [
+        ("1.1.1.1", 1),
+        ("1.1.1.2", 1),
+        ("1.1.1.1", 1),
+    ]
+
+
+def test_failed_batch_is_reported_to_every_pulse(sessions):
+    sessions.write_many = lambda plc_ip, tags_values: 1 / 0
+    scheduler = PulseScheduler(sessions=sessions, batch_window=0.02)
+    pulse = scheduler.pulse("1.1.1.1", "NG_1", 0.01)
+    assert pulse.wait(2)
+    assert isinstance(pulse.results[ON], ZeroDivisionError)
+    scheduler.stop()
@@ -0,0 +1,74 @@
+import pytest
+from pycomm3.exceptions import CommError
+from src.plc.session import PLCSessionManager
+
+
+class FakeDriver:
+    instances = []
+
+    def __init__(self, plc_ip):
+        self.plc_ip = plc_ip
+        self.connected = False
+        self.writes = []
+        self.fail_next_write = False
+        FakeDriver.instances.append(self)
+
+    def open(self):
+        self.connected = True
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def write(self, *tags_values):
+        if self.fail_next_write:
+            self.fail_next_write = False
+            self.connected = False
+            raise CommError("connection reset")
+        self.writes.append(tags_values)
+        return "written"
+
+
+@pytest.fixture
+def manager():
+    FakeDriver.instances = []
+    return PLCSessionManager(driver_factory=FakeDriver)
+
+
+def test_session_is_reused_between_writes(manager):
+    manager.write("1.1.1.1", "OK_1", True)
+    manager.write("1.1.1.1", "OK_1", False)
+    assert len(FakeDriver.instances) == 1
+    assert FakeDriver.instances[0].writes == [("OK_1", True), ("OK_1", False)]
+    stats = manager.stats()["1.1.1.1"]
+    assert stats["connect"]["count"] == 1
+    assert stats["write"]["count"] == 2
+
+
+def test_one_session_per_controller(manager):
+    manager.write("1.1.1.1", "OK_1", True)
+    manager.write("1.1.1.2", "OK_1", True)
+    assert [d.plc_ip for d in FakeDriver.instances] == ["1.1.1.1", "1.1.1.2"]
+
+
+def test_session_reconnects_after_drop(manager):
+    manager.write("1.1.1.1", "OK_1", True)
+    FakeDriver.instances[0].fail_next_write = True
+    assert manager.write("1.1.1.1", "NG_1", True) == "written"
+    assert len(FakeDriver.instances) == 2
+    assert FakeDriver.instances[1].writes == [("NG_1", True)]
+
+
+def test_session_raises_when_reconnect_fails(manager, mocker):
+    session = manager.get("1.1.1.1")
+    driver = mocker.Mock(connected=True)
+    driver.write.side_effect = CommError("down")
+    mocker.patch.object(session, "_driver_factory", return_value=driver)
+    with pytest.raises(CommError):
+        session.write("OK_1", True)
+    assert driver.write.call_count == 2
+
+
+def test_write_many_returns_a_list(manager):
+    assert manager.write_many("1.1.1.1", [("OK_1", True)]) == ["written"]
+    assert FakeDriver.instances[0].writes == [(("OK_1", True),)]
@@ -0,0 +1,226 @@
+import time
+import asyncio
+
+import pytest
+
+from src.sfcs import aio
+from src.sfcs.aio import AsyncSOAPClient
+from src.sfcs.sfcs_lib import UNREACHABLE
+
+# Sample XML response content for the SOAP calls.
+sample_response_content = b"""<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+    <soap:Body>
+        <DynamicDBFunctionResponse xmlns="http://localhost/Tester.WebService/WebService">
+            <DynamicDBFunctionResult>OK</DynamicDBFunctionResult>
+        </DynamicDBFunctionResponse>
+    </soap:Body>
+</soap:Envelope>"""
+
+RESULT = "{http://localhost/Tester.WebService/WebService}DynamicDBFunctionResult"
+
+
+def content_length(body):
+    return b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+
+def chunked(body):
+    half = len(body) // 2
+    return (
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"%x\r\n%s\r\n%x\r\n%s\r\n0\r\n\r\n"
+        % (half, body[:half], len(body) - half, body[half:])
+    )
+
+
+async def start_server(respond, close_after=None):
+    """Answer every request with respond(), close after close_after requests."""
+
+    async def handle(reader, writer):
+        served = 0
+        try:
+            while close_after is None or served < close_after:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = next(
+                    int(line.split(b":")[1])
+                    for line in head.split(b"\r\n")
+                    if line.lower().startswith(b"content-length")
+                )
+                await reader.readexactly(length)
+                writer.write(await respond())
+                await writer.drain()
+                served += 1
+        except (asyncio.IncompleteReadError, asyncio.CancelledError):
+            # The client went away or the test is over.
+            pass
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+async def reply(body=b"<ok/>", encode=content_length):
+    return encode(body)
+
+
+def test_client_reuses_connections():
+    async def scenario():
+        server, address = await start_server(reply)
+        client = AsyncSOAPClient(address, pool_size=2, idle_timeout=60)
+        async with server:
+            results = [await client.post("test", b"<a/>", 5) for _ in range(5)]
+            client.close()
+        return results, client.stats.snapshot()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [(200, b"<ok/>")] * 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+
+
+def test_client_prewarm_opens_idle_connections():
+    async def scenario():
+        server, address = await start_server(reply)
+        client = AsyncSOAPClient(address)
+        async with server:
+            await client.prewarm(1, 5)
+            result = await client.post("test", b"<a/>", 5)
+            client.close()
+        return result, client.stats.snapshot()
+
+    result, stats = asyncio.run(scenario())
+    assert result == (200, b"<ok/>")
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 1
+
+
+def test_client_reads_chunked_bodies():
+    async def scenario():
+        server, address = await start_server(
+            lambda: reply(b"<chunked>body</chunked>", chunked)
+        )
+        client = AsyncSOAPClient(address)
+        async with server:
+            first = await client.post("test", b"<a/>", 5)
+            second = await client.post("test", b"<a/>", 5)
+            client.close()
+        return first, second
+
+    assert asyncio.run(scenario()) == ((200, b"<chunked>body</chunked>"),) * 2
+
+
+def test_client_replaces_closed_connections():
+    async def scenario():
+        server, address = await start_server(reply, close_after=1)
+        client = AsyncSOAPClient(address, stale_retries=1)
+        async with server:
+            results = [await client.post("test", b"<a/>", 5) for _ in range(3)]
+            client.close()
+        return results, client.stats.snapshot()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [(200, b"<ok/>")] * 3
+    assert stats["new_connections"] == 3
+
+
+def test_stale_retry_gets_the_time_left():
+    connections = []
+
+    async def handle(reader, writer):
+        # The reused connection dies late, the new one answers slowly.
+        first = not connections
+        connections.append(writer)
+        try:
+            for request in range(2 if first else 1):
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.lower().split(b"content-length:")[1].split()[0])
+                await reader.readexactly(length)
+                if first and not request:
+                    writer.write(content_length(b"<ok/>"))
+                    continue
+                await asyncio.sleep(0.15)
+                if not first:
+                    writer.write(content_length(b"<ok/>"))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        address = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        client = AsyncSOAPClient(address, stale_retries=1)
+        async with server:
+            await client.post("test", b"<a/>", 5)
+            started_at = time.monotonic()
+            with pytest.raises(asyncio.TimeoutError):
+                await client.post("test", b"<a/>", 0.2)
+            elapsed = time.monotonic() - started_at
+            client.close()
+        return elapsed, client.stats.snapshot()
+
+    elapsed, stats = asyncio.run(scenario())
+    assert stats["stale_retries"] == 1
+    assert elapsed < 0.28
+
+
+def test_client_timeout_is_not_retried():
+    async def slow():
+        await asyncio.sleep(1)
+        return content_length(b"<ok/>")
+
+    async def scenario():
+        server, address = await start_server(slow)
+        client = AsyncSOAPClient(address, stale_retries=3)
+        async with server:
+            with pytest.raises(asyncio.TimeoutError):
+                await client.post("test", b"<a/>", 0.1)
+        return client.stats.snapshot()
+
+    assert asyncio.run(scenario())["requests"] == 1
+
+
+@pytest.fixture
+def client(mocker):
+    mocker.patch("src.sfcs.aio.get_breaker")
+    return mocker.patch("src.sfcs.aio.get_async_client").return_value
+
+
+@pytest.mark.parametrize(
+    "post, expected",
+    [
+        ((200, sample_response_content), "OK"),
+        ((500, b"Internal Server Error"), None),
+        ((200, b"not xml"), None),
+        (asyncio.TimeoutError(), "TIMEOUT"),
+        (ConnectionResetError(), UNREACHABLE),
+    ],
+)
+def test_post_request_async(client, mocker, post, expected):
+    client.post = mocker.AsyncMock(
+        **{"side_effect" if isinstance(post, Exception) else "return_value": post}
+    )
+    result = asyncio.run(aio.post_request_async(b"<a/>", "test", result=RESULT))
+    assert result == expected
+
+
+def test_concurrent_lookups_share_one_request(mocker):
+    aio.route_cache.invalidate()
+    calls = []
+
+    async def post_request_async(body, endpoint, **kwargs):
+        calls.append(body)
+        await asyncio.sleep(0.05)
+        return "OK"
+
+    mocker.patch("src.sfcs.aio.post_request_async", post_request_async)
+
+    async def scenario():
+        first = await asyncio.gather(*(aio.check_route_async("WTR1") for _ in range(5)))
+        return first, await aio.check_route_async("WTR1")
+
+    first, cached = asyncio.run(scenario())
+    aio.route_cache.invalidate()
+    assert first == ["OK"] * 5
+    assert cached == "OK"
+    assert len(calls) == 1
@@ -0,0 +1,70 @@
+import pytest
+from src.sfcs.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        failure_threshold=3, reset_timeout=10, half_open_probes=1, clock=clock
+    )
+
+
+def test_breaker_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_success()
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_half_open_probe_closes_on_success(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time.
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_half_open_probe_reopens_on_failure(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 15
+    assert not breaker.allow()
+
+
+def test_breaker_notifies_listeners(breaker, clock):
+    states = []
+    breaker.add_listener(states.append)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 10
+    breaker.allow()
+    breaker.record_success()
+    assert states == [OPEN, HALF_OPEN, CLOSED]
@@ -0,0 +1,104 @@
+import time
+import threading
+import pytest
+from src.sfcs.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_cache_hits_until_ttl_expires(clock):
+    cache = TTLCache(maxsize=4, ttl=5, clock=clock)
+    loader = iter(["first", "second"]).__next__
+    assert cache.get_or_load("WTR1", loader) == "first"
+    assert cache.get_or_load("WTR1", loader) == "first"
+    clock.now = 5
+    assert cache.get_or_load("WTR1", loader) == "second"
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2, "coalesced": 0}
+
+
+def test_cache_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=5, clock=clock)
+    cache.get_or_load("WTR1", lambda: 1)
+    cache.get_or_load("WTR2", lambda: 2)
+    cache.get_or_load("WTR1", lambda: None)
+    cache.get_or_load("WTR3", lambda: 3)
+    assert cache.get_or_load("WTR1", lambda: "reloaded") == 1
+    assert cache.get_or_load("WTR2", lambda: "reloaded") == "reloaded"
+
+
+def test_cache_skips_uncacheable_values(clock):
+    cache = TTLCache(maxsize=2, ttl=5, clock=clock)
+    cacheable = lambda value: value != "TIMEOUT"
+    assert cache.get_or_load("WTR1", lambda: "TIMEOUT", cacheable) == "TIMEOUT"
+    assert cache.get_or_load("WTR1", lambda: "OK", cacheable) == "OK"
+
+
+def test_cache_invalidation(clock):
+    cache = TTLCache(maxsize=4, ttl=5, clock=clock)
+    cache.get_or_load(("WTR1", "AO"), lambda: "OK")
+    cache.get_or_load(("WTR2", "AO"), lambda: "OK")
+    cache.invalidate(lambda key: key[0] == "WTR1")
+    assert cache.stats()["size"] == 1
+    assert cache.get_or_load(("WTR1", "AO"), lambda: "NG") == "NG"
+
+
+def test_concurrent_loads_are_coalesced():
+    cache = TTLCache(maxsize=4, ttl=5)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return "OK"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_load("WTR1", loader))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["OK"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    cache = TTLCache(maxsize=4, ttl=5)
+
+    def loader():
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get_or_load("WTR1", loader) == "stale"
+    assert cache.get_or_load("WTR1", lambda: "fresh") == "fresh"
+
+
+def test_put_skips_values_loaded_across_an_invalidation():
+    cache = TTLCache(maxsize=4, ttl=5)
+    assert cache.get("WTR1", "missing") == "missing"
+    generation = cache.generation
+    cache.invalidate()
+    cache.put("WTR1", "stale", generation)
+    assert cache.get("WTR1") is None
+    cache.put("WTR1", "fresh", cache.generation)
+    assert cache.get("WTR1") == "fresh"
+    assert cache.stats()["hits"] == 1
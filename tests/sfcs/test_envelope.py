@@ -0,0 +1,43 @@
+from xml.etree.ElementTree import fromstring
+from src.sfcs import sfcs_lib
+from src.sfcs.envelope import SOAPEnvelope
+
+
+def test_envelope_matches_generate_soap_body():
+    query = """
+        <CheckRoute xmlns="http://localhost/Tester.WebService/WebService">
+            <UnitSerialNumber>{usn}</UnitSerialNumber>
+            <StageCode>{stage}</StageCode>
+        </CheckRoute>
+    """
+    body = SOAPEnvelope(query).build(usn="12345", stage="AO")
+    expected = sfcs_lib.generate_soap_body(query, usn="12345", stage="AO")
+    assert isinstance(body, bytes)
+    assert body.decode("utf-8").replace("><", "> <").split() == expected.split()
+
+
+def test_envelope_has_no_whitespace_between_tags():
+    body = sfcs_lib.COMPLETE.build(
+        serial_number="WTR1", line="3L6", stage="AO", station="WS1", username="E1"
+    )
+    assert b">\n" not in body
+    assert b"> <" not in body
+    assert b"<TrnDatas><TrnData></TrnData></TrnDatas>" in body
+
+
+def test_envelope_escapes_values():
+    body = sfcs_lib.CHECK_ROUTE.build(usn="WTR<1>&{usn}", stage="AO")
+    tree = fromstring(body)
+    usn = tree.find(
+        ".//{http://localhost/Tester.WebService/WebService}UnitSerialNumber"
+    )
+    assert usn.text == "WTR<1>&{usn}"
+
+
+def test_envelope_fields():
+    assert sfcs_lib.VALIDATE_HDD.fields == ["usn"]
+    assert (
+        SOAPEnvelope("<A>{value}</A>")
+        .build(value=1)
+        .endswith(b"<A>1</A></soap:Body></soap:Envelope>")
+    )
@@ -0,0 +1,44 @@
+import pytest
+from src.sfcs.parser import SOAPFault, parse_result
+
+RESULT = "{http://localhost/Tester.WebService/WebService}CheckRouteResult"
+
+RESPONSE = b"""<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+    <soap:Body>
+        <CheckRouteResponse xmlns="http://localhost/Tester.WebService/WebService">
+            <CheckRouteResult>OK</CheckRouteResult>
+        </CheckRouteResponse>
+    </soap:Body>
+</soap:Envelope>"""
+
+
+def chunked(data, size):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+def test_parse_result_across_chunks():
+    assert parse_result(chunked(RESPONSE, 7), RESULT) == "OK"
+
+
+def test_parse_result_stops_at_result():
+    chunks = chunked(RESPONSE + b"<never parsed", 64)
+    assert parse_result(chunks, RESULT) == "OK"
+    # The broken trailer was left in the stream.
+    assert next(chunks, None) is not None
+
+
+def test_parse_result_missing_element():
+    assert parse_result([RESPONSE], RESULT.replace("CheckRoute", "Complete")) is None
+
+
+def test_parse_result_raises_soap_faults():
+    fault = b"""<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+        <soap:Body><soap:Fault>
+            <faultcode>soap:Client</faultcode>
+            <faultstring>Bad request</faultstring>
+        </soap:Fault></soap:Body></soap:Envelope>"""
+    with pytest.raises(SOAPFault) as error:
+        parse_result([fault], RESULT)
+    assert error.value.faultcode == "soap:Client"
+    assert error.value.faultstring == "Bad request"
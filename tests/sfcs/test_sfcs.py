@@ -1,4 +1,5 @@
 import pytest
+import requests
 from xml.etree.ElementTree import fromstring
 from src.sfcs import sfcs_lib
 
@@ -12,6 +13,22 @@ sample_response_content = """<?xml version="1.0" encoding="utf-8"?>
     </soap:Body>
 </soap:Envelope>"""
 
+sample_fault_content = """<?xml version="1.0" encoding="utf-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+    <soap:Body>
+        <soap:Fault>
+            <faultcode>soap:Server</faultcode>
+            <faultstring>Server was unable to process request.</faultstring>
+        </soap:Fault>
+    </soap:Body>
+</soap:Envelope>"""
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with an empty route cache."""
+    sfcs_lib.route_cache.invalidate()
+
 
 @pytest.fixture
 def mock_response(mocker):
@@ -27,12 +44,6 @@ def mock_post_request(mocker):
     return mocker.patch("src.sfcs.sfcs_lib.post_request")
 
 
-@pytest.fixture
-def mock_find_xml_value(mocker):
-    """Mock the find_xml_value function."""
-    return mocker.patch("src.sfcs.sfcs_lib.find_xml_value")
-
-
 def test_find_xml_value():
 
     # Convert the XML content to an ElementTree object.
@@ -54,7 +65,7 @@ def test_find_xml_value():
 
 
 def test_post_request(mocker, mock_response):
-    mock_post = mocker.patch("requests.post", return_value=mock_response)
+    mock_post = mocker.patch("requests.Session.post", return_value=mock_response)
     body = "<test>test</test>"
     endpoint = "test_endpoint"
     response_tree = sfcs_lib.post_request(body, endpoint)
@@ -101,54 +112,160 @@ def test_generate_soap_body():
     assert normalized_body == normalized_expected_body
 
 
-def test_check_route(mock_post_request, mock_find_xml_value):
+def test_check_route(mock_post_request):
     usn = "12345"
     stage = "AO"
-    mock_tree = fromstring(sample_response_content)
-    mock_post_request.return_value = mock_tree
-    mock_find_xml_value.return_value = "OK"
+    mock_post_request.return_value = "OK"
 
     result = sfcs_lib.check_route(usn, stage)
     assert result == "OK"
+    assert mock_post_request.call_args.kwargs["result"] == (
+        sfcs_lib.TESTER_NAMESPACE + "CheckRouteResult"
+    )
 
 
-def test_upload_USN_item_with_barcode_validation(
-    mock_post_request, mock_find_xml_value
-):
+def test_upload_USN_item_with_barcode_validation(mock_post_request):
     usn = "12345"
     csn = "54321"
     line = "1"
     workstation = "1"
     employee_id = "1"
     stage = "AO"
-    mock_tree = fromstring(sample_response_content)
-    mock_post_request.return_value = mock_tree
-    mock_find_xml_value.return_value = "OK"
+    mock_post_request.return_value = "OK"
 
     result = sfcs_lib.upload_USN_item_with_barcode_validation(
         usn, csn, line, workstation, employee_id, stage
     )
     assert result == "OK"
+    assert mock_post_request.call_args.kwargs["result"] == (
+        sfcs_lib.TESTER_NAMESPACE + "UploadUSNItemWithBarcodeValidationResult"
+    )
 
 
-def test_send_complete_to_sfcs(mock_post_request, mock_find_xml_value):
+def test_send_complete_to_sfcs(mock_post_request):
     usn = "12345"
     stage = "AO"
     station = "2"
     username = "test_user"
-    mock_tree = fromstring(sample_response_content)
-    mock_post_request.return_value = mock_tree
-    mock_find_xml_value.return_value = "OK"
+    mock_post_request.return_value = "OK"
 
     result = sfcs_lib.send_complete(usn, station, station, username, stage)
     assert result == "OK"
+    assert mock_post_request.call_args.kwargs["result"] == (
+        sfcs_lib.TESTER_NAMESPACE + "CompleteResult"
+    )
 
 
-def test_validate_hdd(mock_post_request, mock_find_xml_value):
+def test_validate_hdd(mock_post_request):
     usn = "12345"
-    mock_tree = fromstring(sample_response_content)
-    mock_post_request.return_value = mock_tree
-    mock_find_xml_value.return_value = "24"
+    mock_post_request.return_value = "24"
 
     result = sfcs_lib.validate_hdd(usn)
     assert result == "24"
+    assert mock_post_request.call_args.kwargs["result"] == (
+        sfcs_lib.TESTER_NAMESPACE + "DynamicDBFunctionResult"
+    )
+
+
+def test_post_request_parses_result(mocker, mock_response):
+    mock_response.status_code = 200
+    mock_response.content = sample_response_content.encode()
+    mock_post = mocker.patch("requests.Session.post", return_value=mock_response)
+    result = sfcs_lib.post_request(
+        "<test/>",
+        "endpoint",
+        result=sfcs_lib.TESTER_NAMESPACE + "DynamicDBFunctionResult",
+    )
+    assert result == "OK"
+    assert "stream" not in mock_post.call_args.kwargs
+
+
+def test_post_request_returns_soap_faults(mocker, mock_response):
+    mock_response.content = sample_fault_content.encode()
+    mocker.patch("requests.Session.post", return_value=mock_response)
+    result = sfcs_lib.post_request(
+        "<test/>", "endpoint", result=sfcs_lib.TESTER_NAMESPACE + "CheckRouteResult"
+    )
+    assert result == "SOAP Fault: Server was unable to process request."
+
+
+def test_post_request_fails_fast_when_circuit_is_open(mocker):
+    breaker = mocker.patch("src.sfcs.sfcs_lib.get_breaker").return_value
+    breaker.allow.return_value = False
+    mock_post = mocker.patch("requests.Session.post")
+    assert sfcs_lib.post_request("<test/>", "endpoint") == sfcs_lib.CIRCUIT_OPEN
+    mock_post.assert_not_called()
+
+
+def test_post_request_records_timeouts(mocker):
+    breaker = mocker.patch("src.sfcs.sfcs_lib.get_breaker").return_value
+    breaker.allow.return_value = True
+    mocker.patch("requests.Session.post", side_effect=requests.exceptions.Timeout())
+    assert sfcs_lib.post_request("<test/>", "endpoint") == "TIMEOUT"
+    breaker.record_failure.assert_called_once()
+
+
+def test_post_request_reports_unreachable_server(mocker):
+    breaker = mocker.patch("src.sfcs.sfcs_lib.get_breaker").return_value
+    breaker.allow.return_value = True
+    mocker.patch(
+        "requests.Session.post",
+        side_effect=requests.exceptions.ConnectionError("refused"),
+    )
+    result = sfcs_lib.post_request("<test/>", "endpoint")
+    assert result == sfcs_lib.UNREACHABLE
+    assert sfcs_lib.is_transient(result)
+    breaker.record_failure.assert_called_once()
+
+
+def test_http_errors_are_not_transient(mocker, mock_response):
+    breaker = mocker.patch("src.sfcs.sfcs_lib.get_breaker").return_value
+    breaker.allow.return_value = True
+    mock_response.content = b"<html>Server Error</html"
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("500")
+    mocker.patch("requests.Session.post", return_value=mock_response)
+    result = sfcs_lib.post_request(
+        "<test/>", "endpoint", result=sfcs_lib.TESTER_NAMESPACE + "CheckRouteResult"
+    )
+    assert result is None
+    assert not sfcs_lib.is_transient(result)
+    assert not sfcs_lib.is_cacheable(result)
+
+
+def test_post_request_records_metrics(mocker):
+    breaker = mocker.patch("src.sfcs.sfcs_lib.get_breaker").return_value
+    breaker.allow.return_value = True
+    mocker.patch("requests.Session.post", side_effect=requests.exceptions.Timeout())
+    timeouts = sfcs_lib.requests_total.value(operation="probe", outcome="timeout")
+    observed = sfcs_lib.request_duration.count(operation="probe")
+    sfcs_lib.post_request("<test/>", "endpoint", operation="probe")
+    assert (
+        sfcs_lib.requests_total.value(operation="probe", outcome="timeout")
+        == timeouts + 1
+    )
+    assert sfcs_lib.request_duration.count(operation="probe") == observed + 1
+
+
+def test_check_route_is_cached_until_invalidated(mock_post_request):
+    mock_post_request.return_value = "OK"
+    assert sfcs_lib.check_route("WTR1", "AO") == "OK"
+    assert sfcs_lib.check_route("WTR1", "AO") == "OK"
+    assert mock_post_request.call_count == 1
+
+    sfcs_lib.send_complete("WTR1", "3L6", "WS1", "E1", "AO")
+    assert sfcs_lib.check_route("WTR1", "AO") == "OK"
+    assert mock_post_request.call_count == 3
+
+
+def test_validate_hdd_is_not_cached(mock_post_request):
+    mock_post_request.return_value = "23"
+    assert sfcs_lib.validate_hdd("WTR1") == "23"
+    mock_post_request.return_value = "24"
+    assert sfcs_lib.validate_hdd("WTR1") == "24"
+
+
+def test_timeouts_are_not_cached(mock_post_request):
+    mock_post_request.return_value = "TIMEOUT"
+    assert sfcs_lib.check_route("WTR1") == "TIMEOUT"
+    mock_post_request.return_value = "OK"
+    assert sfcs_lib.check_route("WTR1") == "OK"
@@ -0,0 +1,123 @@
+import socket
+import threading
+import pytest
+import requests
+from urllib3.exceptions import ProtocolError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.sfcs.transport import SFCSTransport
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = b"<ok/>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        # The web service only answers POST, the connection stays open.
+        self.send_response(405)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    """Start a local keep-alive HTTP server."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/test"
+    server.shutdown()
+    server.server_close()
+
+
+def test_prewarm_opens_pool_connections(server_url, mocker):
+    transport = SFCSTransport(pool_size=2, idle_timeout=60, stale_retries=1)
+    # Only the public session API, the adapter internals differ across the
+    # requests versions (requirements.txt pins 2.31).
+    head = mocker.spy(transport.session, "head")
+    assert transport.prewarm(server_url, connections=3, timeout=5) == 2
+    assert head.call_count == 2
+    for _ in range(2):
+        transport.post(server_url, b"<a/>", {}, timeout=5)
+    stats = transport.stats.snapshot()
+    assert stats["new_connections"] == 2
+    assert stats["reused_connections"] == 2
+
+
+def test_transport_reuses_connections(server_url):
+    transport = SFCSTransport(pool_size=2, idle_timeout=60, stale_retries=1)
+    for _ in range(5):
+        response = transport.post(server_url, b"<a/>", {}, timeout=5)
+        assert response.content == b"<ok/>"
+    stats = transport.stats.snapshot()
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+    transport.close()
+
+
+def test_transport_evicts_idle_connections(server_url):
+    transport = SFCSTransport(pool_size=2, idle_timeout=0, stale_retries=1)
+    transport.post(server_url, b"<a/>", {}, timeout=5)
+    transport.post(server_url, b"<a/>", {}, timeout=5)
+    stats = transport.stats.snapshot()
+    assert stats["new_connections"] == 2
+    assert stats["idle_evictions"] == 1
+    transport.close()
+
+
+def test_transport_retries_stale_connections(mocker):
+    transport = SFCSTransport(pool_size=2, idle_timeout=60, stale_retries=1)
+    response = mocker.Mock()
+    results = [
+        requests.exceptions.ConnectionError(
+            ProtocolError("Connection aborted.", ConnectionResetError())
+        ),
+        response,
+    ]
+
+    def post(*args, **kwargs):
+        # The first attempt took a pooled connection the server had closed.
+        transport._local.reused = post_mock.call_count == 1
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    post_mock = mocker.patch.object(transport.session, "post", side_effect=post)
+    assert transport.post("http://sfcs/test", b"<a/>", {}, timeout=5) is response
+    assert post_mock.call_count == 2
+    assert transport.stats.snapshot()["stale_retries"] == 1
+
+
+def test_transport_does_not_retry_refused_connections():
+    # Bind and release a port so that nothing listens on it.
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    transport = SFCSTransport(pool_size=2, idle_timeout=60, stale_retries=3)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        transport.post(f"http://127.0.0.1:{port}/test", b"<a/>", {}, timeout=5)
+    stats = transport.stats.snapshot()
+    assert stats["new_connections"] == 1
+    assert stats["stale_retries"] == 0
+
+
+def test_transport_does_not_retry_timeouts(mocker):
+    transport = SFCSTransport(pool_size=2, idle_timeout=60, stale_retries=1)
+    post = mocker.patch.object(
+        transport.session, "post", side_effect=requests.exceptions.Timeout()
+    )
+    with pytest.raises(requests.exceptions.Timeout):
+        transport.post("http://sfcs/test", b"<a/>", {}, timeout=5)
+    assert post.call_count == 1
@@ -61,3 +61,76 @@ def test_category(config):
 
 def test_plc_delay(config):
     assert config.PLC_DELAY == 0.5
+
+
+def test_sfcs_pool_defaults(config):
+    assert config.SFCS_POOL_SIZE == 18
+    assert config.SFCS_POOL_IDLE_TIMEOUT == 60.0
+    assert config.SFCS_STALE_RETRIES == 1
+
+
+def test_plc_batch_window_default(config):
+    assert config.PLC_BATCH_WINDOW == 0.005
+
+
+def test_sfcs_breaker_defaults(config):
+    assert config.SFCS_BREAKER_THRESHOLD == 5
+    assert config.SFCS_BREAKER_RESET_TIMEOUT == 30.0
+    assert config.SFCS_BREAKER_HALF_OPEN_PROBES == 1
+
+
+def test_sfcs_cache_defaults(config):
+    assert config.SFCS_CACHE_SIZE == 256
+    assert config.SFCS_ROUTE_CACHE_TTL == 5.0
+
+
+def test_csn_index_defaults(config):
+    assert config.CSN_INDEX_PERSIST is False
+    assert config.CSN_INDEX_PATH.endswith("csn_index.jsonl")
+
+
+def test_journal_defaults(config):
+    assert config.JOURNAL_ENABLED is True
+    assert config.JOURNAL_PATH.endswith("journal.sqlite3")
+    assert config.JOURNAL_FLUSH_INTERVAL == 5.0
+    assert config.JOURNAL_BATCH_SIZE == 50
+
+
+def test_log_view_max_lines_default(config):
+    assert config.LOG_VIEW_MAX_LINES == 500
+
+
+def test_ui_frame_rate_default(config):
+    assert config.UI_FRAME_RATE == 30
+
+
+def test_metrics_port_default(config):
+    assert config.METRICS_PORT == 0
+
+
+def test_trace_defaults(config):
+    assert config.TRACE_ENABLED is True
+    assert config.TRACE_PATH.endswith("traces.jsonl")
+    assert config.TRACE_BACKUP_COUNT == config.BACKUP_COUNT
+
+
+def test_startup_budget_default(config):
+    assert config.STARTUP_BUDGET == 2.0
+
+
+def test_import_leaves_logging_unconfigured(config):
+    assert config.log_listener is None
+
+
+def test_configure_logging_runs_once(config, mocker):
+    dict_config = mocker.patch("logging.config.dictConfig")
+    mocker.patch("pycomm3.logger.configure_default_logger")
+    start = mocker.patch("helpers.log_queue.start_queue_logging")
+    listener = config.configure_logging()
+    assert config.configure_logging() is listener is start.return_value
+    dict_config.assert_called_once_with(config.build_logging_config())
+    start.assert_called_once()
+
+
+def test_prewarm_connections_default(config):
+    assert config.PREWARM_CONNECTIONS == 2
@@ -0,0 +1,44 @@
+"""
+Fake pycomm3 LogixDriver for soak and replay runs without a controller.
+
+Accepts the open/close/connected/write calls PLCSession makes, waits a
+configurable write latency and records every tag write.
+"""
+
+import time
+import threading
+from collections import Counter
+from pycomm3 import Tag
+
+
+class FakeLogixDriver:
+    # Shared by every driver, set by the harness before the first write.
+    write_latency = 0.002
+    writes = Counter()
+    _lock = threading.Lock()
+
+    def __init__(self, plc_ip):
+        self.plc_ip = plc_ip
+        self.connected = False
+
+    def open(self):
+        self.connected = True
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def write(self, *tags_values):
+        time.sleep(self.write_latency)
+        with self._lock:
+            for tag, value in tags_values:
+                self.writes[(self.plc_ip, tag, value)] += 1
+        results = [Tag(tag, value, "BOOL", None) for tag, value in tags_values]
+        return results if len(results) > 1 else results[0]
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            return {
+                f"{ip} {tag}={value}": n for (ip, tag, value), n in cls.writes.items()
+            }
@@ -0,0 +1,216 @@
+"""
+Local fake of the SFCS Tester.WebService for soak and replay runs.
+
+Answers the CheckRoute, UploadUSNItemWithBarcodeValidation, Complete and
+DynamicDBFunction (HDD validation) SOAP operations. Uploads are counted
+per USN, so the HDD validation returns the number of CSNs uploaded.
+Latency, HTTP errors, "unique constraint" answers and timeouts (a reply
+slower than the client timeout) can be injected at configurable rates.
+
+Usage: python tools/fake_sfcs.py [--port 8080] [--latency-ms 20] ...
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+import threading
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NAMESPACE = "http://localhost/Tester.WebService/WebService"
+OPERATIONS = (
+    "CheckRoute",
+    "UploadUSNItemWithBarcodeValidation",
+    "Complete",
+    "DynamicDBFunction",
+)
+OPERATION_PATTERN = re.compile(rf"<({'|'.join(OPERATIONS)})[\s>]".encode())
+# The HDD validation passes the USN as the P_USN dynamic parameter.
+USN_PATTERN = re.compile(rb"<(?:UnitSerialNumber|strValue)>([^<]*)<")
+CSN_PATTERN = re.compile(rb"<ComponentSerialNumber>([^<]*)<")
+
+RESPONSE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+    "<soap:Body>"
+    f'<{{operation}}Response xmlns="{NAMESPACE}">'
+    "<{operation}Result>{result}</{operation}Result>"
+    "</{operation}Response>"
+    "</soap:Body>"
+    "</soap:Envelope>"
+)
+
+
+class FaultProfile:
+    """Latency and failure injection settings, rates are between 0 and 1."""
+
+    def __init__(
+        self,
+        latency=0.02,
+        jitter=0.01,
+        error_rate=0.0,
+        unique_rate=0.0,
+        timeout_rate=0.0,
+        timeout_delay=6.0,
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.unique_rate = unique_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        with self._lock:
+            return self._random.random(), self._random.uniform(-1, 1)
+
+
+class FakeSFCS:
+    """State of the fake server: uploaded CSNs per USN and request counts."""
+
+    def __init__(self, profile=None):
+        self.profile = profile or FaultProfile()
+        self.requests = Counter()
+        self.injected = Counter()
+        self._uploads = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def handle(self, body):
+        # Return (status, operation, result) for a SOAP request body.
+        match = OPERATION_PATTERN.search(body)
+        if match is None:
+            return 400, None, None
+        operation = match.group(1).decode()
+        with self._lock:
+            self.requests[operation] += 1
+
+        profile = self.profile
+        roll, spread = profile.draw()
+        time.sleep(max(0.0, profile.latency + spread * profile.jitter))
+        if roll < profile.timeout_rate:
+            self._inject("timeout")
+            time.sleep(profile.timeout_delay)
+        elif roll < profile.timeout_rate + profile.error_rate:
+            self._inject("error")
+            return 500, operation, None
+
+        usn = USN_PATTERN.search(body).group(1).decode()
+        if operation == "UploadUSNItemWithBarcodeValidation":
+            csn = CSN_PATTERN.search(body).group(1).decode()
+            # An injected unique constraint is transient, the retry goes through.
+            injected = roll >= 1 - profile.unique_rate
+            with self._lock:
+                duplicate = csn in self._uploads[usn]
+                if not injected:
+                    self._uploads[usn].add(csn)
+            if duplicate or injected:
+                self._inject("unique constraint")
+                return 200, operation, "Violation of unique constraint"
+        elif operation == "DynamicDBFunction":
+            with self._lock:
+                return 200, operation, str(len(self._uploads[usn]))
+        elif operation == "Complete":
+            with self._lock:
+                self._uploads.pop(usn, None)
+        return 200, operation, "OK"
+
+    def _inject(self, fault):
+        with self._lock:
+            self.injected[fault] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "injected": dict(self.injected),
+                "open_usns": len(self._uploads),
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # The headers and the body are two writes, do not hold the body for the ACK.
+    disable_nagle_algorithm = True
+    sfcs = None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status, operation, result = self.sfcs.handle(body)
+        payload = b""
+        if status == 200:
+            payload = RESPONSE.format(operation=operation, result=result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # A client that gave up on an injected timeout closed the connection.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_server(sfcs, host="127.0.0.1", port=0):
+    # Serve the fake from a daemon thread, returns the server.
+    handler = type("FakeSFCSHandler", (_Handler,), {"sfcs": sfcs})
+    server = _Server((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--unique-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-delay", type=float, default=6.0)
+    parser.add_argument("--seed", type=int)
+
+
+def profile_from_arguments(args):
+    return FaultProfile(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        unique_rate=args.unique_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=args.timeout_delay,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    sfcs = FakeSFCS(profile_from_arguments(args))
+    server = start_server(sfcs, args.host, args.port)
+    print(f"Fake SFCS listening on {args.host}:{server.server_port}")
+    try:
+        while True:
+            time.sleep(60)
+            print(sfcs.stats())
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
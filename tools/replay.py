@@ -0,0 +1,309 @@
+"""
+Replay the scans of production logs against the logic layer.
+
+Parses the "Serial Number Scanned" (and "Quantity entered") lines of
+plc_auto_scanning.log files, rebuilds the scan sequence of every
+workstation and submits it again through
+PLCAutoScanningLogic.handle_serials_submit, in real time or N times
+faster. SFCS is the local fake (tools/fake_sfcs.py) unless --sfcs points
+to a staging server, the PLC is always tools/fake_plc.py. Every report
+interval it prints the scans, the scan latency percentiles and the
+deepest task queue and retry backlog seen, so shift bursts can be
+reproduced while tuning the worker count, the retries and the timeouts.
+
+A log file belongs to one workstation, name it with WORKSTATION=PATH.
+Rotated backups of the same workstation are merged by timestamp.
+
+Usage:
+    python tools/replay.py [--speed 10] [--workers 18] [--sfcs HOST:PORT]
+                           [3L06B1AO17=]logs/plc_auto_scanning.log* ...
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from fake_plc import FakeLogixDriver  # noqa: E402
+from fake_sfcs import (  # noqa: E402
+    FakeSFCS,
+    add_profile_arguments,
+    profile_from_arguments,
+    start_server,
+)
+from soak import (  # noqa: E402
+    DEFAULT_ENVIRONMENT,
+    PERCENTILES,
+    LatencyRecorder,
+    build_station,
+    memory_mb,
+    percentile,
+    queue_depth,
+    retries_scheduled,
+)
+
+DEFAULT_WORKSTATION = "3L06B1AO17"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S,%f"
+LINE_PATTERN = re.compile(
+    r"^(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) \[\w+\] [\w.]+: "
+    r"(?:Serial Number Scanned: (?P<serial>\S*)|Quantity entered: (?P<quantity>\d+))"
+)
+
+
+def parse_log(path):
+    # Yield (timestamp, kind, value) for the scans and quantity changes of a log.
+    with open(path, encoding="utf8", errors="replace") as f:
+        for line in f:
+            match = LINE_PATTERN.match(line)
+            if match is None:
+                continue
+            timestamp = datetime.strptime(match["time"], TIME_FORMAT).timestamp()
+            if match["quantity"] is not None:
+                yield timestamp, "quantity", int(match["quantity"])
+            else:
+                yield timestamp, "scan", match["serial"]
+
+
+def load_events(sources):
+    """
+    Return the events of every workstation, sorted by timestamp.
+
+    sources are "PATH" or "WORKSTATION=PATH" strings, the events are
+    (timestamp, workstation, kind, value) tuples.
+    """
+    events = []
+    for source in sources:
+        workstation, _, path = source.rpartition("=")
+        workstation = workstation or DEFAULT_WORKSTATION
+        events.extend(
+            (timestamp, workstation, kind, value)
+            for timestamp, kind, value in parse_log(path)
+        )
+    # The sort is stable, lines with the same timestamp keep the log order.
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+class QueueSampler:
+    """Deepest task queue and retry backlog seen between two reads."""
+
+    def __init__(self, logic, interval=0.05):
+        self._logic = logic
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._queue = self._retries = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="QueueSampler", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            queue = queue_depth(self._logic)
+            retries = retries_scheduled(self._logic)
+            with self._lock:
+                self._queue = max(self._queue, queue)
+                self._retries = max(self._retries, retries)
+
+    def drain(self):
+        with self._lock:
+            peaks = self._queue, self._retries
+            self._queue = self._retries = 0
+        return peaks
+
+
+def replay(events, stations, speed, stop):
+    # Submit the events on their schedule, speed 0 submits them back to back.
+    if not events:
+        return
+    first = events[0][0]
+    started_at = time.monotonic()
+    for timestamp, workstation, kind, value in events:
+        if speed:
+            stop.wait(
+                max(0.0, started_at + (timestamp - first) / speed - time.monotonic())
+            )
+        if stop.is_set():
+            return
+        app, station_logic, recorder = stations[workstation]
+        if kind == "quantity":
+            app.quantity = value
+            continue
+        app.serial_numbers.value = value
+        recorder.submitted(value)
+        station_logic.handle_serials_submit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sources", nargs="+", help="[WORKSTATION=]PATH of a log")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay N times faster than the log, 0 does not wait",
+    )
+    parser.add_argument("--quantity", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=18)
+    parser.add_argument(
+        "--sfcs", help="HOST:PORT of a staging SFCS, the local fake by default"
+    )
+    parser.add_argument("--report-interval", type=float, default=10.0)
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=60.0,
+        help="seconds to wait for the queue and the retries after the last scan",
+    )
+    parser.add_argument("--output", help="write the summary to this JSON file")
+    parser.add_argument(
+        "--log-level",
+        default="CRITICAL",
+        help="application log level, keeps the replayed logs from rotating",
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    events = load_events(args.sources)
+    scans = sum(1 for event in events if event[2] == "scan")
+    if not scans:
+        print("No scans found.", file=sys.stderr)
+        return 1
+    span = events[-1][0] - events[0][0]
+    print(
+        f"{scans} scans over {span / 60:.1f} min from "
+        f"{len({event[1] for event in events})} workstation(s)"
+    )
+
+    sfcs = server = None
+    if args.sfcs:
+        address = args.sfcs
+    else:
+        sfcs = FakeSFCS(profile_from_arguments(args))
+        server = start_server(sfcs)
+        address = f"127.0.0.1:{server.server_port}"
+
+    # The settings are read when config is imported, set them first.
+    for name, value in DEFAULT_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    os.environ["SFCS_SERVER"] = address
+
+    from plc import session
+    from config import configure_logging
+    from backend import logic
+
+    configure_logging()
+    logging.getLogger().setLevel(args.log_level)
+    session._manager = session.PLCSessionManager(driver_factory=FakeLogixDriver)
+
+    recorder = LatencyRecorder()
+    stations = {}
+    for workstation in sorted({event[1] for event in events}):
+        app, station_logic = build_station(logic, recorder, workstation, args.quantity)
+        stations[workstation] = (app, station_logic, recorder)
+    station_logic.start_tasks_workers(args.workers)
+
+    stop = threading.Event()
+    feeder = threading.Thread(
+        target=replay,
+        args=(events, stations, args.speed, stop),
+        name="Replay",
+        daemon=True,
+    )
+    sampler = QueueSampler(logic)
+    sampler.start()
+    feeder.start()
+
+    started_at = time.monotonic()
+    drain_deadline = None
+    reports = []
+    print(
+        f"{'elapsed':>8}{'log min':>9}{'scans/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'queue':>7}{'retries':>9}{'rss MB':>9}"
+    )
+    try:
+        while True:
+            stop.wait(args.report_interval)
+            latencies = recorder.drain()
+            queue, retries = sampler.drain()
+            elapsed = time.monotonic() - started_at
+            report = {
+                "elapsed": round(elapsed, 1),
+                "log_minutes": (
+                    round(min(span, elapsed * args.speed) / 60, 1)
+                    if args.speed
+                    else None
+                ),
+                "throughput": len(latencies) / args.report_interval,
+                "max_queue": queue,
+                "max_retries": retries,
+                "rss_mb": round(memory_mb(), 1),
+            }
+            for p in PERCENTILES:
+                report[f"p{p}_ms"] = (
+                    round(percentile(latencies, p) * 1000, 1) if latencies else None
+                )
+            reports.append(report)
+            print(
+                f"{report['elapsed']:>8.0f}{report['log_minutes'] or 0:>9.1f}"
+                f"{report['throughput']:>9.2f}"
+                + "".join(f"{report[f'p{p}_ms'] or 0:>9.1f}" for p in PERCENTILES)
+                + f"{queue:>7}{retries:>9}{report['rss_mb']:>9.1f}"
+            )
+
+            if feeder.is_alive():
+                continue
+            # Every scan was submitted, wait for the queue and the retries.
+            idle = queue_depth(logic) == 0 and retries_scheduled(logic) == 0
+            drain_deadline = drain_deadline or time.monotonic() + args.drain_timeout
+            if idle or time.monotonic() > drain_deadline:
+                break
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    sampler.stop()
+
+    summary = {
+        "settings": vars(args),
+        "scans": scans,
+        "completed": recorder.completed,
+        "log_minutes": round(span / 60, 1),
+        "replay_seconds": round(time.monotonic() - started_at, 1),
+        "max_queue": max(report["max_queue"] for report in reports),
+        "max_retries": max(report["max_retries"] for report in reports),
+        "workstations": {
+            workstation: sum(
+                1 for event in events if event[1] == workstation and event[2] == "scan"
+            )
+            for workstation in stations
+        },
+        "sfcs": sfcs.stats() if sfcs else None,
+        "reports": reports,
+    }
+    print(json.dumps({k: v for k, v in summary.items() if k != "reports"}, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(summary, f, indent=2)
+    if server is not None:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,379 @@
+"""
+End-to-end soak test of the scan pipeline on a single machine.
+
+Starts the fake SFCS server (tools/fake_sfcs.py), replaces the pycomm3
+LogixDriver with tools/fake_plc.py and feeds USN + CSN scans through
+PLCAutoScanningLogic.handle_serials_submit at a set rate, one feeder
+thread per simulated station. Every report interval it prints the
+throughput, the scan latency percentiles, the task queue depth, the
+thread count and the memory in use, and it can write a JSON summary.
+
+Usage:
+    python tools/soak.py [--duration 3600] [--rate 5] [--stations 2]
+                         [--latency-ms 20] [--timeout-rate 0.01] ...
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from fake_plc import FakeLogixDriver  # noqa: E402
+from fake_sfcs import (  # noqa: E402
+    FakeSFCS,
+    add_profile_arguments,
+    profile_from_arguments,
+    start_server,
+)
+
+PERCENTILES = (50, 95, 99)
+MAX_RESCANS = 3
+
+# Required settings of config.py that have no default.
+DEFAULT_ENVIRONMENT = {
+    "MAX_RETRIES": "3",
+    "RETRY_DELAY": "1",
+    "PLC_3L3": "10.0.0.3",
+    "PLC_3L6": "10.0.0.6",
+    "STAGE": "AO",
+    "CATEGORY": "A",
+    "PLC_DELAY": "0.5",
+    "MAX_BYTES": "10000000",
+    "BACKUP_COUNT": "3",
+    "JOURNAL_ENABLED": "false",
+    "TRACE_ENABLED": "false",
+}
+
+
+class Entry:
+    """Stand-in for the Tk StringVar of the serial numbers entry."""
+
+    def __init__(self):
+        self.value = ""
+
+    def get(self):
+        return self.value
+
+
+class HeadlessApp:
+    """Stand-in for the interface, the UI calls do nothing."""
+
+    def __init__(self, workstation, quantity, robot_number=1):
+        self.serial_numbers = Entry()
+        self.current_USN = None
+        self.old_USN = None
+        self.counter = 0
+        self.quantity = quantity
+        self.robot_number = robot_number
+        self.workstation = workstation
+        self.line = "3L6"
+        self.employee_id = "SOAK"
+        self.response_text = self.error_text = None
+        self.quantity_label = self.unit_serial_number_label = None
+
+    def update_text_widget(self, *args):
+        pass
+
+    def update_labels(self, *args):
+        pass
+
+    def clean_text_widget(self, *args):
+        pass
+
+
+class LatencyRecorder:
+    """End-to-end scan latencies, from the submit to the last attempt."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._submitted = {}
+        self._latencies = {}
+        self.completed = 0
+
+    def submitted(self, serial):
+        with self._lock:
+            self._submitted[serial] = time.monotonic()
+
+    def finished(self, serial):
+        # Called after every attempt, a retry replaces the earlier latency.
+        now = time.monotonic()
+        with self._lock:
+            submitted_at = self._submitted.get(serial)
+            if submitted_at is not None:
+                if serial not in self._latencies:
+                    self.completed += 1
+                self._latencies[serial] = now - submitted_at
+
+    def drain(self):
+        # Latencies of the interval, the scans they belong to are forgotten.
+        with self._lock:
+            latencies, self._latencies = self._latencies, {}
+            for serial in latencies:
+                self._submitted.pop(serial, None)
+        return sorted(latencies.values())
+
+
+def percentile(values, percent):
+    index = max(0, -(-len(values) * percent // 100) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+def memory_mb():
+    # Resident set size of the process, from /proc on Linux.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def queue_depth(logic_module):
+    # Tasks submitted and not finished, on the async engine when it is enabled.
+    if logic_module.engine is not None:
+        return logic_module.engine.qsize()
+    return logic_module.tasks_dispatcher.qsize()
+
+
+def retries_scheduled(logic_module):
+    if logic_module.engine is not None:
+        return logic_module.engine.stats()["scheduled"]
+    return logic_module.retry_scheduler.stats()["scheduled"]
+
+
+def build_station(logic_module, recorder, workstation, quantity):
+    class SoakLogic(logic_module.PLCAutoScanningLogic):
+        def process_serial(self, serial_number, *args, **kwargs):
+            try:
+                super().process_serial(serial_number, *args, **kwargs)
+            finally:
+                recorder.finished(serial_number)
+
+        def process_check_route(self, serial_number):
+            try:
+                super().process_check_route(serial_number)
+            finally:
+                recorder.finished(serial_number)
+
+        async def process_serial_async(self, serial_number, *args, **kwargs):
+            try:
+                await super().process_serial_async(serial_number, *args, **kwargs)
+            finally:
+                recorder.finished(serial_number)
+
+        async def process_check_route_async(self, serial_number):
+            try:
+                await super().process_check_route_async(serial_number)
+            finally:
+                recorder.finished(serial_number)
+
+    app = HeadlessApp(workstation, quantity)
+    return app, SoakLogic(app)
+
+
+def feed(app, logic, recorder, interval, settle_time, stop, counters, station):
+    # Scan a USN, then its CSNs, one scan every interval seconds.
+    sequence = 0
+    next_at = time.monotonic()
+
+    def scan(serial):
+        nonlocal next_at
+        stop.wait(max(0.0, next_at - time.monotonic()))
+        next_at = max(next_at + interval, time.monotonic() - interval)
+        app.serial_numbers.value = serial
+        recorder.submitted(serial)
+        logic.handle_serials_submit()
+
+    def wait_for(condition, timeout):
+        deadline = time.monotonic() + timeout
+        while not condition() and not stop.is_set():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return condition()
+
+    def settle(usn):
+        # Wait until the USN restarted or its counter stopped moving.
+        while not stop.is_set() and app.current_USN == usn:
+            counter = app.counter
+            stop.wait(settle_time)
+            if app.counter == counter:
+                return
+
+    while not stop.is_set():
+        sequence += 1
+        usn = f"WTR{station:02d}{sequence:06d}"
+        scan(usn)
+        if not wait_for(lambda: app.current_USN == usn, 30):
+            counters["route_failures"] += 1
+            continue
+
+        # Scan the CSNs, then rescan the rejected ones like an operator would.
+        serials = (f"ZA{station:02d}{sequence:06d}{index:03d}" for index in range(999))
+        missing = app.quantity
+        for attempt in range(MAX_RESCANS + 1):
+            for _ in range(missing):
+                if stop.is_set():
+                    return
+                scan(next(serials))
+            settle(usn)
+            missing = app.quantity - app.counter
+            if app.current_USN != usn or missing <= 0:
+                break
+            counters["rescans"] += missing
+
+        if app.current_USN is None or app.current_USN != usn:
+            counters["completed_usns"] += 1
+        elif not stop.is_set():
+            counters["abandoned_usns"] += 1
+            app.counter = 0
+            app.old_USN = app.current_USN
+            app.current_USN = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=3600.0)
+    parser.add_argument("--rate", type=float, default=5.0, help="scans per second")
+    parser.add_argument("--stations", type=int, default=2)
+    parser.add_argument("--quantity", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=18)
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=10.0,
+        help="seconds without progress before the rejected CSNs are rescanned",
+    )
+    parser.add_argument("--report-interval", type=float, default=60.0)
+    parser.add_argument("--output", help="write the summary to this JSON file")
+    parser.add_argument(
+        "--log-level",
+        default="CRITICAL",
+        help="application log level, the injected faults are logged as errors",
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    sfcs = FakeSFCS(profile_from_arguments(args))
+    server = start_server(sfcs)
+
+    # The settings are read when config is imported, set them first.
+    for name, value in DEFAULT_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    os.environ["SFCS_SERVER"] = f"127.0.0.1:{server.server_port}"
+
+    from plc import session
+    from config import configure_logging
+    from backend import logic
+    from helpers.metrics import get_registry
+
+    configure_logging()
+    logging.getLogger().setLevel(args.log_level)
+    session._manager = session.PLCSessionManager(driver_factory=FakeLogixDriver)
+
+    recorder = LatencyRecorder()
+    stop = threading.Event()
+    # Every feeder thread updates its own counters, they are summed at the end.
+    counters = []
+    stations = []
+    for station in range(args.stations):
+        counters.append(
+            dict.fromkeys(
+                ("route_failures", "completed_usns", "abandoned_usns", "rescans"), 0
+            )
+        )
+        app, station_logic = build_station(
+            logic, recorder, f"3L06B1AO{station:02d}", args.quantity
+        )
+        stations.append(
+            threading.Thread(
+                target=feed,
+                args=(
+                    app,
+                    station_logic,
+                    recorder,
+                    args.stations / args.rate,
+                    args.settle,
+                    stop,
+                    counters[station],
+                    station,
+                ),
+                name=f"Station{station}",
+                daemon=True,
+            )
+        )
+    station_logic.start_tasks_workers(args.workers)
+    for thread in stations:
+        thread.start()
+
+    scan_results = get_registry().counter(
+        "scan_results_total", "Scanned CSNs by result.", ["result"]
+    )
+    started_at = reported_at = time.monotonic()
+    reports = []
+    print(
+        f"{'elapsed':>8}{'scans/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'queue':>7}{'threads':>9}{'rss MB':>9}"
+    )
+    try:
+        while time.monotonic() - started_at < args.duration:
+            stop.wait(min(args.report_interval, args.duration))
+            latencies = recorder.drain()
+            # The interval may end early on the last report or run late.
+            now = time.monotonic()
+            elapsed, reported_at = now - reported_at, now
+            report = {
+                "elapsed": round(now - started_at, 1),
+                "throughput": len(latencies) / elapsed,
+                "queue": queue_depth(logic),
+                "threads": threading.active_count(),
+                "rss_mb": round(memory_mb(), 1),
+            }
+            for p in PERCENTILES:
+                report[f"p{p}_ms"] = (
+                    round(percentile(latencies, p) * 1000, 1) if latencies else None
+                )
+            reports.append(report)
+            print(
+                f"{report['elapsed']:>8.0f}{report['throughput']:>9.2f}"
+                + "".join(f"{report[f'p{p}_ms'] or 0:>9.1f}" for p in PERCENTILES)
+                + f"{report['queue']:>7}{report['threads']:>9}{report['rss_mb']:>9.1f}"
+            )
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+
+    summary = {
+        "settings": vars(args),
+        "scans": recorder.completed,
+        "results": {
+            result: scan_results.value(result=result)
+            for result in ("ok", "ng", "queued", "duplicate", "quantity_limit")
+        },
+        "stations": {
+            name: sum(station[name] for station in counters) for name in counters[0]
+        },
+        "sfcs": sfcs.stats(),
+        "plc_writes": sum(FakeLogixDriver.writes.values()),
+        "reports": reports,
+    }
+    print(json.dumps({k: v for k, v in summary.items() if k != "reports"}, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(summary, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()